@@ -9,12 +9,17 @@
 # The functions print an error message if the number of parameters is incorrect.
 # The error message is different depending on the number of parameters expected by the command.
 
+from plans import compile_plan
+from suggest import did_you_mean, room_suggestions
+
 
 # The error message is stored in the MSG0 and MSG1 variables and formatted with the command_word variable, the first word in the command.
 # The MSG0 variable is used when the command does not take any parameter.
 MSG0 = "\nLa commande '{command_word}' ne prend pas de paramètre.\n"
 # The MSG1 variable is used when the command takes 1 parameter.
 MSG1 = "\nLa commande '{command_word}' prend 1 seul paramètre.\n"
+# Nombre maximal de noms de joueurs affichés par 'look' et 'who'
+NAMES_SHOWN = 20
 
 class Actions:
 
@@ -50,33 +55,17 @@ class Actions:
         # If the number of parameters is incorrect, print an error message and return False.
         if l != number_of_parameters + 1:
             command_word = list_of_words[0]
-            print(MSG1.format(command_word=command_word))
-            return False
-        raw_direction = list_of_words[1].strip().upper()
-
-        # Synonymes -> direction canonique
-        SYNONYMS = {
-            "N": "N", "NORD": "N", "NORTH": "N", "Nord" : "N", "nord" : "N",
-            "S": "S", "SUD": "S", "SOUTH": "S", "Sud" : "S", "sud" : "S",
-            "E": "E", "EST": "E", "EAST": "E", "Est" : "E", "est" : "E",
-            "O": "O", "OUEST": "O", "WEST": "O", "Ouest" : "O", "ouest" : "O",
-            "U": "U", "UP": "U", "HAUT": "U", "Haut": "U", "haut": "U",
-            "D": "D", "DOWN": "D", "BAS": "D", "Bas": "D", "bas": "D",
-        }
-
-        # Si la direction correspond directement
-        if raw_direction in SYNONYMS:
-            direction = SYNONYMS[raw_direction]
-        else:
-            # Test sur la première lettre (ex : "ouest")
-            if raw_direction and raw_direction[0] in SYNONYMS:
-                direction = SYNONYMS[raw_direction[0]]
-            else:
-                print(f"\nDirection inconnue : '{list_of_words[1]}'.")
-                return False
+            print(MSG1.format(command_word=command_word), file=game.output)
+            return False
+        # Synonymes et abréviations -> direction canonique (index compilé au setup)
+        direction = game.parser.direction(list_of_words[1])
+        if direction is None:
+            suggestions = game.parser.suggest_direction(list_of_words[1])
+            print(f"\nDirection inconnue : '{list_of_words[1]}'.{did_you_mean(suggestions)}", file=game.output)
+            return False
         # Get the direction from the list of words.
         if direction not in game.valid_directions:
-            print(f"\nImpossible d'aller vers '{direction}' : direction non utilisée sur la carte.\n")
+            print(f"\nImpossible d'aller vers '{direction}' : direction non utilisée sur la carte.\n", file=game.output)
             return False
         prev_room = game.player.current_room
 
@@ -85,15 +74,17 @@ class Actions:
 
         # Si déplacement réussi, enregistrer l'ancienne salle dans l'historique
         if moved:
-            # protège au cas où prev_room soit None (rare)
-            if prev_room not in game.history:
-               game.history.append(prev_room)
-            # optionnel: afficher l'historique après déplacement
+            # lieux visités + pile de retour (ignore prev_room None)
+            game.history.record_move(prev_room)
+            # afficher l'historique après déplacement (texte tenu à jour par
+            # NavigationHistory : une ligne ajoutée par nouveau lieu)
             hist_text = game.get_history()
             if hist_text:
-                print("\n" + hist_text)
+                print("\n" + hist_text, file=game.output)
             return True
         else:
+            if game.metrics is not None:
+                game.metrics.incr("failed_moves")
             return False
         # Tout est bon → déplacement
         return game.player.move(direction)
@@ -127,13 +118,13 @@ class Actions:
         # If the number of parameters is incorrect, print an error message and return False.
         if l != number_of_parameters + 1:
             command_word = list_of_words[0]
-            print(MSG0.format(command_word=command_word))
+            print(MSG0.format(command_word=command_word), file=game.output)
             return False
         
         # Set the finished attribute of the game object to True.
         player = game.player
         msg = f"\nMerci {player.name} d'avoir joué. Au revoir.\n"
-        print(msg)
+        print(msg, file=game.output)
         game.finished = True
         return True
 
@@ -167,39 +158,344 @@ class Actions:
         l = len(list_of_words)
         if l != number_of_parameters + 1:
             command_word = list_of_words[0]
-            print(MSG0.format(command_word=command_word))
+            print(MSG0.format(command_word=command_word), file=game.output)
             return False
         
         # Print the list of available commands.
-        print("\nVoici les commandes disponibles:")
-        for command in game.commands.values():
-            print("\t- " + str(command))
-        print()
+        print("\nVoici les commandes disponibles:", file=game.output)
+        # Une commande à alias apparaît plusieurs fois dans game.commands
+        for command in dict.fromkeys(game.commands.values()):
+            print("\t- " + str(command), file=game.output)
+        print(file=game.output)
         return True
   
     
     def history(game, list_of_words, number_of_parameters):
       text = game.get_history()
       if not text:
-        print("\nAucun lieu visité pour le moment.\n")
+        print("\nAucun lieu visité pour le moment.\n", file=game.output)
       else:
-        print("\n" + text + "\n")
+        print("\n" + text + "\n", file=game.output)
       return True
         
 
+    def map(game, list_of_words, number_of_parameters):
+        """
+        Print the map of the explored rooms around the player (current level).
+
+        Args:
+            game (Game): The game object.
+            list_of_words (list): The list of words in the command.
+            number_of_parameters (int): The number of parameters expected by the command.
+
+        Returns:
+            bool: True if the command was executed successfully, False otherwise.
+
+        Examples:
+
+        >>> import os
+        >>> from game import Game
+        >>> game = Game(output=open(os.devnull, "w"))
+        >>> game.setup("Link")
+        >>> Actions.map(game, ["map"], 0)
+        True
+        >>> Actions.map(game, ["map", "N"], 0)
+        False
+        """
+        l = len(list_of_words)
+        if l != number_of_parameters + 1:
+            command_word = list_of_words[0]
+            print(MSG0.format(command_word=command_word), file=game.output)
+            return False
+        text = game.explored_map.render(game.player.current_room)
+        print("\n" + text + "\n", file=game.output)
+        return True
+
     def back(game, list_of_words, number_of_parameters):
         # Vérifier qu'il y a quelque chose dans l'historique
-        if not hasattr(game, "history") or not game.history:
-            print("\nHistorique vide : impossible de revenir en arrière.\n")
+        previous_room = game.history.pop_back()
+        if previous_room is None:
+            if game.metrics is not None:
+                game.metrics.incr("back_empty")
+            print("\nHistorique vide : impossible de revenir en arrière.\n", file=game.output)
             return False
-        # Récupérer la dernière salle visitée
-        previous_room = game.history.pop()
+        # Revenir dans la dernière salle quittée
         game.player.current_room = previous_room
         # Afficher la description de la salle où on revient
-        print(previous_room.get_long_description())
+        print(previous_room.get_long_description(), file=game.output)
 
-        # Afficher l'historique mis à jour (si non vide)
+        # Afficher l'historique mis à jour (si non vide, texte en cache)
         hist_text = game.get_history()
         if hist_text:
-            print("\n" + hist_text)
+            print("\n" + hist_text, file=game.output)
+        return True
+
+
+    def undo(game, list_of_words, number_of_parameters):
+        """
+        Undo the last command that changed the game state.
+
+        Args:
+            game (Game): The game object.
+            list_of_words (list): The list of words in the command.
+            number_of_parameters (int): The number of parameters expected by the command.
+
+        Returns:
+            bool: True if the command was executed successfully, False otherwise.
+        """
+        l = len(list_of_words)
+        if l != number_of_parameters + 1:
+            command_word = list_of_words[0]
+            print(MSG0.format(command_word=command_word), file=game.output)
+            return False
+        return Actions._restore(game, game.timeline.undo(), "\nRien à annuler.\n")
+
+    def redo(game, list_of_words, number_of_parameters):
+        """
+        Redo the last undone command.
+
+        Args:
+            game (Game): The game object.
+            list_of_words (list): The list of words in the command.
+            number_of_parameters (int): The number of parameters expected by the command.
+
+        Returns:
+            bool: True if the command was executed successfully, False otherwise.
+        """
+        l = len(list_of_words)
+        if l != number_of_parameters + 1:
+            command_word = list_of_words[0]
+            print(MSG0.format(command_word=command_word), file=game.output)
+            return False
+        return Actions._restore(game, game.timeline.redo(), "\nRien à rétablir.\n")
+
+    def rewind(game, list_of_words, number_of_parameters):
+        """
+        Go back (or forward, after an undo) to the state of the given turn.
+
+        Args:
+            game (Game): The game object.
+            list_of_words (list): The list of words in the command.
+            number_of_parameters (int): The number of parameters expected by the command.
+
+        Returns:
+            bool: True if the command was executed successfully, False otherwise.
+        """
+        l = len(list_of_words)
+        if l != number_of_parameters + 1:
+            command_word = list_of_words[0]
+            print(MSG1.format(command_word=command_word), file=game.output)
+            return False
+        timeline = game.timeline
+        try:
+            turn = int(list_of_words[1])
+        except ValueError:
+            turn = None
+        if turn == timeline.turn:
+            print(f"\nVous êtes déjà au tour {turn}.\n", file=game.output)
+            return True
+        error = (f"\nTour inconnu : '{list_of_words[1]}' (tours disponibles : "
+                 f"{timeline.first_turn} à {timeline.last_turn}).\n")
+        return Actions._restore(game, timeline.goto(turn) if turn is not None else None, error)
+
+    def _restore(game, state, error):
+        # Remet en place une version de la partie (ou affiche `error` si aucune)
+        if state is None:
+            print(error, file=game.output)
+            return False
+        game.apply_state(state)
+        print(f"\nRetour au tour {game.timeline.turn}.", file=game.output)
+        print(game.player.current_room.get_long_description(), file=game.output)
         return True
+
+    def macro(game, list_of_words, number_of_parameters):
+        """
+        Define a macro ("macro tour = go S; go E; up"), delete it ("macro tour =")
+        or list the macros ("macro").
+
+        Args:
+            game (Game): The game object.
+            list_of_words (list): The list of words in the command.
+            number_of_parameters (int): The number of parameters expected by the command.
+
+        Returns:
+            bool: True if the command was executed successfully, False otherwise.
+        """
+        if len(list_of_words) == 1:
+            if not game.macros:
+                print("\nAucune macro définie.\n", file=game.output)
+            else:
+                lines = "".join(f"\n\t- {name} = {macro.text}" for name, macro in game.macros.items())
+                print(f"\nMacros :{lines}\n", file=game.output)
+            return True
+        name, separator, body = " ".join(list_of_words[1:]).partition("=")
+        name = name.strip().lower()
+        if not separator or len(name.split()) != 1:
+            print("\nSyntaxe : macro <nom> = <commande>; <commande>...\n", file=game.output)
+            return False
+        if game.parser.command(name) is not None:
+            print(f"\nNom de macro impossible : '{name}' désigne déjà une commande.\n", file=game.output)
+            return False
+        if not body.strip():
+            if game.macros.pop(name, None) is None:
+                print(f"\nMacro inconnue : '{name}'.\n", file=game.output)
+                return False
+            print(f"\nMacro '{name}' supprimée.\n", file=game.output)
+            return True
+        try:
+            plan = compile_plan(game.parser, body, game.macros)
+        except ValueError as error:
+            print(f"\n{error} Macro non définie.\n", file=game.output)
+            return False
+        game.macros[name] = plan
+        print(f"\nMacro '{name}' définie : {plan.text}\n", file=game.output)
+        return True
+
+    def look(game, list_of_words, number_of_parameters):
+        """
+        Print the description of the current room and the other players in it.
+
+        Args:
+            game (Game): The game object.
+            list_of_words (list): The list of words in the command.
+            number_of_parameters (int): The number of parameters expected by the command.
+
+        Returns:
+            bool: True if the command was executed successfully, False otherwise.
+        """
+        l = len(list_of_words)
+        if l != number_of_parameters + 1:
+            command_word = list_of_words[0]
+            print(MSG0.format(command_word=command_word), file=game.output)
+            return False
+        print(game.player.current_room.get_long_description(), file=game.output)
+        others, count = Actions._others(game)
+        if others:
+            print(f"Ici : {Actions._names(others, count)}.\n", file=game.output)
+        return True
+
+    def who(game, list_of_words, number_of_parameters):
+        """
+        Print the other players in the current room.
+
+        Args:
+            game (Game): The game object.
+            list_of_words (list): The list of words in the command.
+            number_of_parameters (int): The number of parameters expected by the command.
+
+        Returns:
+            bool: True if the command was executed successfully, False otherwise.
+        """
+        l = len(list_of_words)
+        if l != number_of_parameters + 1:
+            command_word = list_of_words[0]
+            print(MSG0.format(command_word=command_word), file=game.output)
+            return False
+        others, count = Actions._others(game)
+        if not others:
+            print("\nVous êtes seul ici.\n", file=game.output)
+        else:
+            print(f"\nJoueurs présents ({count}) : {Actions._names(others, count)}.\n", file=game.output)
+        return True
+
+    def _others(game, limit=NAMES_SHOWN):
+        # Noms des autres joueurs du lieu courant (au plus `limit`) et leur
+        # nombre total (index d'occupation du monde)
+        player = game.player
+        if player.occupancy is None:
+            return [], 0
+        room = player.current_room
+        names = [other.name for other in player.occupancy.occupants(room, limit + 1) if other is not player][:limit]
+        return names, max(player.occupancy.count(room) - 1, len(names))
+
+    def _names(names, count):
+        # « a, b, c » ou « a, b et 3 autres » dans un lieu très fréquenté
+        if count > len(names):
+            return f"{', '.join(names)} et {count - len(names)} autres"
+        return ", ".join(names)
+
+    def up(game, list_of_words, number_of_parameters):
+        """Move the player up one level (same as 'go U')."""
+        return Actions._climb(game, "U")
+
+    def down(game, list_of_words, number_of_parameters):
+        """Move the player down one level (same as 'go D')."""
+        return Actions._climb(game, "D")
+
+    def _climb(game, direction):
+        # Appelle directement Player.move, sans vérification des paramètres
+        moved = game.player.move(direction)
+        if not moved and game.metrics is not None:
+            game.metrics.incr("failed_moves")
+        return moved
+
+    def travel(game, list_of_words, number_of_parameters):
+        """
+        Move the player to the room given by its key, following the shortest route.
+
+        Args:
+            game (Game): The game object.
+            list_of_words (list): The list of words in the command.
+            number_of_parameters (int): The number of parameters expected by the command.
+
+        Returns:
+            bool: True if the player reached the room, False otherwise.
+        """
+        route = Actions._route(game, list_of_words, number_of_parameters)
+        if route is None:
+            return False
+        if not route:
+            print("\nVous y êtes déjà.\n", file=game.output)
+            return True
+
+        # Suivre l'itinéraire (chaque lieu quitté entre dans l'historique) ;
+        # les autres joueurs ne voient que le départ et l'arrivée
+        world = game.world
+        room = game.player.current_room
+        rooms = []
+        for direction in route:
+            game.history.record_move(room)
+            room = world.room(world.exit_index(room.id, direction))
+            rooms.append(room)
+        game.player.walk(rooms)
+        print(f"\nItinéraire : {', '.join(route)}", file=game.output)
+        print(game.player.current_room.get_long_description(), file=game.output)
+        return True
+
+    def path(game, list_of_words, number_of_parameters):
+        """
+        Print the shortest route to the room given by its key, without moving.
+
+        Args:
+            game (Game): The game object.
+            list_of_words (list): The list of words in the command.
+            number_of_parameters (int): The number of parameters expected by the command.
+
+        Returns:
+            bool: True if a route exists, False otherwise.
+        """
+        route = Actions._route(game, list_of_words, number_of_parameters)
+        if route is None:
+            return False
+        if not route:
+            print("\nVous y êtes déjà.\n", file=game.output)
+        else:
+            print(f"\nItinéraire ({len(route)} pas) : {', '.join(route)}\n", file=game.output)
+        return True
+
+    def _route(game, list_of_words, number_of_parameters):
+        # Vérifications communes à travel et path ; retourne None en cas d'erreur.
+        l = len(list_of_words)
+        if l != number_of_parameters + 1:
+            command_word = list_of_words[0]
+            print(MSG1.format(command_word=command_word), file=game.output)
+            return None
+        target = game.world.find(list_of_words[1].lower())
+        if target is None:
+            suggestions = room_suggestions(game.world).suggest(list_of_words[1])
+            print(f"\nLieu inconnu : '{list_of_words[1]}'.{did_you_mean(suggestions)}\n", file=game.output)
+            return None
+        route = game.router.route(game.player.current_room.id, target)
+        if route is None:
+            print(f"\nAucun chemin vers {game.world.name(target)}.\n", file=game.output)
+        return route
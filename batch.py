@@ -0,0 +1,151 @@
+# Description: Headless batch runner.
+
+# batch.py
+# Exécution non interactive de scripts de commandes (un fichier texte, une
+# commande par ligne ; les lignes vides et celles commençant par '#' sont
+# ignorées). Chaque script est joué dans une partie neuve via
+# Game.process_command ; on récupère la sortie et l'état final.
+# Les scripts sont répartis sur un pool de processus : le monde compilé est
+# ouvert une fois par processus (mmap : les pages sont partagées par le
+# système entre tous les processus).
+#
+# Exemple :
+#     python batch.py scripts/ --jobs 8 --output resultats.jsonl
+
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from game import Game, WORLD_SOURCE
+from occupancy import OccupancyIndex
+from world import World, load_world
+
+# Monde du processus courant (ouvert par _init_worker)
+_world = None
+
+
+def read_script(path):
+    with open(path, encoding="utf-8") as f:
+        return [line.rstrip("\n") for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+def run_script(lines, world, name="Joueur", capture=True):
+    """
+    Joue les commandes `lines` dans une nouvelle partie sur `world`.
+
+    Retourne un dictionnaire avec la sortie (si capture), l'état final
+    (voir Game.export_state) et le nombre de commandes exécutées.
+
+    Examples:
+
+    >>> world = load_world(WORLD_SOURCE)
+    >>> result = run_script(["go E", "go D", "quit"], world, "Link")
+    >>> result["commands"], result["state"]["finished"], world.key(result["state"]["room"])
+    (3, True, 'korok')
+    >>> from occupancy import occupancy_for
+    >>> len(occupancy_for(world))
+    0
+    """
+    output = io.StringIO() if capture else open(os.devnull, "w")
+    # Index d'occupation propre au script : les scripts joués par le même
+    # processus ne se voient pas (ni leurs arrivées et départs)
+    game = Game(world, output, occupancy=OccupancyIndex())
+    try:
+        game.setup(name)
+        game.print_welcome()
+        executed = 0
+        for line in lines:
+            if game.finished:
+                break
+            game.process_command(line)
+            executed += 1
+        result = {"commands": executed, "state": game.export_state()}
+        if capture:
+            result["output"] = output.getvalue()
+        return result
+    finally:
+        game.close()
+        if not capture:
+            output.close()
+
+
+def _init_worker(world_path):
+    global _world
+    _world = World(world_path)
+
+
+def _run_file(args):
+    path, capture = args
+    start = time.perf_counter()
+    try:
+        result = run_script(read_script(path), _world, capture=capture)
+    except Exception as error:  # un script en échec ne doit pas arrêter le lot
+        result = {"error": f"{type(error).__name__}: {error}"}
+    result["script"] = path
+    result["elapsed_s"] = time.perf_counter() - start
+    return result
+
+
+def script_paths(paths):
+    """Développe les dossiers en la liste triée de leurs fichiers."""
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                full = os.path.join(path, name)
+                if os.path.isfile(full):
+                    yield full
+        else:
+            yield path
+
+
+def run_batch(paths, world_path, jobs=None, capture=True, chunksize=16):
+    """
+    Joue tous les scripts de `paths` en parallèle ; produit les résultats
+    au fil de l'eau (pas forcément dans l'ordre des scripts).
+    """
+    tasks = ((path, capture) for path in script_paths(paths))
+    if jobs == 1:
+        _init_worker(world_path)
+        yield from map(_run_file, tasks)
+        return
+    with multiprocessing.Pool(jobs, initializer=_init_worker, initargs=(world_path,)) as pool:
+        yield from pool.imap_unordered(_run_file, tasks, chunksize)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Joue des scripts de commandes TBA sans interaction.")
+    parser.add_argument("scripts", nargs="+", help="fichiers de commandes ou dossiers de scripts")
+    parser.add_argument("--world", help="monde compilé (.world) ; par défaut la carte du jeu")
+    parser.add_argument("--jobs", type=int, default=None, help="nombre de processus (défaut : nombre de cœurs)")
+    parser.add_argument("--no-output", action="store_true", help="ne pas capturer la sortie des scripts")
+    parser.add_argument("--output", help="fichier JSON Lines des résultats (sinon sortie standard)")
+    args = parser.parse_args()
+
+    world_path = args.world
+    if world_path is None:
+        # Compile la carte si nécessaire, puis la rouvre dans chaque processus
+        world = load_world(WORLD_SOURCE)
+        world_path = world.path
+        world.close()
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    count = errors = 0
+    start = time.perf_counter()
+    try:
+        for result in run_batch(args.scripts, world_path, args.jobs, not args.no_output):
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            count += 1
+            errors += "error" in result
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"{count} scripts joués ({errors} en erreur) en {time.perf_counter() - start:.2f} s.", file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
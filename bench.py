@@ -0,0 +1,172 @@
+# Description: Scaling benchmark.
+
+# bench.py
+# Mesure le comportement du jeu sur des cartes générées (generator.py) de
+# tailles croissantes : temps de setup, latence de Game.process_command
+# (percentiles), débit, coût de Player.move et de Game.get_history, mémoire
+# maximale. Chaque taille est mesurée dans un processus séparé pour que la
+# mémoire maximale (ru_maxrss) ne dépende que de cette taille.
+#
+# Exemple :
+#     python bench.py --sizes 1000 100000 1000000 --output bench.json
+
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from generator import generate
+from world_compiler import DIRECTIONS, write_world
+
+DEFAULT_SIZES = [1000, 100000, 1000000]
+# Version du format des résultats (à incrémenter si les clés changent)
+RESULT_VERSION = 1
+
+
+def percentiles(samples_ns):
+    samples = sorted(samples_ns)
+    if not samples:
+        return {}
+    def at(p):
+        return samples[min(len(samples) - 1, int(p / 100 * len(samples)))] / 1000
+    return {"p50_us": at(50), "p90_us": at(90), "p99_us": at(99), "max_us": samples[-1] / 1000}
+
+
+def run_one(path, commands, seed, compact, max_rooms=None):
+    """Mesure le monde compilé `path` ; retourne un dictionnaire de résultats."""
+    from game import Game
+    from world import World
+
+    result = {"compact": compact, "commands": commands, "max_rooms": max_rooms}
+    devnull = open(os.devnull, "w")
+    start = time.perf_counter()
+    if compact:
+        from compact import CompactWorld
+        mapped = World(path)
+        world = CompactWorld.from_world(mapped)
+        mapped.close()
+    else:
+        world = World(path, max_rooms)
+    game = Game(world, devnull)
+    game.setup("bench")
+    result["setup_s"] = time.perf_counter() - start
+
+    # Latence de process_command sur une marche aléatoire
+    rng = random.Random(seed)
+    lines = [f"go {rng.choice(DIRECTIONS)}" if rng.random() < 0.9 else "back" for _ in range(commands)]
+    samples = []
+    clock = time.perf_counter_ns
+    start = clock()
+    for line in lines:
+        t0 = clock()
+        game.process_command(line)
+        samples.append(clock() - t0)
+    total = clock() - start
+    result["process_command"] = percentiles(samples)
+    result["throughput_cmd_s"] = commands / (total / 1e9) if total else 0.0
+
+    # Player.move seul (sans l'affichage de l'historique de Actions.go)
+    player = game.player
+    samples = []
+    for _ in range(commands):
+        t0 = clock()
+        player.move(rng.choice(DIRECTIONS))
+        samples.append(clock() - t0)
+    result["player_move"] = percentiles(samples)
+
+    samples = []
+    for _ in range(100):
+        t0 = clock()
+        game.get_history()
+        samples.append(clock() - t0)
+    result["get_history"] = percentiles(samples)
+    result["visited_rooms"] = len(game.history.visited)
+    result["loaded_rooms"] = world.loaded_rooms()
+    if not compact:
+        result["evicted_regions"] = world.evictions
+    devnull.close()
+
+    result["peak_rss_kb"] = peak_rss_kb()
+    return result
+
+
+def peak_rss_kb():
+    """Mémoire résidente maximale du processus, en kilo-octets."""
+    # Sous Linux, ru_maxrss hérite du maximum du processus parent (fork) :
+    # VmHWM ne concerne que l'espace mémoire du processus courant.
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    # ru_maxrss est en kilo-octets sous Linux, en octets sous macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de montée en charge du jeu TBA.")
+    parser.add_argument("--sizes", type=int, nargs="*", default=DEFAULT_SIZES)
+    parser.add_argument("--kind", choices=["grid", "tree", "random"], default="grid")
+    parser.add_argument("--commands", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--compact", action="store_true", help="charger le monde en CompactWorld")
+    parser.add_argument("--max-rooms", type=int, help="budget de lieux chargés (éviction des régions au-delà)")
+    parser.add_argument("--output", help="fichier JSON de résultats (sinon sortie standard)")
+    parser.add_argument("--world", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.world is not None:
+        print(json.dumps(run_one(args.world, args.commands, args.seed, args.compact, args.max_rooms)))
+        return 0
+
+    results = []
+    for size in args.sizes:
+        # La carte est générée ici : sa compilation ne compte pas dans la mémoire mesurée.
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bench.world")
+            start = time.perf_counter()
+            rooms = write_world(path, generate(args.kind, size, args.seed))
+            compile_s = time.perf_counter() - start
+            command = [sys.executable, os.path.abspath(__file__), "--world", path,
+                       "--commands", str(args.commands), "--seed", str(args.seed)]
+            if args.compact:
+                command.append("--compact")
+            if args.max_rooms is not None:
+                command += ["--max-rooms", str(args.max_rooms)]
+            completed = subprocess.run(command, capture_output=True, text=True, check=True)
+        result = {"kind": args.kind, "size": size, "rooms": rooms, "seed": args.seed, "compile_s": compile_s}
+        result.update(json.loads(completed.stdout))
+        results.append(result)
+        print(f"{size:>9} lieux : setup {result['setup_s'] * 1000:.1f} ms, "
+              f"p50 {result['process_command']['p50_us']:.1f} µs, "
+              f"p99 {result['process_command']['p99_us']:.1f} µs, "
+              f"{result['throughput_cmd_s']:.0f} cmd/s, {result['peak_rss_kb'] / 1024:.1f} Mo",
+              file=sys.stderr)
+
+    report = {
+        "version": RESULT_VERSION,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,7 @@
 # This file contains the Command class.
 
+import importlib
+
 class Command:
     """
     This class represents a command. A command is composed of a command word, a help string, an action and a number of parameters.
@@ -8,6 +10,8 @@ class Command:
         command_word (str): The command word.
         help_string (str): The help string.
         action (function): The action to execute when the command is called.
+            It may be given as an import path ("module:attribute"), which is
+            only imported the first time the action is used.
         number_of_parameters (int): The number of parameters expected by the command.
 
     Methods:
@@ -35,6 +39,18 @@ class Command:
         self.help_string = help_string
         self.action = action
         self.number_of_parameters = number_of_parameters
+
+    # The action, imported on first use when it was given as an import path.
+    @property
+    def action(self):
+        action = self._action
+        if isinstance(action, str):
+            action = self._action = resolve(action)
+        return action
+
+    @action.setter
+    def action(self, action):
+        self._action = action
     
     # The string representation of the command.
     def __str__(self):
@@ -43,3 +59,15 @@ class Command:
     
 
 
+def resolve(path):
+    """
+    Import the object designated by `path` ("module:attribute.attribute").
+
+    >>> resolve("os.path:join") is __import__("os").path.join
+    True
+    """
+    module_name, _, attributes = path.partition(":")
+    target = importlib.import_module(module_name)
+    for attribute in filter(None, attributes.split(".")):
+        target = getattr(target, attribute)
+    return target
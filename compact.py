@@ -0,0 +1,288 @@
+# Description: Compact world representation.
+
+# compact.py
+# Représentation compacte et entièrement en mémoire d'un monde :
+# - les lieux sont des entiers (0 .. n - 1) ;
+# - les sorties sont dans un array('i') de largeur fixe, 6 cases par lieu
+#   (une par direction, dans l'ordre de DIRECTIONS, -1 si aucune sortie) ;
+# - clés, noms et descriptions sont des index dans une table de chaînes
+#   partagée (un seul bloc UTF-8 + un tableau d'offsets ; une description
+#   répétée n'est stockée qu'une fois).
+# RoomView est une vue légère (__slots__) qui offre la même API que Room.
+
+from __future__ import annotations
+
+from array import array
+from typing import Dict, Iterable, List, Mapping, Optional
+
+from world_compiler import DIRECTIONS, DIRECTION_INDEX
+
+_WIDTH = len(DIRECTIONS)
+
+
+class RoomView:
+    """
+    Vue d'un lieu d'un CompactWorld (aucun état propre en dehors de l'index).
+
+    Deux vues du même lieu sont égales : elles peuvent servir de clés
+    (historique, ensembles de lieux visités...).
+    """
+
+    __slots__ = ("_world", "id")
+
+    def __init__(self, world: "CompactWorld", room_id: int) -> None:
+        self._world = world
+        self.id = room_id
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, RoomView) and other.id == self.id and other._world is self._world
+
+    def __hash__(self) -> int:
+        return self.id
+
+    def __repr__(self) -> str:
+        return f"RoomView({self.id}, {self.name!r})"
+
+    @property
+    def name(self) -> str:
+        return self._world.name(self.id)
+
+    @property
+    def description(self) -> str:
+        return self._world.description(self.id)
+
+    @property
+    def exits(self) -> Dict[str, "RoomView"]:
+        """Copie des sorties sous forme de dictionnaire (compatibilité avec Room)."""
+        world = self._world
+        base = self.id * _WIDTH
+        return {d: RoomView(world, world._exits[base + i]) for i, d in enumerate(DIRECTIONS)
+                if world._exits[base + i] >= 0}
+
+    def get_exit(self, direction: str) -> Optional["RoomView"]:
+        if not direction:
+            return None
+        d = DIRECTION_INDEX.get(direction.upper())
+        if d is None:
+            return None
+        target = self._world._exits[self.id * _WIDTH + d]
+        return RoomView(self._world, target) if target >= 0 else None
+
+    def exit_directions(self) -> list:
+        exits = self._world._exits
+        base = self.id * _WIDTH
+        return [d for i, d in enumerate(DIRECTIONS) if exits[base + i] >= 0]
+
+    def get_exit_string(self) -> str:
+        return self._render()[0]
+
+    def get_long_description(self) -> str:
+        return self._render()[1]
+
+    def _render(self):
+        # (ligne des sorties, description complète), mis en cache par le monde
+        rendered = self._world._rendered.get(self.id)
+        if rendered is None:
+            valid_exits = self.exit_directions()
+            exit_string = "Sorties : " + ", ".join(valid_exits) if valid_exits else "Sorties : aucune"
+            header = f"\nVous êtes dans {self.name}, {self.description.strip()}\n\n"
+            rendered = self._world._rendered[self.id] = (exit_string, header + exit_string + "\n")
+        return rendered
+
+
+class CompactWorld:
+    """
+    Monde compact, avec la même interface que world.World
+    (len, start, valid_directions, key, name, description, region, find,
+    exit_index, set_exit, room).
+
+    Exemples
+    --------
+    >>> world = CompactWorld.from_source({"start": "a", "rooms": {
+    ...     "a": {"name": "A", "description": "a.", "exits": {"E": "b"}},
+    ...     "b": {"name": "B", "description": "a.", "exits": {"O": "a"}}}})
+    >>> room = world.room(world.start)
+    >>> room.get_exit("e").name, room.get_exit_string()
+    ('B', 'Sorties : E')
+    >>> world.find("b"), world.string_count()
+    (1, 6)
+    """
+
+    def __init__(self) -> None:
+        self.start = 0
+        # Table des chaînes : la chaîne i est _blob[_offsets[i]:_offsets[i + 1]]
+        self._blob = bytearray()
+        self._offsets = array("I", [0])
+        self._string_ids: Optional[Dict[str, int]] = {}
+        self._keys = array("I")
+        self._names = array("I")
+        self._descriptions = array("I")
+        self._regions = array("I")
+        self._exits = array("i")
+        self._sorted = array("I")
+        self.direction_counts = dict.fromkeys(DIRECTIONS, 0)
+        self.valid_directions = set()
+        self.exit_listeners = []
+        # Rendu des lieux déjà affichés (voir RoomView._render)
+        self._rendered: Dict[int, tuple] = {}
+
+    # Construction
+    def _intern(self, text: str) -> int:
+        index = self._string_ids.get(text)
+        if index is None:
+            index = self._string_ids[text] = len(self._offsets) - 1
+            self._blob += text.encode("utf-8")
+            self._offsets.append(len(self._blob))
+        return index
+
+    def string(self, index: int) -> str:
+        """Retourne la chaîne `index` de la table partagée."""
+        return self._blob[self._offsets[index]:self._offsets[index + 1]].decode("utf-8")
+
+    def string_count(self) -> int:
+        return len(self._offsets) - 1
+
+    def add_room(self, key: str, name: str, description: str, exits: Mapping[str, int], region: str = "") -> int:
+        """Ajoute un lieu (sorties en index de lieu) et retourne son index."""
+        room_id = len(self._keys)
+        self._keys.append(self._intern(key))
+        self._names.append(self._intern(name))
+        self._descriptions.append(self._intern(description))
+        self._regions.append(self._intern(region))
+        row = [-1] * _WIDTH
+        for direction, target in exits.items():
+            if target is not None and target >= 0:
+                row[DIRECTION_INDEX[direction.upper()]] = target
+        self._exits.extend(row)
+        return room_id
+
+    def _finish(self) -> "CompactWorld":
+        # Fin de construction : index des clés trié, compteurs par direction.
+        self._string_ids = None
+        self._blob = bytes(self._blob)
+        keys, string = self._keys, self.string
+        self._sorted = array("I", sorted(range(len(keys)), key=lambda i: string(keys[i])))
+        for i, d in enumerate(DIRECTIONS):
+            self.direction_counts[d] = sum(1 for t in self._exits[i::_WIDTH] if t >= 0)
+        self.valid_directions = {d for d, n in self.direction_counts.items() if n}
+        # Sorties entrantes initiales (CSR, même codage que le fichier compilé)
+        count = len(keys)
+        offsets = array("I", bytes(4 * (count + 1)))
+        for target in self._exits:
+            if target >= 0:
+                offsets[target + 1] += 1
+        for i in range(count):
+            offsets[i + 1] += offsets[i]
+        incoming = array("I", bytes(4 * offsets[count]))
+        fill = array("I", offsets)
+        for slot, target in enumerate(self._exits):
+            if target >= 0:
+                incoming[fill[target]] = slot // _WIDTH * 8 + slot % _WIDTH
+                fill[target] += 1
+        self._incoming_offsets = offsets
+        self._incoming = incoming
+        return self
+
+    @classmethod
+    def from_records(cls, records: Iterable, start: int = 0) -> "CompactWorld":
+        """Construit un monde depuis des lieux (clé, nom, description, {direction: index}, région)."""
+        world = cls()
+        for record in records:
+            world.add_room(*record)
+        world.start = start
+        return world._finish()
+
+    @classmethod
+    def from_source(cls, source: Mapping) -> "CompactWorld":
+        """Construit un monde depuis une carte déclarative (voir world_compiler)."""
+        rooms = source["rooms"]
+        index = {key: i for i, key in enumerate(rooms)}
+        records = ((key, room["name"], room.get("description", ""),
+                    {d: index[t] for d, t in room.get("exits", {}).items() if t is not None},
+                    room.get("region", ""))
+                   for key, room in rooms.items())
+        return cls.from_records(records, index.get(source.get("start"), 0))
+
+    @classmethod
+    def from_world(cls, world) -> "CompactWorld":
+        """Charge entièrement en mémoire un monde compilé (world.World)."""
+        records = ((world.key(i), world.name(i), world.description(i),
+                    {d: world.exit_index(i, d) for d in DIRECTIONS}, world.region(i))
+                   for i in range(len(world)))
+        return cls.from_records(records, world.start)
+
+    # Interface World
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def key(self, index: int) -> str:
+        return self.string(self._keys[index])
+
+    def name(self, index: int) -> str:
+        return self.string(self._names[index])
+
+    def description(self, index: int) -> str:
+        return self.string(self._descriptions[index])
+
+    def region(self, index: int) -> str:
+        return self.string(self._regions[index])
+
+    def _lower_bound(self, key: str) -> int:
+        lo, hi = 0, len(self._sorted)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.string(self._keys[self._sorted[mid]]) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def find(self, key: str) -> Optional[int]:
+        position = self._lower_bound(key)
+        if position < len(self._sorted):
+            index = self._sorted[position]
+            if self.string(self._keys[index]) == key:
+                return index
+        return None
+
+    def keys_from(self, start: str, limit: int) -> List[str]:
+        position = self._lower_bound(start)
+        return [self.string(self._keys[index]) for index in self._sorted[position:position + limit]]
+
+    def exit_index(self, index: int, direction: str) -> int:
+        d = DIRECTION_INDEX.get(direction)
+        if d is None:
+            return -1
+        return self._exits[index * _WIDTH + d]
+
+    def set_exit(self, index: int, direction: str, target: int) -> None:
+        d = DIRECTION_INDEX.get(direction)
+        if d is None:
+            raise ValueError(f"Direction inconnue : '{direction}'")
+        old = self._exits[index * _WIDTH + d]
+        if old == target:
+            return
+        self._exits[index * _WIDTH + d] = target
+        self._rendered.pop(index, None)
+        for listener in self.exit_listeners:
+            listener(index, direction, old, target)
+
+    def exit_table(self) -> array:
+        """Copie de la table des sorties (6 cases par lieu, voir World.exit_table)."""
+        return array("i", self._exits)
+
+    def base_incoming(self, index: int):
+        """Sorties menant à `index` à la construction du monde : [(source, direction)]."""
+        first, last = self._incoming_offsets[index], self._incoming_offsets[index + 1]
+        return [(code >> 3, DIRECTIONS[code & 7]) for code in self._incoming[first:last]]
+
+    def room(self, index: int) -> RoomView:
+        if not 0 <= index < len(self._keys):
+            raise IndexError(f"Lieu inexistant : {index}")
+        return RoomView(self, index)
+
+    def loaded_rooms(self) -> int:
+        return len(self._keys)
+
+    def touch(self, index: int) -> None:
+        """Sans effet : tous les lieux sont en mémoire (compatibilité avec World)."""
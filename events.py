@@ -0,0 +1,127 @@
+# Description: World events.
+
+# events.py
+# Événements du monde programmés sur un scheduler.Scheduler : la météo de
+# certains lieux et des personnages qui se déplacent seuls. Les messages sont
+# diffusés aux joueurs présents via l'index d'occupation (occupancy.py) ; les
+# personnages y sont inscrits comme les joueurs (visibles avec look / who).
+#
+# Tous les tirages viennent d'un générateur initialisé par une graine : en
+# temps simulé, une partie se rejoue à l'identique.
+
+import random
+from typing import Iterable, List, Sequence, Tuple
+
+from world_compiler import DIRECTIONS
+
+# Météo : clé du lieu -> (période en secondes, messages possibles)
+WEATHER = {
+    "firone": (45.0, (
+        "Une pluie tropicale s'abat sur la forêt.",
+        "Le tonnerre gronde au-dessus de Firone.",
+        "La pluie cesse ; la jungle fume sous le soleil.",
+    )),
+    "gerudo_desert": (60.0, (
+        "Une tempête de sable se lève à l'horizon.",
+        "Le vent soulève des nuées de sable brûlant.",
+        "La tempête de sable se calme enfin.",
+    )),
+    "hebra": (90.0, (
+        "Une tempête de neige recouvre les sommets.",
+        "Le blizzard se calme ; les pics d'Hébra scintillent.",
+    )),
+}
+
+# Personnages : (nom, clé du lieu de départ)
+NPCS = (
+    ("Beedle le marchand", "centre_hyrule"),
+    ("Kass le barde", "laneyru"),
+    ("un Korogu égaré", "korok"),
+)
+# Période de déplacement des personnages (secondes)
+WANDER_PERIOD = 20.0
+
+
+class Wanderer:
+    """Personnage qui passe d'un lieu à un lieu voisin à chaque tick()."""
+
+    __slots__ = ("name", "room", "world", "occupancy", "rng", "timer")
+
+    def __init__(self, name: str, world, occupancy, room: int, rng: random.Random) -> None:
+        self.name = name
+        self.world = world
+        self.occupancy = occupancy
+        self.room = room
+        self.rng = rng
+        self.timer = None
+        occupancy.move(self, None, room)
+
+    def notify(self, text: str) -> None:
+        # Les messages du monde ne concernent que les joueurs
+        pass
+
+    def tick(self) -> None:
+        exit_index = self.world.exit_index
+        targets = [t for t in (exit_index(self.room, d) for d in DIRECTIONS) if t >= 0]
+        if not targets:
+            return
+        target = self.rng.choice(targets)
+        left, joined = self.occupancy.move(self, self.room, target)
+        self.room = target
+        for other in left:
+            other.notify(f"\n{self.name} s'en va.\n")
+        for other in joined:
+            other.notify(f"\n{self.name} arrive.\n")
+
+    def remove(self) -> None:
+        """Retire le personnage du monde."""
+        if self.timer is not None:
+            self.timer.cancel()
+        self.occupancy.move(self, self.room, None)
+
+
+def _weather(occupancy, room: int, messages: Sequence[str], rng: random.Random) -> None:
+    occupancy.broadcast(room, f"\n{rng.choice(messages)}\n")
+
+
+def spawn(scheduler, world, occupancy, npcs: Iterable[Tuple[str, int]], period: float = WANDER_PERIOD,
+          seed: int = 0) -> List[Wanderer]:
+    """
+    Place des personnages (nom, index du lieu) et programme leurs
+    déplacements ; les premiers départs sont étalés sur une période.
+
+    Examples:
+
+    >>> from compact import CompactWorld
+    >>> from occupancy import OccupancyIndex
+    >>> from scheduler import Scheduler
+    >>> world = CompactWorld.from_source({"rooms": {
+    ...     "a": {"name": "A", "exits": {"E": "b"}},
+    ...     "b": {"name": "B", "exits": {"O": "a"}}}})
+    >>> scheduler, occupancy = Scheduler(tick=1.0), OccupancyIndex()
+    >>> spawn(scheduler, world, occupancy, [("Kass", 0)], period=10)[0].room
+    0
+    >>> _ = scheduler.advance(10); [npc.name for npc in occupancy.occupants(1)]
+    ['Kass']
+    """
+    rng = random.Random(seed)
+    wanderers = []
+    for name, room in npcs:
+        wanderer = Wanderer(name, world, occupancy, room, rng)
+        wanderer.timer = scheduler.call_every(period, wanderer.tick, first=rng.uniform(0, period))
+        wanderers.append(wanderer)
+    return wanderers
+
+
+def install(scheduler, world, occupancy, seed: int = 0) -> List[Wanderer]:
+    """
+    Programme la météo (WEATHER) et les personnages (NPCS) des lieux présents
+    dans `world` ; retourne les personnages placés.
+    """
+    rng = random.Random(seed)
+    for key, (period, messages) in WEATHER.items():
+        room = world.find(key)
+        if room is not None:
+            scheduler.call_every(period, _weather, occupancy, room, messages, rng, first=rng.uniform(0, period))
+    npcs = [(name, room) for name, room in ((name, world.find(key)) for name, key in NPCS) if room is not None]
+    return spawn(scheduler, world, occupancy, npcs, seed=seed)
@@ -0,0 +1,218 @@
+# Description: Map of the explored rooms.
+
+# explored_map.py
+# Carte ASCII des lieux explorés (commande 'map'). Chaque lieu reçoit des
+# coordonnées (x, y, niveau) : E / O déplacent d'une colonne, N / S d'une
+# ligne, U / D changent de niveau. Le niveau est fixé par la région du lieu
+# quand elle est connue (REGION_LEVELS : îles célestes au-dessus de la
+# surface, profondeurs en dessous). Les coordonnées sont calculées une seule
+# fois, à l'entrée dans le lieu (Player.on_enter, quel que soit le moyen :
+# go, back, up / down, travel, undo), à partir d'un voisin déjà placé ; les
+# lieux déjà placés ne bougent plus.
+#
+# L'affichage se limite à une fenêtre centrée sur le joueur, au niveau du
+# joueur : son coût ne dépend pas du nombre de lieux explorés.
+
+from typing import Callable, Dict, Optional, Tuple
+
+# Déplacement (x, y, niveau) de chaque direction
+DELTAS = {
+    "N": (0, -1, 0),
+    "E": (1, 0, 0),
+    "S": (0, 1, 0),
+    "O": (-1, 0, 0),
+    "U": (0, 0, 1),
+    "D": (0, 0, -1),
+}
+
+# Taille de la fenêtre affichée, en lieux
+VIEW_WIDTH = 15
+VIEW_HEIGHT = 9
+
+# Niveau des régions (préfixe du nom de région, "surface_3_4" -> "surface")
+REGION_LEVELS = {"ciel": 1, "surface": 0, "profondeurs": -1}
+
+LEGEND = "@ : vous ; ^ / v / * : passage vers le haut / le bas / les deux ; - et | : passages."
+
+Position = Tuple[int, int, int]
+
+
+def region_level(region: str) -> Optional[int]:
+    """
+    Niveau d'une région, None si elle n'en a pas.
+
+    >>> region_level("ciel"), region_level("profondeurs_2_0"), region_level("vallee")
+    (1, -1, None)
+    """
+    return REGION_LEVELS.get(region.split("_", 1)[0])
+
+
+class ExploredMap:
+    """
+    Coordonnées des lieux explorés par un joueur, et leur rendu.
+
+    Un lieu dont la case calculée est déjà prise (carte non euclidienne) va
+    dans la case libre la plus proche du même niveau ; un lieu sans voisin
+    placé (sorties à sens unique) commence un îlot à droite des autres.
+
+    Attributs
+    ---------
+    positions : dict
+        {lieu: (x, y, niveau)}, pour chaque lieu exploré.
+    cells : dict
+        {(x, y, niveau): lieu}.
+    level_of : callable
+        Niveau fixe d'un lieu (None si inconnu : niveau déduit des sorties U / D).
+
+    Exemples
+    --------
+    >>> from room import Room
+    >>> a, b, c, d = (Room(name, name + ".") for name in "ABCD")
+    >>> a.exits = {"E": b}; b.exits = {"O": a, "S": c, "U": d}; c.exits = {"N": b}; d.exits = {"D": b}
+    >>> explored = ExploredMap()
+    >>> for room, origin in [(a, None), (b, a), (c, b)]:
+    ...     explored.enter(room, origin)
+    >>> print(explored.render(c))
+    Carte des lieux explorés, niveau 0 :
+    [ ]-[^]
+         |
+        [@]
+    <BLANKLINE>
+    Niveaux : 0
+    @ : vous ; ^ / v / * : passage vers le haut / le bas / les deux ; - et | : passages.
+    >>> explored.enter(d, c)
+    >>> explored.render(d).splitlines()[:2]
+    ['Carte des lieux explorés, niveau 1 :', '[@]']
+    >>> explored.positions[d], len(explored.positions)
+    ((1, 0, 1), 4)
+    >>> explored = ExploredMap({a: -1, b: -1, d: 1}.get)
+    >>> explored.enter(a, None); explored.enter(b, a); explored.enter(d, b)
+    >>> explored.positions[a], explored.positions[d]
+    ((0, 0, -1), (1, 0, 1))
+    """
+
+    def __init__(self, level_of: Optional[Callable[[object], Optional[int]]] = None) -> None:
+        self.level_of = level_of
+        self.positions: Dict[object, Position] = {}
+        self.cells: Dict[Position, object] = {}
+        # Limites de chaque niveau : {niveau: [x min, x max, y min, y max]}
+        self._bounds: Dict[int, list] = {}
+        # Colonne la plus à droite (départ des îlots)
+        self._right = 0
+
+    def enter(self, room, origin=None) -> None:
+        """Le joueur entre dans `room` (venant de `origin`) : le lieu est placé s'il est nouveau."""
+        if room is not None and room not in self.positions:
+            self._place(room, origin)
+
+    def _place(self, room, origin) -> None:
+        positions = self.positions
+        position = None
+        if origin is not None and origin in positions:
+            x, y, z = positions[origin]
+            for direction, (dx, dy, dz) in DELTAS.items():
+                if origin.get_exit(direction) == room:
+                    position = (x + dx, y + dy, z + dz)
+                    break
+        if position is None:
+            for direction, (dx, dy, dz) in DELTAS.items():
+                target = room.get_exit(direction)
+                if target is not None and target in positions:
+                    x, y, z = positions[target]
+                    position = (x - dx, y - dy, z - dz)
+                    break
+        level = self.level_of(room) if self.level_of is not None else None
+        if position is None:
+            position = (self._right + 2, 0, 0) if positions else (0, 0, 0)
+        if level is not None:
+            position = position[:2] + (level,)
+        x, y, z = position = self._free(position)
+        positions[room] = position
+        self.cells[position] = room
+        self._right = max(self._right, x)
+        bounds = self._bounds.get(z)
+        if bounds is None:
+            self._bounds[z] = [x, x, y, y]
+        else:
+            bounds[0] = min(bounds[0], x)
+            bounds[1] = max(bounds[1], x)
+            bounds[2] = min(bounds[2], y)
+            bounds[3] = max(bounds[3], y)
+
+    def _free(self, position: Position) -> Position:
+        # Case libre la plus proche de `position`, au même niveau
+        cells = self.cells
+        if position not in cells:
+            return position
+        x, y, z = position
+        radius = 1
+        while True:
+            for dx in range(-radius, radius + 1):
+                for dy in range(-radius, radius + 1) if abs(dx) == radius else (-radius, radius):
+                    cell = (x + dx, y + dy, z)
+                    if cell not in cells:
+                        return cell
+            radius += 1
+
+    def render(self, current_room, width: int = VIEW_WIDTH, height: int = VIEW_HEIGHT) -> str:
+        """Carte du niveau du joueur, dans une fenêtre de `width` x `height` lieux centrée sur lui."""
+        self.enter(current_room)
+        x0, y0, z = self.positions[current_room]
+        cells = self.cells
+
+        # Lieux explorés de la fenêtre
+        shown: Dict[Tuple[int, int], object] = {}
+        for y in range(y0 - height // 2, y0 + height // 2 + 1):
+            for x in range(x0 - width // 2, x0 + width // 2 + 1):
+                room = cells.get((x, y, z))
+                if room is not None:
+                    shown[(x, y)] = room
+        # Directions des sorties, sans charger les lieux voisins
+        exits = {cell: set(room.exit_directions()) for cell, room in shown.items()}
+        left = min(x for x, _ in shown)
+        right = max(x for x, _ in shown)
+        top = min(y for _, y in shown)
+        bottom = max(y for _, y in shown)
+        columns = range(left, right + 1)
+
+        def east(x, y) -> str:
+            # Passage entre (x, y) et (x + 1, y) (vers un lieu inexploré compris)
+            if "E" in exits.get((x, y), ()) or "O" in exits.get((x + 1, y), ()):
+                return "-"
+            return " "
+
+        def south(x, y) -> str:
+            if "S" in exits.get((x, y), ()) or "N" in exits.get((x, y + 1), ()):
+                return " | "
+            return "   "
+
+        def cell(x, y) -> str:
+            room = shown.get((x, y))
+            if room is None:
+                return "   "
+            if room == current_room:
+                return "[@]"
+            up, down = "U" in exits[(x, y)], "D" in exits[(x, y)]
+            return "[*]" if up and down else "[^]" if up else "[v]" if down else "[ ]"
+
+        lines = ["".join(" " + south(x, top - 1) for x in columns)]
+        for y in range(top, bottom + 1):
+            lines.append("".join(east(x - 1, y) + cell(x, y) for x in columns) + east(right, y))
+            lines.append("".join(" " + south(x, y) for x in columns))
+        lines = [line.rstrip() for line in lines]
+        while not lines[0]:
+            del lines[0]
+        while not lines[-1]:
+            del lines[-1]
+        # Retire la marge de gauche si aucun passage ne la traverse
+        if all(not line or line[0] == " " for line in lines):
+            lines = [line[1:] for line in lines]
+
+        text = [f"Carte des lieux explorés, niveau {z} :", *lines, ""]
+        bounds = self._bounds[z]
+        if (bounds[0] < x0 - width // 2 or bounds[1] > x0 + width // 2
+                or bounds[2] < y0 - height // 2 or bounds[3] > y0 + height // 2):
+            text.append("(Vue centrée sur vous : ce niveau s'étend au-delà.)")
+        text.append("Niveaux : " + ", ".join(str(level) for level in sorted(self._bounds, reverse=True)))
+        text.append(LEGEND)
+        return "\n".join(text)
@@ -2,142 +2,114 @@
 
 # Import modules
 # game.py
-from room import Room
+import os
+import sys
+import time
+from typing import Optional
+
+from world import load_world
 from player import Player
-from command import Command
-from actions import Actions
+from registry import default_registry
+from navigation import NavigationHistory
+from explored_map import ExploredMap, region_level
+from timeline import GameState, Timeline
+from routing import router_for
+from world_index import index_for
+from occupancy import occupancy_for
+from scheduler import Scheduler
+import events
+from output import OutputBuffer
+from journal import Persistence
+from suggest import did_you_mean
+from plans import compile_plan, is_chain
+
+
+# Carte déclarative utilisée par défaut
+WORLD_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "hyrule.json")
 
 
 class Game:
     # Constructor
-    def __init__(self):
+    def __init__(self, world=None, output=None, registry=None, occupancy=None):
         self.finished = False
-        self.rooms = []
+        self.world = world
+        # Index d'occupation du joueur (None = celui du monde, partagé par
+        # toutes les parties qui y jouent, voir occupancy.py)
+        self.occupancy = occupancy
+        # Registre des commandes (None = registre par défaut, voir registry.py)
+        self.registry = registry
+        # Messages du jeu, tamponnés puis envoyés vers `output` (None = sortie
+        # standard) en une seule écriture à la fin de chaque commande
+        self.output = OutputBuffer(output)
         self.commands = {}
+        self.parser = None
+        self.router = None
+        self.index = None
         self.player = None
         self.valid_directions = set()
-        self.history = []
+        self.history = NavigationHistory()
+        # Carte des lieux explorés, complétée à chaque changement de lieu
+        self.explored_map = ExploredMap()
+        # Versions de la partie, une par commande qui change l'état (undo / redo)
+        self.timeline = Timeline()
+        # Macros définies par le joueur : {nom: plans.Plan}
+        self.macros = {}
+        # Journal et instantanés de la partie (voir journal.Persistence)
+        self.persistence = None
+        # Mesures optionnelles (voir metrics.Metrics) ; None = désactivées
+        self.metrics = None
+        # Événements du monde (voir scheduler.py) exécutés avant chaque
+        # commande ; None = aucun (ou gérés ailleurs, comme sur le serveur)
+        self.scheduler = None
 
     # Setup the game
-    def setup(self):
-        # Setup commands (les clés sont en minuscules)
-        cmd_help = Command("help", " : afficher cette aide", Actions.help, 0)
-        self.commands["help"] = cmd_help
-
-        cmd_quit = Command("quit", " : quitter le jeu", Actions.quit, 0)
-        self.commands["quit"] = cmd_quit
-
-        cmd_go = Command(
-            "go",
-            " <direction> : se déplacer dans une direction cardinale (N, E, S, O, U, D)",
-            Actions.go,
-            1,
-        )
-        self.commands["go"] = cmd_go
-        
-        history = Command("history", " : afficher l'historique des lieux visités", Actions.history, 0)
-        self.commands["history"] = history
-
-        back_cmd = Command("back", " : revenir au lieu précédent", Actions.back, 0)
-        self.commands["back"] = back_cmd
-
-        self.commands["retour"] = back_cmd
-
-
-
-        # callbacks locaux pour up/down (appellent directement Player.move avec U/D)
-        def cmd_up(game, list_of_words, number_of_parameters):
-            # ne prend pas de paramètre supplémentaire
-            return game.player.move("U")
-
-        def cmd_down(game, list_of_words, number_of_parameters):
-            return game.player.move("D")
-
-        cmd_up_obj = Command("up", " : monter d'un niveau (équivalent go U)", cmd_up, 0)
-        cmd_down_obj = Command("down", " : descendre d'un niveau (équivalent go D)", cmd_down, 0)
-        self.commands["up"] = cmd_up_obj
-        self.commands["down"] = cmd_down_obj
-
-
-        hebra = Room("la Région d'Hébra", "Une région glaciale avec des montagnes gelées et des plateaux de toundra où souffle un vent mordant. On y trouve le village piaf.")
-        korok = Room("la Forêt Korogu", "une forêt ancienne et mystérieuse, cœur du Grand Bois d'Hyrule, où de petites créatures mignonnes appelées Korogus veillent.")
-        ordinn = Room("la Région d'Ordinn", "on y trouve la Montagne de la Mort, un puissant volcan explosif qui menace le village Goron. Les Gorons se nourissent de roches provenant du volcan")
-
-
-        gerudo_high = Room("les Hauteurs Gerudo", "des falaises gelées surplombant le désert, offrant des vues spectaculaires.")
-        centre_hyrule = Room("le Centre d'Hyrule", "de vastes plaines parsemé de ruines et sanctuaires, avec le château d'Hyrule au loin.")
-        laneyru = Room("Région de Lanelle", "il ya le Domaine Zora et le village cocorico")
-
-        gerudo_desert = Room("le Désert Gerudos", "vous voyez des dunes de sables à perte de vue, les oasis sont rares et les tempêtes de sable fréquente.")
-        firone = Room("la Région de Firone", "composée de forêts humides et luxuriantes, le tonnerre frappe souvent et la végétation est très dense.")
-        necluda = Room("la Région de Necluda", "on y trouve principalement le village d'Elimith, connu pour ses terres agricoles et sa gastronomie variées.")
-
-
-        self.rooms.extend([
-         hebra, korok, ordinn,
-         gerudo_high, centre_hyrule, laneyru,
-         gerudo_desert, firone, necluda
-         ])
-
-
-        hebra.exits = {"N": None, "E": korok, "S": gerudo_high, "O": None}
-        korok.exits = {"N": None, "E": ordinn, "S": centre_hyrule, "O": hebra}
-        ordinn.exits = {"N": None, "E": None, "S": laneyru, "O": korok}
-
-
-        gerudo_high.exits = {"N": hebra, "E": centre_hyrule, "S": gerudo_desert, "O": None}
-        centre_hyrule.exits = {"N": korok, "E": laneyru, "S": firone, "O": gerudo_high}
-        laneyru.exits = {"N": ordinn, "E": None, "S": necluda, "O": centre_hyrule}
-
-
-        gerudo_desert.exits = {"N": gerudo_high, "E": firone, "S": None, "O": None}
-        firone.exits = {"N": centre_hyrule, "E": necluda, "S": None, "O": gerudo_desert}
-        necluda.exits = {"N": laneyru, "E": None, "S": None, "O": firone}
-
-
-        iles_ciel_a = Room("L'Île céleste du prélude", "une île flottante parsemée de ruines et enigmes à résoudre.")
-        iles_ciel_b = Room("L'Île céleste de Lanelle", "archipel céléste de plateformes anciennes, dominé par des vents puissants.")
-
-        self.rooms.extend([iles_ciel_a, iles_ciel_b])
-
-
-        centre_hyrule.exits["U"] = iles_ciel_a
-        korok.exits["U"] = iles_ciel_b
-
-
-        iles_ciel_a.exits = {"D": centre_hyrule, "E": iles_ciel_b, "O": None, "N": None, "S": None}
-        iles_ciel_b.exits = {"D": korok, "O": iles_ciel_a, "N": None, "E": None, "S": None}
-
-
-        profondeurs_a = Room("Les profondeurs A", "dans le sous sol du chateau d'Hyrule, vous entendez des bruits étranges venant des ténèbres.")
-        profondeurs_b = Room("Les profondeurs B", "dans la grande mine abandonée, il y a des golems antiques et fragements de sonium partout.")
-
-        self.rooms.extend([profondeurs_a, profondeurs_b])
-
-        
-        centre_hyrule.exits["D"] = profondeurs_a
-        korok.exits["D"] = profondeurs_b
-
-   
-        profondeurs_a.exits = {"U": centre_hyrule, "E": profondeurs_b, "O": None, "N": None, "S": None}
-        profondeurs_b.exits = {"U": korok, "O": profondeurs_a, "N": None, "E": None, "S": None}
-
-        # Setup player and starting room
-        name = input("\nEntrez votre nom: ").strip()
+    def setup(self, name=None):
+        # Commandes et analyseur : registre partagé par toutes les parties,
+        # les actions ne sont importées qu'à leur première utilisation
+        if self.registry is None:
+            self.registry = default_registry()
+        self.commands = self.registry.commands
+        self.parser = self.registry.parser
+
+        # Le monde est lu depuis la carte compilée (voir world_compiler.py) ;
+        # les lieux ne sont créés qu'au premier passage du joueur.
+        if self.world is None:
+            self.world = load_world(WORLD_SOURCE)
+        self.router = router_for(self.world)
+        # Index partagé, tenu à jour à chaque modification de sortie
+        self.index = index_for(self.world)
+
+        # Setup player and starting room (le nom n'est demandé que s'il n'est pas fourni)
+        if name is None:
+            name = input("\nEntrez votre nom: ")
+        name = name.strip()
         if not name:
             name = "Joueur"
-        self.player = Player(name)
+        # Le joueur rejoint l'index d'occupation du monde, partagé avec les
+        # autres parties jouées sur le même monde (serveur)
+        occupancy = self.occupancy if self.occupancy is not None else occupancy_for(self.world)
+        self.player = Player(name, self.output, occupancy)
+        self.explored_map = ExploredMap(self._room_level)
+        self.player.on_enter = self._entered
        
-        self.player.current_room = iles_ciel_a
-        
-        self.valid_directions = set()
-        for room in self.rooms:
-         for d, target in room.exits.items():
-           if target is not None:
-             self.valid_directions.add(d.upper())
+        self.player.current_room = self.world.room(self.world.start)
+
+        self.valid_directions = self.index.valid_directions
+        self.timeline.reset(self.current_state())
+
     # Play the game
-    def play(self):
+    def play(self, save_dir=None):
         self.setup()
+        # Reprise de la partie sauvegardée dans save_dir (journal + instantané)
+        if save_dir is not None:
+            persistence = Persistence(save_dir)
+            persistence.restore(self)
+            # 'quit' ne fait que quitter la session : la partie reprend
+            self.finished = False
+            self.persistence = persistence
+        # Météo et personnages, en temps réel
+        self.scheduler = Scheduler.realtime()
+        npcs = events.install(self.scheduler, self.world, self.player.occupancy)
         self.print_welcome()
         # Loop until the game is finished
         while not self.finished:
@@ -148,49 +120,147 @@ class Game:
                 print("\n\nInterruption détectée. Fin du jeu.\n")
                 break
             self.process_command(raw)
+        if self.persistence is not None:
+            self.persistence.snapshot(self)
+            self.persistence.close()
+        for npc in npcs:
+            npc.remove()
+        self.close()
         return None
 
+    # Fin de session : le joueur quitte le monde partagé
+    def close(self):
+        if self.player is not None:
+            self.player.leave()
+
     # Process the command entered by the player
     def process_command(self, command_string) -> None:
-        # Ignore empty or whitespace-only input
-        if command_string is None or command_string.strip() == "":
+        metrics = self.metrics
+        start = time.perf_counter_ns() if metrics is not None else 0
+        try:
+            if self.scheduler is not None:
+                self.scheduler.run_pending()
+            self._execute(command_string)
+            self.timeline.commit(self.current_state())
+            # La région du joueur reste la plus récente (éviction, voir world.py)
+            self.world.touch(self.player.current_room.id)
+        finally:
+            self.player.notices_delivered()
+            self.output.flush()
+            if self.persistence is not None:
+                self.persistence.record(self, command_string)
+            if metrics is not None:
+                metrics.observe_line(time.perf_counter_ns() - start)
+
+    def _execute(self, command_string) -> None:
+        # Parse the line (empty or whitespace-only input is ignored)
+        parsed = self.parser.parse(command_string)
+        if parsed is None:
             return
 
-        # Split the command string into a list of words (handles multiple spaces)
-        list_of_words = command_string.split()
-        # Normalize command word to lowercase
-        command_word = list_of_words[0].lower()
-
-        # If the command is not recognized, print an error message
-        if command_word not in self.commands.keys():
+        # Suite de commandes « go S; go E » : compilée puis exécutée d'une traite
+        if is_chain(parsed, command_string):
+            return self.run_plan(command_string)
+
+        # If the command is not recognized, it may be a macro, or print an error message
+        if parsed.command is None:
+            macro = self.macros.get(parsed.word)
+            if macro is not None and len(parsed.words) == 1:
+                return macro.run(self)
+            if self.metrics is not None:
+                self.metrics.incr("unknown_commands")
             print(
-                f"\nCommande '{command_word}' non reconnue. Entrez 'help' pour voir la liste des commandes disponibles.\n"
+                f"\nCommande '{parsed.word}' non reconnue.{did_you_mean(self.parser.suggest_command(parsed.word))}"
+                " Entrez 'help' pour voir la liste des commandes disponibles.\n",
+                file=self.output,
             )
         # If the command is recognized, execute it
         else:
-            command = self.commands[command_word]
-            command.action(self, list_of_words, command.number_of_parameters)
+            return self.run_command(parsed.command, parsed.words)
+
+    def run_command(self, command, words):
+        # Exécute une commande déjà analysée (ligne seule ou étape d'un plan)
+        if self.metrics is not None:
+            return self.metrics.run(self, command, words)
+        return command.action(self, words, command.number_of_parameters)
+
+    def run_plan(self, text):
+        # Compile et exécute une suite de commandes ; rien n'est exécuté si elle est invalide
+        try:
+            plan = compile_plan(self.parser, text, self.macros)
+        except ValueError as error:
+            if self.metrics is not None:
+                self.metrics.incr("invalid_plans")
+            print(f"\n{error} Aucune commande exécutée.\n", file=self.output)
+            return False
+        return plan.run(self)
 
     # Print the welcome message
     def print_welcome(self):
-        print(f"\nBienvenue {self.player.name} dans le Royaume d'Hyrule !")
-        print("Entrez 'help' si vous avez besoin d'aide.")
-        print(self.player.current_room.get_long_description())
-    def get_history(self) -> str:
-     if not hasattr(self, "history") or not self.history:
-        return ""   # chaîne vide si rien
+        print(f"\nBienvenue {self.player.name} dans le Royaume d'Hyrule !", file=self.output)
+        print("Entrez 'help' si vous avez besoin d'aide.", file=self.output)
+        print(self.player.current_room.get_long_description(), file=self.output)
+        self.output.flush()
+    # Export / import of the game state (rooms are referenced by their stable id)
+    def export_state(self) -> dict:
+        return {
+            "name": self.player.name,
+            "room": self.player.current_room.id,
+            "visited": [room.id for room in self.history.visited],
+            "back": [room.id for room in self.history.back_stack],
+            "finished": self.finished,
+            "turn": self.timeline.turn,
+            "macros": {name: macro.text for name, macro in self.macros.items()},
+        }
+
+    def restore_state(self, state) -> None:
+        room = self.world.room
+        self.player.name = state["name"]
+        # La carte repart des lieux visités de la sauvegarde, dans l'ordre
+        self.explored_map = ExploredMap(self._room_level)
+        visited = [room(i) for i in state["visited"]]
+        previous = None
+        for visited_room in visited:
+            self.explored_map.enter(visited_room, previous)
+            previous = visited_room
+        self.player.current_room = room(state["room"])
+        self.explored_map.enter(self.player.current_room, previous)
+        self.history.load(visited, [room(i) for i in state["back"]])
+        self.finished = state["finished"]
+        self.macros = {}
+        for name, text in state.get("macros", {}).items():
+            try:
+                self.macros[name] = compile_plan(self.parser, text, {})
+            except ValueError:
+                # Macro devenue invalide (paquet de commandes retiré) : oubliée
+                continue
+        self.timeline.reset(self.current_state(), state.get("turn", 0))
+
+    # Versions de la partie (voir timeline.py) : références seulement, O(1)
+    def current_state(self) -> GameState:
+        return GameState(self.player.current_room, self.history.state)
+
+    def apply_state(self, state: GameState) -> None:
+        self.player.current_room = state.room
+        self.history.state = state.navigation
 
-     lines = ["Vous avez déjà visité les pièces suivantes:"]
-     for room in self.history:
-        # j'affiche la description complète (ou room.name si tu préfères)
-        # ici on garde la description stockée (sans "dans"), ce qui colle avec get_long_description
-        lines.append(f"    - {room.name}")
-     return "\n".join(lines)
+    # Carte des lieux explorés (Player.on_enter)
+    def _entered(self, room, previous) -> None:
+        self.explored_map.enter(room, previous)
+
+    def _room_level(self, room) -> Optional[int]:
+        return region_level(self.world.region(room.id))
+
+    def get_history(self) -> str:
+        # Texte mis en cache par NavigationHistory (chaîne vide si rien)
+        return self.history.render()
 
 
 def main():
     # Create a game object and play the game
-    Game().play()
+    # (optional argument: directory where the game is saved and resumed)
+    save_dir = sys.argv[1] if len(sys.argv) > 1 else None
+    Game().play(save_dir)
 
 
 if __name__ == "__main__":
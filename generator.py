@@ -0,0 +1,191 @@
+# Description: Procedural world generator.
+
+# generator.py
+# Génération de cartes de taille arbitraire, reproductible à partir d'une
+# graine. Les générateurs produisent des lieux (clé, nom, description,
+# {direction: index}, région) au fil de l'eau : ils se branchent directement sur
+# world_compiler.write_world ou CompactWorld.from_records, sans construire
+# la carte entière en mémoire.
+#
+# Exemple :
+#     python generator.py grid 100000 grand.world --seed 1
+
+import argparse
+import math
+import random
+import sys
+from typing import Iterator, Tuple
+
+from world_compiler import DIRECTIONS, OPPOSITE, RoomRecord, write_world
+
+_MASK64 = (1 << 64) - 1
+
+# Textes réutilisés (la table de chaînes du monde compilé reste petite)
+BIOMES = {
+    "surface": ["une plaine", "une forêt", "un marais", "une colline", "une toundra", "un désert"],
+    "ciel": ["une île céleste", "un archipel flottant", "une plateforme ancienne"],
+    "profondeurs": ["une galerie obscure", "une mine abandonnée", "une caverne de sonium"],
+}
+DETAILS = [
+    "où souffle un vent mordant.",
+    "parsemée de ruines anciennes.",
+    "où l'on entend des bruits étranges.",
+    "baignée d'une lumière pâle.",
+    "où rien ne semble bouger.",
+]
+LAYER_REGIONS = ("surface", "ciel", "profondeurs")
+# Taille des régions (unités de chargement de world.World) : carrés de
+# REGION_SIDE x REGION_SIDE cases pour les grilles, blocs de REGION_ROOMS
+# lieux consécutifs pour les autres cartes
+REGION_SIDE = 16
+REGION_ROOMS = REGION_SIDE * REGION_SIDE
+
+
+def _noise(seed: int, a: int, b: int) -> float:
+    """Valeur pseudo-aléatoire dans [0, 1) déterminée par (seed, a, b) (splitmix64)."""
+    z = (seed * 0x9E3779B97F4A7C15 + a * 0xBF58476D1CE4E5B9 + b * 0x94D049BB133111EB) & _MASK64
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return ((z ^ (z >> 31)) >> 11) / float(1 << 53)
+
+
+def _texts(seed: int, index: int, region: str, label: str) -> Tuple[str, str]:
+    biomes = BIOMES[region]
+    biome = biomes[int(_noise(seed, index, -1) * len(biomes))]
+    detail = DETAILS[int(_noise(seed, index, -2) * len(DETAILS))]
+    return f"{biome} {label}", f"{biome} {detail}"
+
+
+def grid(width: int, height: int, layers: int = 1, seed: int = 0,
+         density: float = 0.9, vertical: float = 0.05) -> Iterator[RoomRecord]:
+    """
+    Grille width x height sur 1 à 3 niveaux : la surface, puis les îles
+    célestes (atteintes par U) et les profondeurs (atteintes par D).
+
+    Chaque passage N/S/E/O existe avec la probabilité `density` (dans les deux
+    sens) ; chaque case de surface est reliée aux niveaux U/D avec la
+    probabilité `vertical`. Le lieu de départ est l'index 0.
+    """
+    if not 1 <= layers <= len(LAYER_REGIONS):
+        raise ValueError(f"Nombre de niveaux invalide : {layers}")
+    plane = width * height
+
+    def open_between(a: int, b: int, p: float) -> bool:
+        return _noise(seed, min(a, b), max(a, b)) < p
+
+    for z in range(layers):
+        region = LAYER_REGIONS[z]
+        for y in range(height):
+            for x in range(width):
+                index = z * plane + y * width + x
+                exits = {}
+                neighbours = (("N", x, y - 1), ("S", x, y + 1), ("E", x + 1, y), ("O", x - 1, y))
+                for direction, nx, ny in neighbours:
+                    if 0 <= nx < width and 0 <= ny < height:
+                        other = z * plane + ny * width + nx
+                        if open_between(index, other, density):
+                            exits[direction] = other
+                cell = y * width + x
+                if z == 0:
+                    if layers > 1 and open_between(cell, -3, vertical):
+                        exits["U"] = plane + cell
+                    if layers > 2 and open_between(cell, -4, vertical):
+                        exits["D"] = 2 * plane + cell
+                elif z == 1 and open_between(cell, -3, vertical):
+                    exits["D"] = cell
+                elif z == 2 and open_between(cell, -4, vertical):
+                    exits["U"] = cell
+                name, description = _texts(seed, index, region, f"({x}, {y})")
+                chunk = f"{region}_{x // REGION_SIDE}_{y // REGION_SIDE}"
+                yield f"{region}_{x}_{y}", name, description, exits, chunk
+
+
+def tree(size: int, branching: int = 3, seed: int = 0) -> Iterator[RoomRecord]:
+    """
+    Arbre de `size` lieux : le lieu i (> 0) est un enfant de (i - 1) // branching,
+    relié dans les deux sens par une direction tirée au hasard (U/D compris).
+    """
+    if not 1 <= branching < len(DIRECTIONS):
+        raise ValueError(f"Facteur de branchement invalide : {branching}")
+    rng = random.Random(seed)
+    # Directions de chaque lieu vers ses enfants, tirées quand le lieu est produit
+    child_dirs = {}
+    for index in range(size):
+        exits = {}
+        if index > 0:
+            parent = (index - 1) // branching
+            direction = child_dirs[parent][(index - 1) % branching]
+            exits[OPPOSITE[direction]] = parent
+            if (index - 1) % branching == branching - 1:
+                del child_dirs[parent]
+        free = [d for d in DIRECTIONS if d not in exits]
+        rng.shuffle(free)
+        if index * branching + 1 < size:
+            child_dirs[index] = free[:branching]
+        for k, direction in enumerate(free[:branching]):
+            child = index * branching + k + 1
+            if child < size:
+                exits[direction] = child
+        region = "ciel" if "D" in exits and len(exits) == 1 else "surface"
+        name, description = _texts(seed, index, region, f"n°{index}")
+        yield f"noeud_{index}", name, description, exits, f"zone_{index // REGION_ROOMS}"
+
+
+def random_graph(size: int, degree: int = 3, seed: int = 0, one_way: float = 0.1) -> Iterator[RoomRecord]:
+    """
+    Graphe aléatoire : un anneau N/S garantit la connexité, puis chaque lieu
+    reçoit jusqu'à `degree` sorties supplémentaires vers des lieux au hasard.
+    Une proportion `one_way` de ces sorties est à sens unique.
+    """
+    rng = random.Random(seed)
+    extra = {}
+    for index in range(size):
+        exits = dict(extra.pop(index, {}))
+        exits.setdefault("S", (index + 1) % size)
+        exits.setdefault("N", (index - 1) % size)
+        for direction in rng.sample(["E", "O", "U", "D"], min(degree, 4)):
+            if direction in exits:
+                continue
+            target = rng.randrange(size)
+            exits[direction] = target
+            back = OPPOSITE[direction]
+            # Le retour n'est possible que vers un lieu pas encore produit
+            if target > index and rng.random() >= one_way and back not in extra.get(target, {}):
+                extra.setdefault(target, {})[back] = index
+        region = "profondeurs" if "U" in exits and "D" not in exits else "surface"
+        name, description = _texts(seed, index, region, f"n°{index}")
+        yield f"lieu_{index}", name, description, exits, f"zone_{index // REGION_ROOMS}"
+
+
+def generate(kind: str, size: int, seed: int = 0, **options) -> Iterator[RoomRecord]:
+    """Générateur de `kind` ('grid', 'tree' ou 'random') d'environ `size` lieux."""
+    if kind == "grid":
+        layers = options.pop("layers", 3)
+        side = max(1, int(math.sqrt(size / layers)))
+        return grid(side, side, layers, seed, **options)
+    if kind == "tree":
+        return tree(size, seed=seed, **options)
+    if kind == "random":
+        return random_graph(size, seed=seed, **options)
+    raise ValueError(f"Type de carte inconnu : '{kind}'")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Génère une carte et la compile en fichier .world.")
+    parser.add_argument("kind", choices=["grid", "tree", "random"])
+    parser.add_argument("size", type=int, help="nombre (approximatif) de lieux")
+    parser.add_argument("path", help="fichier .world à écrire")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--check", action="store_true", help="vérifier la carte générée (validator.py)")
+    args = parser.parse_args(argv)
+    count = write_world(args.path, generate(args.kind, args.size, args.seed))
+    print(f"{count} lieux générés dans {args.path}.")
+    if args.check:
+        from validator import main as check
+
+        return check([args.path])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
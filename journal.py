@@ -0,0 +1,209 @@
+# Description: Command journal and snapshots.
+
+# journal.py
+# Persistance d'une partie en deux morceaux :
+# - un journal en ajout seul des commandes passées par Game.process_command
+#   (une ligne UTF-8 par commande, écrite sans tampon : un seul appel système) ;
+# - des instantanés réguliers de l'état (lieu courant, lieux visités, pile de
+#   retour, fin de partie), les lieux étant désignés par leur index stable.
+# Au redémarrage, on charge le dernier instantané puis on rejoue seulement la
+# fin du journal (les commandes postérieures à l'instantané).
+#
+# Un instantané ne touche pas aux versions de la partie en cours (undo garde
+# tout son historique) ; seule une reprise repart d'une timeline réduite au
+# tour de l'instantané (Game.restore_state), complétée par les versions que
+# crée la fin du journal. Si la partie revient à une version qu'une reprise
+# ne connaîtrait pas (avant l'instantané, ou une version à rétablir au moment
+# de l'instantané), un nouvel instantané est pris aussitôt : le journal
+# rejoué donne toujours le même résultat.
+
+import json
+import os
+from array import array
+from typing import Iterator, Optional
+
+JOURNAL_FILE = "journal.log"
+SNAPSHOT_FILE = "snapshot.bin"
+# Nombre de commandes entre deux instantanés par défaut
+SNAPSHOT_EVERY = 500
+
+
+class Journal:
+    """
+    Journal en ajout seul.
+
+    Attributs:
+        path (str): Le chemin du fichier journal.
+        sync (bool): Si True, chaque commande est forcée sur disque (fsync) ;
+            sinon elle survit à l'arrêt du processus, pas à celui de la machine.
+    """
+
+    def __init__(self, path, sync=False):
+        self.path = path
+        self.sync = sync
+        self._file = open(path, "ab", buffering=0)
+
+    @property
+    def offset(self) -> int:
+        """Taille actuelle du journal, en octets."""
+        return self._file.tell()
+
+    def append(self, line: str) -> None:
+        self._file.write(line.replace("\n", " ").encode("utf-8") + b"\n")
+        if self.sync:
+            os.fsync(self._file.fileno())
+
+    def read_from(self, offset: int = 0) -> Iterator[str]:
+        """Commandes du journal à partir de la position `offset`."""
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            for raw in f:
+                # Une dernière ligne incomplète (arrêt pendant l'écriture) est ignorée
+                if raw.endswith(b"\n"):
+                    yield raw[:-1].decode("utf-8", "replace")
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def save_snapshot(path: str, state: dict, journal_offset: int) -> None:
+    """
+    Écrit un instantané : une ligne d'en-tête JSON, puis les index des lieux
+    visités et de la pile de retour en binaire (array('i')).
+    Le fichier est remplacé de façon atomique.
+    """
+    visited = array("i", state["visited"])
+    back = array("i", state["back"])
+    header = {
+        "name": state["name"],
+        "room": state["room"],
+        "finished": state["finished"],
+        "turn": state.get("turn", 0),
+        "macros": state.get("macros", {}),
+        "visited": len(visited),
+        "back": len(back),
+        "journal_offset": journal_offset,
+    }
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(json.dumps(header).encode("utf-8") + b"\n")
+        visited.tofile(f)
+        back.tofile(f)
+    os.replace(tmp, path)
+
+
+def load_snapshot(path: str) -> Optional[dict]:
+    """Relit un instantané ; None s'il n'existe pas."""
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        header = json.loads(f.readline())
+        visited = array("i")
+        visited.fromfile(f, header["visited"])
+        back = array("i")
+        back.fromfile(f, header["back"])
+    state = {key: header[key] for key in ("name", "room", "finished")}
+    state["turn"] = header.get("turn", 0)
+    state["macros"] = header.get("macros", {})
+    state["visited"] = visited
+    state["back"] = back
+    state["journal_offset"] = header["journal_offset"]
+    return state
+
+
+class Persistence:
+    """
+    Journal + instantanés d'une partie, rangés dans le dossier `directory`.
+
+    Examples:
+
+    >>> import tempfile
+    >>> from game import Game
+    >>> directory = tempfile.mkdtemp()
+    >>> game = Game(output=open(os.devnull, "w"))
+    >>> game.setup("Link")
+    >>> game.persistence = Persistence(directory, snapshot_every=2)
+    >>> for line in ["go E", "go D", "go S"]:
+    ...     game.process_command(line)
+    >>> game.timeline.first_turn, game.timeline.turn
+    (0, 3)
+    >>> game.persistence.close()
+    >>> restored = Game(output=open(os.devnull, "w"))
+    >>> restored.setup("?")
+    >>> Persistence(directory).restore(restored)
+    1
+    >>> restored.player.name, restored.player.current_room.name
+    ('Link', "le Centre d'Hyrule")
+    """
+
+    def __init__(self, directory, snapshot_every=SNAPSHOT_EVERY, sync=False):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.snapshot_every = snapshot_every
+        self.journal = Journal(os.path.join(directory, JOURNAL_FILE), sync)
+        self.snapshot_path = os.path.join(directory, SNAPSHOT_FILE)
+        self._since_snapshot = 0
+        self._replaying = False
+        # Tour du dernier instantané, et version à rétablir qui le suivait
+        # (inconnue d'une reprise tant qu'elle est conservée)
+        self._floor = 0
+        self._redo = None
+
+    def record(self, game, line: str) -> None:
+        """Journalise une commande exécutée (appelé par Game.process_command)."""
+        if self._replaying or not line or not line.strip():
+            return
+        self.journal.append(line)
+        self._since_snapshot += 1
+        if self._since_snapshot >= self.snapshot_every or self._diverged(game.timeline):
+            self.snapshot(game)
+
+    def _diverged(self, timeline) -> bool:
+        # La version courante est-elle hors de celles qu'une reprise rebâtit ?
+        if timeline.turn < self._floor:
+            return True
+        if self._redo is not None:
+            if timeline.version(self._floor + 1) is not self._redo:
+                # Versions à rétablir abandonnées (nouvelle commande)
+                self._redo = None
+            elif timeline.turn > self._floor:
+                return True
+        return False
+
+    def snapshot(self, game) -> None:
+        save_snapshot(self.snapshot_path, game.export_state(), self.journal.offset)
+        self._since_snapshot = 0
+        timeline = game.timeline
+        self._floor = timeline.turn
+        self._redo = timeline.version(self._floor + 1)
+
+    def restore(self, game) -> int:
+        """
+        Restaure la partie dans `game` (déjà initialisé par setup) :
+        dernier instantané, puis fin du journal. Retourne le nombre de
+        commandes rejouées.
+        """
+        state = load_snapshot(self.snapshot_path)
+        offset = 0
+        if state is not None:
+            game.restore_state(state)
+            offset = state["journal_offset"]
+
+        # Les commandes rejouées ne sont ni journalisées ni affichées
+        replayed = 0
+        self._replaying = True
+        game.output.muted = True
+        try:
+            for line in self.journal.read_from(offset):
+                game.process_command(line)
+                replayed += 1
+        finally:
+            self._replaying = False
+            game.output.muted = False
+        self._since_snapshot = replayed
+        self._floor = state["turn"] if state is not None else 0
+        self._redo = None
+        return replayed
+
+    def close(self) -> None:
+        self.journal.close()
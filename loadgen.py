@@ -0,0 +1,108 @@
+# Description: Load generator for the game server.
+
+# loadgen.py
+# Ouvre N connexions simultanées sur server.py, envoie à chacune une suite de
+# commandes et mesure la latence de chaque commande (envoi -> invite suivante).
+#
+# Exemple :
+#     python server.py &
+#     python loadgen.py --clients 5000 --commands 200
+# (penser à relever la limite de descripteurs : ulimit -n 20000)
+
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from server import NAME_PROMPT, PROMPT
+
+DEFAULT_SCRIPT = ["go E", "go O"]
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+async def client(host, port, number, commands, script, latencies, stats):
+    prompt = PROMPT.encode("utf-8")
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+    except OSError:
+        stats["errors"] += 1
+        return
+    try:
+        await reader.readuntil(NAME_PROMPT.encode("utf-8"))
+        # Noms propres à ce processus : une partie enregistrée sous le même
+        # nom par un lancement précédent demanderait son jeton
+        writer.write(f"bot{os.getpid()}-{number}\n".encode("utf-8"))
+        await reader.readuntil(prompt)
+        for i in range(commands):
+            line = script[i % len(script)]
+            start = time.perf_counter()
+            writer.write((line + "\n").encode("utf-8"))
+            await reader.readuntil(prompt)
+            latencies.append(time.perf_counter() - start)
+        writer.write(b"quit\n")
+        await reader.read()
+    except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+        stats["errors"] += 1
+    finally:
+        writer.close()
+
+
+async def run(host, port, clients, commands, script, ramp=0.0):
+    """Lance la charge et retourne un dictionnaire de résultats."""
+    latencies = []
+    stats = {"errors": 0}
+    tasks = []
+    start = time.perf_counter()
+    for number in range(clients):
+        tasks.append(asyncio.create_task(client(host, port, number, commands, script, latencies, stats)))
+        if ramp:
+            await asyncio.sleep(ramp / clients)
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "clients": clients,
+        "commands": len(latencies),
+        "errors": stats["errors"],
+        "elapsed_s": elapsed,
+        "throughput_cmd_s": len(latencies) / elapsed if elapsed else 0.0,
+        "latency_ms": {
+            "p50": percentile(latencies, 50) * 1000,
+            "p95": percentile(latencies, 95) * 1000,
+            "p99": percentile(latencies, 99) * 1000,
+            "max": (latencies[-1] if latencies else 0.0) * 1000,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Générateur de charge pour le serveur TBA.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4000)
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--commands", type=int, default=100, help="commandes par client")
+    parser.add_argument("--ramp", type=float, default=1.0, help="durée (s) d'ouverture des connexions")
+    parser.add_argument("--script", nargs="*", default=DEFAULT_SCRIPT, help="commandes envoyées en boucle")
+    parser.add_argument("--json", action="store_true", help="résultat au format JSON")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args.host, args.port, args.clients, args.commands, args.script, args.ramp))
+    if args.json:
+        print(json.dumps(result))
+    else:
+        lat = result["latency_ms"]
+        print(f"{result['clients']} clients, {result['commands']} commandes, {result['errors']} erreurs")
+        print(f"débit : {result['throughput_cmd_s']:.0f} commandes/s")
+        print(f"latence (ms) : p50 {lat['p50']:.2f}  p95 {lat['p95']:.2f}  p99 {lat['p99']:.2f}  max {lat['max']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+# Description: Command instrumentation.
+
+# metrics.py
+# Mesures optionnelles du jeu : histogramme de latence de chaque ligne traitée
+# (process_command) et de l'action de chaque commande, compteurs
+# (commandes inconnues, déplacements échoués, 'back' sur historique vide...)
+# et fréquence de visite des lieux. Désactivées (game.metrics = None), elles
+# ne coûtent qu'un test par commande ; activées, un appel à perf_counter_ns et
+# quelques incréments.
+#
+# Export : Metrics.snapshot() (dictionnaire), to_json(), to_prometheus(), et
+# MetricsDumper pour écrire l'un des deux formats périodiquement dans un fichier.
+
+import json
+import os
+import threading
+import time
+from collections import Counter
+from typing import Dict
+
+# Bornes des classes de l'histogramme, en microsecondes (puissances de 2)
+BUCKETS_US = tuple(2 ** i for i in range(21))
+
+
+class Histogram:
+    """Histogramme de latences à classes fixes (1 µs .. ~1 s, puis +Inf)."""
+
+    __slots__ = ("counts", "count", "total_ns")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS_US) + 1)
+        self.count = 0
+        self.total_ns = 0
+
+    def observe(self, elapsed_ns: int) -> None:
+        # Classe = première borne 2**i µs supérieure ou égale à la durée (O(1)) :
+        # (n - 1).bit_length() place n = 2**i dans la classe de borne 2**i
+        self.counts[min(((max(elapsed_ns, 1) - 1) // 1000).bit_length(), len(BUCKETS_US))] += 1
+        self.count += 1
+        self.total_ns += elapsed_ns
+
+    def quantile(self, q: float) -> float:
+        """Borne supérieure (µs) de la classe contenant le quantile q."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                return float(BUCKETS_US[i]) if i < len(BUCKETS_US) else float("inf")
+        return float("inf")
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_us": self.total_ns / self.count / 1000 if self.count else 0.0,
+            "p50_us": self.quantile(0.5),
+            "p99_us": self.quantile(0.99),
+            "buckets_us": dict(zip(map(str, BUCKETS_US + ("inf",)), self.counts)),
+        }
+
+
+class Metrics:
+    """
+    Mesures d'une ou plusieurs parties (une instance peut être partagée
+    par toutes les sessions d'un serveur).
+
+    Examples:
+
+    >>> import os
+    >>> from game import Game
+    >>> game = Game(output=open(os.devnull, "w"))
+    >>> game.setup("Link")
+    >>> game.metrics = Metrics()
+    >>> for line in ["go E", "go N", "back", "back", "xyzzy"]:
+    ...     game.process_command(line)
+    >>> data = game.metrics.snapshot()
+    >>> data["commands"]["go"]["count"], data["process_command"]["count"], data["counters"]
+    (2, 5, {'failed_moves': 1, 'back_empty': 1, 'unknown_commands': 1})
+    >>> histogram = Histogram()
+    >>> for elapsed_ns in (0, 1000, 1001, 2000, 4000, 4001):
+    ...     histogram.observe(elapsed_ns)
+    >>> histogram.counts[:4]
+    [2, 2, 1, 1]
+    """
+
+    def __init__(self) -> None:
+        self.commands: Dict[str, Histogram] = {}
+        self.total = Histogram()
+        self.counters: Counter = Counter()
+        self.room_visits: Counter = Counter()
+        self.started = time.time()
+
+    def incr(self, name: str, value: int = 1) -> None:
+        self.counters[name] += value
+
+    def run(self, game, command, words):
+        """
+        Exécute l'action de `command` en mesurant sa durée (histogramme de la
+        commande) et ses effets. La durée complète de la ligne (analyse,
+        événements, envoi de la sortie) est mesurée par Game.process_command
+        (observe_line).
+        """
+        room = game.player.current_room
+        start = time.perf_counter_ns()
+        try:
+            return command.action(game, words, command.number_of_parameters)
+        finally:
+            elapsed = time.perf_counter_ns() - start
+            histogram = self.commands.get(command.command_word)
+            if histogram is None:
+                histogram = self.commands[command.command_word] = Histogram()
+            histogram.observe(elapsed)
+            current = game.player.current_room
+            if current is not room and current is not None:
+                self.room_visits[current.id if current.id is not None else current.name] += 1
+
+    def observe_line(self, elapsed_ns: int) -> None:
+        """Durée complète du traitement d'une ligne (Game.process_command)."""
+        self.total.observe(elapsed_ns)
+
+    # Export
+    def snapshot(self) -> dict:
+        return {
+            "uptime_s": time.time() - self.started,
+            "process_command": self.total.snapshot(),
+            # list(...) : copie en un seul appel C, sûre face au thread MetricsDumper
+            "commands": {word: h.snapshot() for word, h in list(self.commands.items())},
+            "counters": dict(self.counters),
+            "room_visits": {str(room): n for room, n in self.room_visits.most_common()},
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), ensure_ascii=False)
+
+    def to_prometheus(self) -> str:
+        """Texte au format d'exposition Prometheus."""
+        lines = [
+            "# HELP tba_command_latency_seconds Durée d'exécution des commandes.",
+            "# TYPE tba_command_latency_seconds histogram",
+        ]
+        for word, histogram in sorted(list(self.commands.items())):
+            cumulative = 0
+            for bound, n in zip(BUCKETS_US, histogram.counts):
+                cumulative += n
+                lines.append(f'tba_command_latency_seconds_bucket{{command="{word}",le="{bound / 1e6:g}"}} {cumulative}')
+            lines.append(f'tba_command_latency_seconds_bucket{{command="{word}",le="+Inf"}} {histogram.count}')
+            lines.append(f'tba_command_latency_seconds_sum{{command="{word}"}} {histogram.total_ns / 1e9:.9f}')
+            lines.append(f'tba_command_latency_seconds_count{{command="{word}"}} {histogram.count}')
+        lines.append("# TYPE tba_events_total counter")
+        for name, value in sorted(list(self.counters.items())):
+            lines.append(f'tba_events_total{{event="{name}"}} {value}')
+        lines.append("# TYPE tba_room_visits_total counter")
+        for room, value in self.room_visits.most_common():
+            lines.append(f'tba_room_visits_total{{room="{room}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+class MetricsDumper:
+    """
+    Écrit périodiquement les mesures dans `path` (format 'json' ou
+    'prometheus'), dans un thread d'arrière-plan. Le fichier est remplacé
+    de façon atomique à chaque écriture.
+    """
+
+    def __init__(self, metrics: Metrics, path: str, interval: float = 10.0, fmt: str = "json") -> None:
+        if fmt not in ("json", "prometheus"):
+            raise ValueError(f"Format inconnu : '{fmt}'")
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self.fmt = fmt
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="metrics-dumper", daemon=True)
+
+    def dump(self) -> None:
+        text = self.metrics.to_json() if self.fmt == "json" else self.metrics.to_prometheus()
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, self.path)
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.dump()
+
+    def start(self) -> "MetricsDumper":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.dump()
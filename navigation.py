@@ -0,0 +1,156 @@
+# Description: Navigation history.
+
+# navigation.py
+# Historique de navigation du joueur, séparé en deux structures :
+# - les lieux déjà visités (ensemble persistant : test d'appartenance en O(1),
+#   plus une liste chaînée qui garde l'ordre de première visite) ;
+# - la pile de retour utilisée par 'back', bornée (les plus anciens sont oubliés).
+# Les lignes affichées par 'history' sont gardées dans une liste complétée à
+# chaque nouveau lieu ; le texte n'est assemblé que quand 'history' le demande.
+#
+# Toutes ces structures sont persistantes (persistent.py) : l'état complet de
+# l'historique est un tuple immuable (attribut `state`), qu'on peut conserver
+# et remettre en place en O(1) pour annuler une commande (timeline.py).
+
+from typing import Tuple
+
+from persistent import Chain, PersistentSet, chain, chain_items
+
+HISTORY_HEADER = "Vous avez déjà visité les pièces suivantes:"
+
+
+def history_line(room) -> str:
+    """Ligne d'un lieu dans le texte de l'historique."""
+    return f"    - {room.name}"
+
+# Nombre maximal de retours en arrière conservés par défaut
+MAX_BACK = 1000
+
+# (lieux visités, ordre de visite, pile de retour, taille de la pile, nombre
+# de maillons de la pile, oubliés compris)
+NavigationState = Tuple[PersistentSet, Chain, Chain, int, int]
+_EMPTY: NavigationState = (PersistentSet(), None, None, 0, 0)
+
+
+def visited_rooms(state: NavigationState) -> list:
+    """Lieux visités d'un état, dans l'ordre de première visite."""
+    return chain_items(state[1])[::-1]
+
+
+def back_rooms(state: NavigationState) -> list:
+    """Pile de retour d'un état, le lieu le plus récent en dernier."""
+    return chain_items(state[2], state[3])[::-1]
+
+
+class NavigationHistory:
+    """
+    Lieux visités et pile de retour d'un joueur.
+
+    Attributs
+    ---------
+    state : NavigationState
+        État complet, immuable : le garder puis le réaffecter restaure
+        l'historique tel qu'il était.
+    visited : list
+        Lieux visités, dans l'ordre de première visite.
+    back_stack : list
+        Lieux à reprendre avec 'back', le plus récent en dernier (taille bornée).
+
+    Exemples
+    --------
+    >>> from room import Room
+    >>> a, b = Room("A", "a."), Room("B", "b.")
+    >>> history = NavigationHistory(max_back=2)
+    >>> history.record_move(a); saved = history.state
+    True
+    >>> history.record_move(b), history.record_move(a)
+    (True, False)
+    >>> history.render()
+    'Vous avez déjà visité les pièces suivantes:\\n    - A\\n    - B'
+    >>> history.pop_back() is a, history.pop_back() is b, history.pop_back()
+    (True, True, None)
+    >>> history.state = saved
+    >>> history.render(), history.back_stack == [a]
+    ('Vous avez déjà visité les pièces suivantes:\\n    - A', True)
+    """
+
+    def __init__(self, max_back: int = MAX_BACK) -> None:
+        self.max_back = max_back
+        self.state = _EMPTY
+        # Lignes de l'historique, valables pour la liste `_text_order`, et
+        # texte assemblé (valable tant que la liste a `_text_count` lignes)
+        self._lines: list = []
+        self._text_order: Chain = None
+        self._text = ""
+        self._text_count = 0
+
+    @property
+    def visited(self) -> list:
+        return visited_rooms(self.state)
+
+    @property
+    def back_stack(self) -> list:
+        return back_rooms(self.state)
+
+    def record_move(self, previous_room) -> bool:
+        """
+        Enregistre le lieu quitté lors d'un déplacement. Retourne True si ce
+        lieu entre dans la liste des lieux visités.
+        """
+        if previous_room is None:
+            return False
+        visited, order, back, size, depth = self.state
+        back = (previous_room, back)
+        size = min(size + 1, self.max_back)
+        depth += 1
+        if depth > 2 * self.max_back:
+            # Les maillons oubliés sont coupés une fois sur max_back ajouts
+            # (coût amorti constant)
+            back = chain(chain_items(back, size)[::-1])
+            depth = size
+        added = previous_room not in visited
+        if added:
+            visited = visited.add(previous_room)
+            text_valid = self._text_order is order
+            order = (previous_room, order)
+            if text_valid:
+                # Rendu incrémental : on ajoute seulement la ligne du nouveau lieu
+                self._lines.append(history_line(previous_room))
+                self._text_order = order
+        self.state = (visited, order, back, size, depth)
+        return added
+
+    def pop_back(self):
+        """Retire et retourne le dernier lieu quitté, None si la pile est vide."""
+        visited, order, back, size, depth = self.state
+        if not size:
+            return None
+        room, back = back
+        self.state = (visited, order, back, size - 1, depth - 1)
+        return room
+
+    def has_visited(self, room) -> bool:
+        return room in self.state[0]
+
+    def render(self) -> str:
+        """Texte de l'historique ('' si aucun lieu visité)."""
+        order = self.state[1]
+        if self._text_order is not order:
+            # État remis en place (annulation, restauration) : lignes recalculées
+            self._lines = [history_line(room) for room in chain_items(order)[::-1]]
+            self._text_order = order
+            self._text_count = -1
+        lines = self._lines
+        if self._text_count != len(lines):
+            self._text = "\n".join([HISTORY_HEADER, *lines]) if lines else ""
+            self._text_count = len(lines)
+        return self._text
+
+    def load(self, visited, back) -> None:
+        """Remplace le contenu (restauration d'une sauvegarde)."""
+        visited = list(dict.fromkeys(visited))
+        back = list(back)[-self.max_back:] if self.max_back else []
+        self.state = (PersistentSet.of(visited), chain(visited), chain(back), len(back), len(back))
+
+    def clear(self) -> None:
+        self.state = _EMPTY
@@ -0,0 +1,166 @@
+# Description: Room occupancy index.
+
+# occupancy.py
+# Qui est dans quel lieu, pour un monde partagé par plusieurs joueurs.
+# L'index est tenu à jour par Player (affectation de current_room) : savoir
+# qui est présent dans un lieu ne demande pas de parcourir tous les joueurs,
+# et un message peut être diffusé aux seuls occupants d'un lieu.
+#
+# Concurrence : les lieux sont répartis sur STRIPES tables, chacune protégée
+# par son propre verrou. Deux déplacements ne se gênent que s'ils touchent des
+# lieux de la même table ; un déplacement prend au plus deux verrous, toujours
+# dans le même ordre. Les messages sont envoyés hors verrou, à partir d'une
+# copie de la liste des occupants. Sous asyncio (un seul thread), les verrous
+# ne sont jamais disputés.
+#
+# Foules : au-delà de CROWD_SIZE autres occupants, les arrivées et départs
+# d'un lieu ne sont plus annoncés (ce serait un message par occupant et par
+# déplacement). Un déplacement coûte donc O(1), quel que soit le nombre de
+# joueurs réunis dans un lieu.
+
+import threading
+import weakref
+from itertools import islice
+from typing import Dict, List, Optional, Tuple
+
+# Nombre de tables (et de verrous) de l'index
+STRIPES = 64
+# Nombre maximal d'autres occupants prévenus d'une arrivée ou d'un départ
+CROWD_SIZE = 16
+
+# Un index par monde, partagé par toutes les sessions qui y jouent
+_INDEXES = weakref.WeakKeyDictionary()
+
+
+def occupancy_for(world) -> "OccupancyIndex":
+    """Retourne l'index d'occupation partagé du monde `world`."""
+    index = _INDEXES.get(world)
+    if index is None:
+        index = _INDEXES.setdefault(world, OccupancyIndex())
+    return index
+
+
+def _key(room):
+    # Les lieux d'un monde compilé sont identifiés par leur index (accepté
+    # directement) ; les lieux construits à la main (sans id) par l'objet lui-même.
+    if isinstance(room, int):
+        return room
+    return room if room.id is None else room.id
+
+
+class OccupancyIndex:
+    """
+    Occupants de chaque lieu, sûr entre threads.
+
+    Exemples:
+
+    >>> from room import Room
+    >>> hall, garden = Room("Hall", "un hall."), Room("Garden", "un jardin.")
+    >>> index = OccupancyIndex()
+    >>> index.move("Link", None, hall)
+    ((), ())
+    >>> index.move("Zelda", None, hall)
+    ((), ['Link'])
+    >>> index.move("Link", hall, garden)
+    (['Zelda'], ())
+    >>> index.occupants(hall), index.occupants(garden), len(index)
+    (['Zelda'], ['Link'], 2)
+    >>> index = OccupancyIndex(crowd_size=1)
+    >>> for name in ["Link", "Zelda", "Kass"]:
+    ...     index.move(name, None, hall)
+    ((), ())
+    ((), ['Link'])
+    ((), ())
+    >>> index.occupants(hall, limit=2), index.count(hall)
+    (['Link', 'Zelda'], 3)
+    """
+
+    def __init__(self, stripes: int = STRIPES, crowd_size: int = CROWD_SIZE) -> None:
+        self.crowd_size = crowd_size
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        # Par table : {clé du lieu: {joueur: None}} (dictionnaire = ensemble ordonné)
+        self._rooms: List[Dict[object, Dict[object, None]]] = [{} for _ in range(stripes)]
+
+    def _stripe(self, key) -> int:
+        return hash(key) % len(self._locks)
+
+    def move(self, player, old, new) -> Tuple[list, list]:
+        """
+        Déplace `player` du lieu `old` vers le lieu `new` (None = hors du
+        monde). Retourne les joueurs à prévenir : ceux restés dans `old` et
+        ceux déjà présents dans `new`, relevés sous les mêmes verrous que le
+        déplacement ; aucun pour un lieu où ils sont plus de crowd_size.
+        """
+        old_key = None if old is None else _key(old)
+        new_key = None if new is None else _key(new)
+        if old_key == new_key:
+            return [], []
+        count = len(self._locks)
+        old_stripe = -1 if old_key is None else hash(old_key) % count
+        new_stripe = -1 if new_key is None else hash(new_key) % count
+        # Verrous pris par ordre de table croissant (pas d'interblocage)
+        first, second = sorted((old_stripe, new_stripe))
+        if first >= 0:
+            self._locks[first].acquire()
+        if second != first:
+            self._locks[second].acquire()
+        try:
+            left = joined = ()
+            if old_key is not None:
+                table = self._rooms[old_stripe]
+                occupants = table.get(old_key)
+                if occupants is not None:
+                    occupants.pop(player, None)
+                    if occupants:
+                        if len(occupants) <= self.crowd_size:
+                            left = list(occupants)
+                    else:
+                        del table[old_key]
+            if new_key is not None:
+                occupants = self._rooms[new_stripe].setdefault(new_key, {})
+                if occupants and len(occupants) <= self.crowd_size:
+                    joined = list(occupants)
+                occupants[player] = None
+        finally:
+            if second != first:
+                self._locks[second].release()
+            if first >= 0:
+                self._locks[first].release()
+        return left, joined
+
+    def occupants(self, room, limit: Optional[int] = None) -> list:
+        """
+        Copie de la liste des joueurs présents dans `room`, par ordre
+        d'arrivée (les `limit` premiers seulement, si précisé).
+        """
+        key = _key(room)
+        stripe = self._stripe(key)
+        with self._locks[stripe]:
+            occupants = self._rooms[stripe].get(key)
+            if not occupants:
+                return []
+            return list(occupants) if limit is None else list(islice(occupants, limit))
+
+    def count(self, room) -> int:
+        """Nombre de joueurs présents dans `room`."""
+        key = _key(room)
+        stripe = self._stripe(key)
+        with self._locks[stripe]:
+            occupants = self._rooms[stripe].get(key)
+            return len(occupants) if occupants else 0
+
+    def broadcast(self, room, text: str, exclude=None) -> int:
+        """
+        Envoie `text` à chaque joueur présent dans `room` (sauf `exclude`),
+        via Player.notify. Retourne le nombre de joueurs prévenus.
+        """
+        sent = 0
+        for player in self.occupants(room):
+            if player is not exclude:
+                player.notify(text)
+                sent += 1
+        return sent
+
+    def __len__(self) -> int:
+        # Total approximatif si des déplacements ont lieu pendant le calcul
+        return sum(len(occupants) for table in self._rooms for occupants in list(table.values()))
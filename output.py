@@ -0,0 +1,60 @@
+# Description: Output buffer.
+
+# output.py
+# Flux de sortie tamponné : les messages écrits pendant une commande
+# (print(..., file=game.output)) sont accumulés puis envoyés en une seule
+# écriture sur la destination réelle quand Game.process_command se termine.
+
+
+import sys
+
+
+class OutputBuffer:
+    """
+    Tampon de sortie vidé une fois par commande.
+
+    Attributs:
+        target: La destination (objet avec write/flush) ; None = sys.stdout
+            au moment du vidage.
+        muted (bool): Si True, le texte est oublié au lieu d'être envoyé
+            (utilisé pour rejouer des commandes sans les afficher).
+
+    Examples:
+
+    >>> import io
+    >>> out = io.StringIO()
+    >>> buffer = OutputBuffer(out)
+    >>> print("a", file=buffer); print("b", file=buffer)
+    >>> out.getvalue()
+    ''
+    >>> buffer.flush(); out.getvalue()
+    'a\\nb\\n'
+    """
+
+    def __init__(self, target=None):
+        self.target = target
+        self.muted = False
+        self._parts = []
+
+    def write(self, text):
+        self._parts.append(text)
+        return len(text)
+
+    def getvalue(self):
+        """Texte en attente (non encore envoyé)."""
+        return "".join(self._parts)
+
+    def discard(self):
+        """Oublie le texte en attente sans l'envoyer."""
+        self._parts.clear()
+
+    def flush(self):
+        if not self._parts:
+            return
+        text = "".join(self._parts)
+        self._parts.clear()
+        if self.muted:
+            return
+        target = sys.stdout if self.target is None else self.target
+        target.write(text)
+        target.flush()
@@ -0,0 +1,121 @@
+# Description: Command parser.
+
+# parser.py
+# Analyse des commandes, compilée une seule fois au setup : un index de
+# préfixes (trie aplati en dictionnaire) sur les mots de commande, leurs alias
+# et les synonymes de direction. Un préfixe est accepté comme abréviation s'il
+# ne mène qu'à une seule cible (ex : 'hi' -> history, mais pas 'h').
+
+from typing import Dict, Hashable, List, Mapping, Optional
+
+from suggest import SuggestionIndex
+
+# Synonymes (en minuscules) -> direction canonique
+DIRECTION_SYNONYMS = {
+    "n": "N", "nord": "N", "north": "N",
+    "s": "S", "sud": "S", "south": "S",
+    "e": "E", "est": "E", "east": "E",
+    "o": "O", "ouest": "O", "west": "O",
+    "u": "U", "up": "U", "haut": "U",
+    "d": "D", "down": "D", "bas": "D",
+}
+
+# Marqueur d'un préfixe partagé par plusieurs cibles différentes
+_AMBIGUOUS = object()
+
+
+def build_prefix_index(vocabulary: Mapping[str, Hashable]) -> Dict[str, Hashable]:
+    """
+    Construit l'index {préfixe: cible} d'un vocabulaire {mot: cible}.
+
+    Les mots complets sont toujours présents ; les préfixes ne le sont que
+    s'ils désignent une seule cible.
+
+    >>> index = build_prefix_index({"help": 1, "history": 2, "hide": 2})
+    >>> index["hi"], index["he"], "h" in index
+    (2, 1, False)
+    """
+    index = {}
+    for word, target in vocabulary.items():
+        for end in range(1, len(word)):
+            prefix = word[:end]
+            current = index.get(prefix, target)
+            index[prefix] = target if current == target else _AMBIGUOUS
+    index = {prefix: target for prefix, target in index.items() if target is not _AMBIGUOUS}
+    index.update(vocabulary)
+    return index
+
+
+class ParsedCommand:
+    """
+    Résultat de l'analyse d'une ligne.
+
+    Attributes:
+        word (str): Le mot de commande tapé, en minuscules.
+        command (Command): La commande reconnue, None si inconnue.
+        words (list): Les mots de la ligne, tels que transmis aux actions.
+    """
+
+    __slots__ = ("word", "command", "words")
+
+    def __init__(self, word, command, words):
+        self.word = word
+        self.command = command
+        self.words = words
+
+
+class CommandParser:
+    """
+    Analyseur compilé à partir des commandes du jeu.
+
+    Examples:
+
+    >>> from command import Command
+    >>> back = Command("back", "", None, 0)
+    >>> parser = CommandParser({"back": back, "retour": back})
+    >>> parser.parse("  RET ").command is back
+    True
+    >>> parser.direction("Nor"), parser.direction("ouest"), parser.direction("x")
+    ('N', 'O', None)
+    >>> parser.suggest_command("bakc"), parser.suggest_direction("oeust")
+    (['back'], ['ouest'])
+    """
+
+    def __init__(self, commands: Mapping, directions: Mapping[str, str] = DIRECTION_SYNONYMS):
+        self._command_words = [word.lower() for word in commands]
+        self._direction_words = [word.lower() for word in directions]
+        self._commands = build_prefix_index({word.lower(): cmd for word, cmd in commands.items()})
+        self._directions = build_prefix_index({word.lower(): d for word, d in directions.items()})
+        # Index de suggestions, construits à la première faute de frappe
+        self._command_suggestions = None
+        self._direction_suggestions = None
+
+    def command(self, word: str):
+        """Retourne la commande désignée par `word` (ou une abréviation), None sinon."""
+        return self._commands.get(word.lower())
+
+    def direction(self, word: str) -> Optional[str]:
+        """Retourne la direction canonique désignée par `word`, None sinon."""
+        return self._directions.get(word.strip().lower())
+
+    def suggest_command(self, word: str, limit: int = 3) -> List[str]:
+        """Mots de commande (ou alias) proches de `word`, du plus proche au moins proche."""
+        if self._command_suggestions is None:
+            self._command_suggestions = SuggestionIndex(self._command_words)
+        return self._command_suggestions.suggest(word, limit)
+
+    def suggest_direction(self, word: str, limit: int = 3) -> List[str]:
+        """Directions (ou synonymes) proches de `word`."""
+        if self._direction_suggestions is None:
+            self._direction_suggestions = SuggestionIndex(self._direction_words, max_distance=1)
+        return self._direction_suggestions.suggest(word, limit)
+
+    def parse(self, line: str) -> Optional[ParsedCommand]:
+        """Analyse une ligne ; retourne None si elle est vide."""
+        if not line:
+            return None
+        words = line.split()
+        if not words:
+            return None
+        word = words[0].lower()
+        return ParsedCommand(word, self._commands.get(word), words)
@@ -0,0 +1,175 @@
+# Description: Persistent data structures.
+
+# persistent.py
+# Structures persistantes : jamais modifiées sur place, chaque ajout retourne
+# une nouvelle version qui partage presque tout avec la précédente. Garder
+# une version (pour annuler une commande, voir timeline.py) ne coûte donc
+# que les quelques nœuds recopiés, jamais une copie complète.
+#
+# - PersistentSet : ensemble en trie de hachage à table de bits (HAMT) ; un
+#   ajout recopie un nœud par niveau (au plus 13 niveaux de 32 branches,
+#   2 ou 3 en pratique) ;
+# - listes chaînées (tête, reste) : empiler et dépiler en O(1).
+
+from typing import Iterable, Iterator, Optional, Tuple
+
+_BITS = 5
+_MASK = (1 << _BITS) - 1
+_HASH_BITS = 64
+
+try:
+    _popcount = int.bit_count
+except AttributeError:  # Python < 3.10
+    def _popcount(value: int) -> int:
+        return bin(value).count("1")
+
+
+class _Node:
+    # Nœud interne : `bitmap` indique les branches présentes, `entries` les
+    # contient dans l'ordre (éléments, sous-nœuds ou _Collision)
+    __slots__ = ("bitmap", "entries")
+
+    def __init__(self, bitmap: int, entries: tuple) -> None:
+        self.bitmap = bitmap
+        self.entries = entries
+
+
+class _Collision:
+    # Éléments de même hachage (64 bits), au-delà du dernier niveau
+    __slots__ = ("items",)
+
+    def __init__(self, items: tuple) -> None:
+        self.items = items
+
+
+def _hash(item) -> int:
+    return hash(item) & ((1 << _HASH_BITS) - 1)
+
+
+def _pair(first, first_hash: int, second, second_hash: int, shift: int):
+    # Plus petit sous-arbre contenant deux éléments
+    if shift >= _HASH_BITS:
+        return _Collision((first, second))
+    a = (first_hash >> shift) & _MASK
+    b = (second_hash >> shift) & _MASK
+    if a == b:
+        return _Node(1 << a, (_pair(first, first_hash, second, second_hash, shift + _BITS),))
+    entries = (first, second) if a < b else (second, first)
+    return _Node((1 << a) | (1 << b), entries)
+
+
+def _add(node: _Node, item, item_hash: int, shift: int) -> _Node:
+    bit = 1 << ((item_hash >> shift) & _MASK)
+    index = _popcount(node.bitmap & (bit - 1))
+    entries = node.entries
+    if not node.bitmap & bit:
+        return _Node(node.bitmap | bit, entries[:index] + (item,) + entries[index:])
+    entry = entries[index]
+    if isinstance(entry, _Node):
+        child = _add(entry, item, item_hash, shift + _BITS)
+        if child is entry:
+            return node
+    elif isinstance(entry, _Collision):
+        if item in entry.items:
+            return node
+        child = _Collision(entry.items + (item,))
+    elif entry is item or entry == item:
+        return node
+    else:
+        child = _pair(entry, _hash(entry), item, item_hash, shift + _BITS)
+    return _Node(node.bitmap, entries[:index] + (child,) + entries[index + 1:])
+
+
+def _walk(node) -> Iterator:
+    for entry in node.entries:
+        if isinstance(entry, _Node):
+            yield from _walk(entry)
+        elif isinstance(entry, _Collision):
+            yield from entry.items
+        else:
+            yield entry
+
+
+class PersistentSet:
+    """
+    Ensemble immuable ; add() retourne un nouvel ensemble.
+
+    Examples:
+
+    >>> empty = PersistentSet()
+    >>> one = empty.add("a")
+    >>> two = one.add("b")
+    >>> "a" in two, "b" in one, len(empty), len(two), two.add("a") is two
+    (True, False, 0, 2, True)
+    >>> sorted(PersistentSet.of(range(1000))) == list(range(1000))
+    True
+    """
+
+    __slots__ = ("_root", "_size")
+
+    def __init__(self, _root: Optional[_Node] = None, _size: int = 0) -> None:
+        self._root = _root if _root is not None else _Node(0, ())
+        self._size = _size
+
+    @classmethod
+    def of(cls, items: Iterable) -> "PersistentSet":
+        result = cls()
+        for item in items:
+            result = result.add(item)
+        return result
+
+    def add(self, item) -> "PersistentSet":
+        root = _add(self._root, item, _hash(item), 0)
+        if root is self._root:
+            return self
+        return PersistentSet(root, self._size + 1)
+
+    def __contains__(self, item) -> bool:
+        item_hash = _hash(item)
+        node = self._root
+        shift = 0
+        while True:
+            bit = 1 << ((item_hash >> shift) & _MASK)
+            if not node.bitmap & bit:
+                return False
+            entry = node.entries[_popcount(node.bitmap & (bit - 1))]
+            if isinstance(entry, _Node):
+                node = entry
+                shift += _BITS
+            elif isinstance(entry, _Collision):
+                return item in entry.items
+            else:
+                return entry is item or entry == item
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator:
+        # Ordre des hachages, pas celui des ajouts
+        return _walk(self._root)
+
+
+# Listes chaînées persistantes : None (liste vide) ou (tête, reste)
+Chain = Optional[Tuple[object, "Chain"]]
+
+
+def chain(items: Iterable) -> Chain:
+    """
+    Liste chaînée des éléments de `items`, le dernier en tête.
+
+    >>> chain_items(chain([1, 2, 3]))
+    [3, 2, 1]
+    """
+    result = None
+    for item in items:
+        result = (item, result)
+    return result
+
+
+def chain_items(items: Chain, limit: Optional[int] = None) -> list:
+    """Éléments de la liste chaînée, de la tête vers la fin (au plus `limit`)."""
+    result = []
+    while items is not None and (limit is None or len(result) < limit):
+        head, items = items
+        result.append(head)
+    return result
@@ -0,0 +1,133 @@
+# Description: Command plans.
+
+# plans.py
+# Suites de commandes et macros. Une ligne « go S; go E; up » est analysée et
+# vérifiée en une fois (commandes connues, nombre de paramètres) : le plan
+# obtenu est une liste de commandes déjà résolues, exécutées d'une traite.
+# Rien n'est exécuté si une des commandes est invalide ; l'exécution s'arrête
+# à la première commande qui échoue (déplacement impossible, par exemple).
+# La sortie de toute la suite part en une seule écriture (output.OutputBuffer
+# est vidé une fois par ligne).
+#
+# Une macro (« macro tour = go S; go E; up ») est un plan nommé, compilé à sa
+# définition ; les macros utilisées dans sa définition y sont recopiées, une
+# redéfinition ultérieure ne la change donc pas. Une macro qui en recopie
+# d'autres peut grossir très vite : une suite développée de plus de
+# MAX_PLAN_STEPS commandes est refusée.
+
+from typing import List, Mapping, Sequence
+
+from parser import ParsedCommand
+from suggest import did_you_mean
+
+# Séparateur des commandes d'une suite
+SEPARATOR = ";"
+# Mot de commande qui définit une macro (sa ligne n'est pas découpée)
+MACRO_WORD = "macro"
+# Nombre maximal de commandes d'une suite, macros développées
+MAX_PLAN_STEPS = 500
+
+
+class Plan:
+    """
+    Suite de commandes compilée.
+
+    Attributs:
+        steps (tuple): Les commandes (parser.ParsedCommand), dans l'ordre.
+        text (str): La suite sous forme de texte, macros développées.
+    """
+
+    __slots__ = ("steps", "text")
+
+    def __init__(self, steps: Sequence[ParsedCommand]) -> None:
+        self.steps = tuple(steps)
+        self.text = f"{SEPARATOR} ".join(" ".join(step.words) for step in self.steps)
+
+    def __len__(self) -> int:
+        return len(self.steps)
+
+    def run(self, game) -> bool:
+        """
+        Exécute les commandes dans `game` ; s'arrête à la première qui échoue
+        (ou si la partie se termine). Retourne True si toutes ont réussi.
+        """
+        total = len(self.steps)
+        for position, step in enumerate(self.steps, 1):
+            if game.run_command(step.command, step.words) is False:
+                if position < total:
+                    print(f"\nSuite interrompue à '{' '.join(step.words)}' ({position}/{total}).\n", file=game.output)
+                return False
+            if game.finished:
+                break
+        return True
+
+
+def _parameters_error(word: str, expected: int) -> str:
+    if expected == 0:
+        return f"La commande '{word}' ne prend pas de paramètre."
+    if expected == 1:
+        return f"La commande '{word}' prend 1 seul paramètre."
+    return f"La commande '{word}' prend {expected} paramètres."
+
+
+def _too_long() -> ValueError:
+    return ValueError(f"Suite trop longue : plus de {MAX_PLAN_STEPS} commandes une fois les macros développées.")
+
+
+def compile_plan(parser, text: str, macros: Mapping[str, Plan]) -> Plan:
+    """
+    Compile une suite de commandes séparées par SEPARATOR ; les macros
+    (`macros`) y sont développées. Lève ValueError (message pour le joueur)
+    si une commande est inconnue, mal formée, si la suite est vide ou si elle
+    dépasse MAX_PLAN_STEPS commandes une fois développée.
+
+    >>> from registry import builtin_registry
+    >>> parser = builtin_registry().parser
+    >>> tour = compile_plan(parser, "go S ; go  E;; up", {})
+    >>> tour.text, len(compile_plan(parser, "tour; back", {"tour": tour}))
+    ('go S; go E; up', 4)
+    >>> compile_plan(parser, "go S; gp E", {})
+    Traceback (most recent call last):
+    ...
+    ValueError: Commande 'gp' non reconnue. Vouliez-vous dire : go, up, map ?
+    >>> compile_plan(parser, "go; look", {})
+    Traceback (most recent call last):
+    ...
+    ValueError: La commande 'go' prend 1 seul paramètre.
+    >>> big = compile_plan(parser, "; ".join(["look"] * 300), {})
+    >>> compile_plan(parser, "big; big", {"big": big})
+    Traceback (most recent call last):
+    ...
+    ValueError: Suite trop longue : plus de 500 commandes une fois les macros développées.
+    """
+    steps: List[ParsedCommand] = []
+    for segment in text.split(SEPARATOR):
+        parsed = parser.parse(segment)
+        if parsed is None:
+            continue
+        command = parsed.command
+        if command is None:
+            macro = macros.get(parsed.word)
+            if macro is None:
+                raise ValueError(f"Commande '{parsed.word}' non reconnue.{did_you_mean(parser.suggest_command(parsed.word))}")
+            if len(parsed.words) > 1:
+                raise ValueError(f"La macro '{parsed.word}' ne prend pas de paramètre.")
+            if len(steps) + len(macro.steps) > MAX_PLAN_STEPS:
+                raise _too_long()
+            steps.extend(macro.steps)
+            continue
+        if command.command_word == MACRO_WORD:
+            raise ValueError("Une macro ne peut être définie qu'en dehors d'une suite de commandes.")
+        if len(parsed.words) != command.number_of_parameters + 1:
+            raise ValueError(_parameters_error(parsed.word, command.number_of_parameters))
+        if len(steps) >= MAX_PLAN_STEPS:
+            raise _too_long()
+        steps.append(parsed)
+    if not steps:
+        raise ValueError("Suite de commandes vide.")
+    return Plan(steps)
+
+
+def is_chain(parsed: ParsedCommand, line: str) -> bool:
+    """Vrai si la ligne est une suite de commandes (et pas une définition de macro)."""
+    return SEPARATOR in line and (parsed.command is None or parsed.command.command_word != MACRO_WORD)
@@ -1,4 +1,11 @@
 # Define the Player class.
+
+# Messages des autres joueurs gardés au plus entre deux commandes, quand ils
+# sont écrits dans la sortie du joueur (pas de notifier) : les suivants sont
+# seulement comptés
+MAX_PENDING_NOTICES = 20
+
+
 class Player:
     """
     Représente le joueur et gère sa position dans le jeu.
@@ -13,12 +20,29 @@ class Player:
         Nom du joueur.
     current_room : Optional[Room]
         Salle actuelle du joueur (None si non initialisée).
+    output : Optional[TextIO]
+        Flux où sont écrits les messages du joueur (None = sortie standard).
+    occupancy : Optional[OccupancyIndex]
+        Index d'occupation du monde partagé (voir occupancy.py), tenu à jour
+        à chaque changement de current_room ; None en solo.
+    notifier : Optional[Callable[[str], None]]
+        Fonction recevant les messages des autres joueurs (None = écrits
+        dans output, donc affichés avec la réponse à la prochaine commande).
+    on_enter : Optional[Callable[[Room, Optional[Room]], None]]
+        Appelée à chaque changement de current_room avec le nouveau lieu et
+        le précédent (carte des lieux explorés, voir explored_map.py).
 
     Méthodes:
 
     move(direction: str) -> bool
         Tente de déplacer le joueur dans la direction donnée ('N','E','S','O').
         Retourne True si le déplacement réussi (nouvelle salle), False sinon.
+    walk(rooms: list) -> None
+        Suit un itinéraire ; seuls le départ et l'arrivée sont signalés.
+    leave() -> None
+        Retire le joueur du monde partagé (fin de session).
+    notices_delivered() -> None
+        Signale que la sortie du joueur va être envoyée (fin de commande).
 
     Exemples:
 
@@ -36,15 +60,87 @@ class Player:
     False
     """
 
-    def __init__(self, name):
+    def __init__(self, name, output=None, occupancy=None):
         self.name = name
-        self.current_room = None
+        self.occupancy = occupancy
+        self.notifier = None
+        self.on_enter = None
+        # Messages écrits dans output depuis la dernière commande, et ignorés
+        self._pending_notices = 0
+        self._dropped_notices = 0
+        self._current_room = None
+        # Flux de sortie du joueur (None = sortie standard)
+        self.output = output
+
+    # Salle courante ; dans un monde partagé, chaque changement met à jour
+    # l'index d'occupation et prévient les joueurs des deux salles.
+    @property
+    def current_room(self):
+        return self._current_room
+
+    @current_room.setter
+    def current_room(self, room):
+        old = self._current_room
+        self._current_room = room
+        if old is room:
+            return
+        if self.on_enter is not None:
+            self.on_enter(room, old)
+        self._announce(old, room)
+
+    def walk(self, rooms):
+        """
+        Suit les lieux `rooms` (itinéraire) : seuls le départ du premier lieu
+        et l'arrivée au dernier sont signalés aux autres joueurs.
+        """
+        start = self._current_room
+        for room in rooms:
+            old = self._current_room
+            self._current_room = room
+            if old is not room and self.on_enter is not None:
+                self.on_enter(room, old)
+        self._announce(start, self._current_room)
+
+    def _announce(self, old, room):
+        # Met à jour l'index d'occupation et prévient les joueurs des deux lieux
+        if self.occupancy is None or old is room:
+            return
+        left, joined = self.occupancy.move(self, old, room)
+        for other in left:
+            other.notify(f"\n{self.name} s'en va.\n")
+        for other in joined:
+            other.notify(f"\n{self.name} arrive.\n")
+
+    def notify(self, text):
+        """Transmet au joueur un message venant du monde partagé."""
+        if self.notifier is not None:
+            self.notifier(text)
+        elif self._pending_notices >= MAX_PENDING_NOTICES:
+            self._dropped_notices += 1
+        else:
+            self._pending_notices += 1
+            print(text, file=self.output)
+
+    def notices_delivered(self):
+        """Appelé avant l'envoi de la sortie du joueur : résume les messages ignorés."""
+        if self._dropped_notices:
+            print(f"\n({self._dropped_notices} autres messages non affichés.)\n", file=self.output)
+        self._pending_notices = self._dropped_notices = 0
+
+    def leave(self):
+        """Retire le joueur de l'index d'occupation (fin de session)."""
+        if self.occupancy is None:
+            return
+        left, _ = self.occupancy.move(self, self._current_room, None)
+        for other in left:
+            other.notify(f"\n{self.name} s'en va.\n")
+        self.occupancy = None
 
     # Define the move method.
     def move(self, direction):
         # Vérifier que le joueur est dans une salle.
         if self.current_room is None:
-            print("\nLe joueur n'est dans aucune salle.\n")
+            print("\nLe joueur n'est dans aucune salle.\n", file=self.output)
             return False
 
         # Utiliser l'API de Room pour récupérer la sortie en sécurité.
@@ -56,12 +152,12 @@ class Player:
 
         # Si la sortie est absente ou None, afficher un message et retourner False.
         if next_room is None:
-            print("\nAucune porte dans cette direction !\n")
+            print("\nAucune porte dans cette direction !\n", file=self.output)
             return False
 
         # Déplacer le joueur vers la salle suivante.
         self.current_room = next_room
-        print(self.current_room.get_long_description())
+        print(self.current_room.get_long_description(), file=self.output)
         return True
 
     
\ No newline at end of file
@@ -0,0 +1,136 @@
+# Description: Command registry.
+
+# registry.py
+# Déclaration des commandes du jeu : mot, aide, nombre de paramètres et chemin
+# d'import de l'action ("module:attribut"), importée seulement à la première
+# utilisation de la commande. Le registre par défaut (commandes de base et
+# paquets de commandes installés) est construit une fois par processus, avec
+# son analyseur ; toutes les parties le partagent, le setup d'une session ne
+# dépend donc pas du nombre de commandes.
+#
+# Paquets de commandes tiers : une distribution déclare un point d'entrée du
+# groupe ENTRY_POINT_GROUP menant à une fonction register(registry), par
+# exemple dans son pyproject.toml :
+#
+#     [project.entry-points."tba.commands"]
+#     magie = "tba_magie.commandes:register"
+#
+#     def register(registry):
+#         registry.register("lancer", " <sort> : lancer un sort", "tba_magie.sorts:lancer", 1)
+
+import sys
+from importlib.metadata import entry_points
+from typing import Dict, Iterable, Optional
+
+from command import Command
+from parser import CommandParser
+
+ENTRY_POINT_GROUP = "tba.commands"
+
+# Commandes de base : (mot, aide, action, nombre de paramètres, alias)
+BUILTIN_COMMANDS = (
+    ("help", " : afficher cette aide", "actions:Actions.help", 0, ()),
+    ("quit", " : quitter le jeu", "actions:Actions.quit", 0, ()),
+    ("go", " <direction> : se déplacer dans une direction cardinale (N, E, S, O, U, D)", "actions:Actions.go", 1, ()),
+    ("history", " : afficher l'historique des lieux visités", "actions:Actions.history", 0, ()),
+    ("back", " : revenir au lieu précédent", "actions:Actions.back", 0, ("retour",)),
+    ("map", " : afficher la carte des lieux explorés", "actions:Actions.map", 0, ("carte",)),
+    ("undo", " : annuler la dernière commande", "actions:Actions.undo", 0, ("annuler",)),
+    ("redo", " : rétablir la commande annulée", "actions:Actions.redo", 0, ("retablir",)),
+    ("rewind", " <tour> : revenir à l'état d'un tour précédent", "actions:Actions.rewind", 1, ()),
+    ("macro", " <nom> = <commande>; <commande>... : définir une macro (sans argument : lister les macros)",
+     "actions:Actions.macro", 1, ()),
+    ("look", " : décrire le lieu et les joueurs présents", "actions:Actions.look", 0, ("regarder",)),
+    ("who", " : lister les joueurs présents dans le lieu", "actions:Actions.who", 0, ()),
+    ("up", " : monter d'un niveau (équivalent go U)", "actions:Actions.up", 0, ()),
+    ("down", " : descendre d'un niveau (équivalent go D)", "actions:Actions.down", 0, ()),
+    ("travel", " <lieu> : aller jusqu'à un lieu par le plus court chemin", "actions:Actions.travel", 1, ()),
+    ("path", " <lieu> : afficher le plus court chemin vers un lieu", "actions:Actions.path", 1, ()),
+)
+
+# Registre par défaut du processus (voir default_registry)
+_default = None
+
+
+class CommandRegistry:
+    """
+    Ensemble des commandes d'un jeu et leur analyseur.
+
+    Attributs:
+        commands (dict): {mot en minuscules: Command}, alias compris, dans
+            l'ordre d'enregistrement (c'est l'ordre de l'aide).
+
+    Examples:
+
+    >>> registry = CommandRegistry()
+    >>> command = registry.register("go", " <direction>", "actions:Actions.go", 1, aliases=["aller"])
+    >>> registry.parser.command("all") is command
+    True
+    >>> command._action
+    'actions:Actions.go'
+    >>> command.action.__name__
+    'go'
+    """
+
+    def __init__(self) -> None:
+        self.commands: Dict[str, Command] = {}
+        self._parser: Optional[CommandParser] = None
+
+    def register(self, word: str, help_string: str, action, number_of_parameters: int = 0,
+                 aliases: Iterable[str] = ()) -> Command:
+        """
+        Déclare une commande. `action` est une fonction ou son chemin
+        d'import ("module:attribut"). Une commande déjà déclarée sous ce mot
+        est remplacée.
+        """
+        command = Command(word, help_string, action, number_of_parameters)
+        self.commands[word.lower()] = command
+        for alias in aliases:
+            self.commands[alias.lower()] = command
+        self._parser = None
+        return command
+
+    @property
+    def parser(self) -> CommandParser:
+        """Analyseur des commandes, compilé à la première utilisation."""
+        if self._parser is None:
+            self._parser = CommandParser(self.commands)
+        return self._parser
+
+    def load_entry_points(self, group: str = ENTRY_POINT_GROUP) -> int:
+        """
+        Enregistre les paquets de commandes installés (points d'entrée `group`).
+        Un paquet en erreur est signalé puis ignoré. Retourne le nombre de
+        paquets chargés.
+        """
+        try:
+            points = entry_points(group=group)
+        except TypeError:  # Python < 3.10
+            points = entry_points().get(group, ())
+        loaded = 0
+        for point in points:
+            try:
+                point.load()(self)
+            except Exception as error:  # un paquet défectueux ne doit pas empêcher de jouer
+                print(f"Paquet de commandes '{point.name}' ignoré : {type(error).__name__}: {error}", file=sys.stderr)
+            else:
+                loaded += 1
+        return loaded
+
+
+def builtin_registry() -> CommandRegistry:
+    """Nouveau registre contenant les commandes de base."""
+    registry = CommandRegistry()
+    for word, help_string, action, number_of_parameters, aliases in BUILTIN_COMMANDS:
+        registry.register(word, help_string, action, number_of_parameters, aliases)
+    return registry
+
+
+def default_registry() -> CommandRegistry:
+    """Registre partagé du processus : commandes de base et paquets installés."""
+    global _default
+    if _default is None:
+        registry = builtin_registry()
+        registry.load_entry_points()
+        _default = registry
+    return _default
@@ -17,24 +17,80 @@ class Room:
         Description du lieu (sans le mot "dans").
     exits : Dict[str, Optional[Room]]
         Dictionnaire des sorties par direction ('N','E','S','O','U','D').
+    id : Optional[int]
+        Identifiant stable du lieu dans son monde compilé (None sinon).
+
+    Le texte affiché (get_exit_string, get_long_description) est mis en cache
+    et recalculé seulement après une modification du nom, de la description
+    ou des sorties.
     """
 
-    def __init__(self, name: str, description: str) -> None:
+    def __init__(self, name: str, description: str, room_id: Optional[int] = None) -> None:
+        self._exit_string: Optional[str] = None
+        self._long_description: Optional[str] = None
         self.name = name
         self.description = description
-        self.exits: Dict[str, Optional["Room"]] = {}
+        self.exits = {}
+        self.id = room_id
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @name.setter
+    def name(self, value: str) -> None:
+        self._name = value
+        self.invalidate()
+
+    @property
+    def description(self) -> str:
+        return self._description
+
+    @description.setter
+    def description(self, value: str) -> None:
+        self._description = value
+        self.invalidate()
+
+    @property
+    def exits(self) -> Dict[str, Optional["Room"]]:
+        return self._exits
+
+    @exits.setter
+    def exits(self, value) -> None:
+        # Un dictionnaire ordinaire est enveloppé pour que toute écriture
+        # (room.exits["U"] = ...) invalide le rendu mis en cache.
+        self._exits = _ExitDict(self, value) if isinstance(value, dict) else value
+        self.invalidate()
+
+    def invalidate(self) -> None:
+        """Oublie le rendu mis en cache (à appeler si les sorties changent)."""
+        self._exit_string = None
+        self._long_description = None
 
     def get_exit(self, direction: str) -> Optional["Room"]:
         if not direction:
             return None
         return self.exits.get(direction.upper())
 
+    def exit_directions(self) -> list:
+        """
+        Directions ayant une sortie, sans charger les lieux voisins (monde
+        compilé : voir world._LazyExits).
+        """
+        directions = getattr(self.exits, "directions", None)
+        if directions is not None:
+            return directions()
+        return [d for d, r in self.exits.items() if r is not None]
+
     def get_exit_string(self) -> str:
         """Retourne une ligne listant les sorties valides (ex : 'Sorties: N, E')."""
-        valid_exits = [d for d, r in self.exits.items() if r is not None]
-        if not valid_exits:
-            return "Sorties : aucune"
-        return "Sorties : " + ", ".join(valid_exits)
+        if self._exit_string is None:
+            valid_exits = self.exit_directions()
+            if not valid_exits:
+                self._exit_string = "Sorties : aucune"
+            else:
+                self._exit_string = "Sorties : " + ", ".join(valid_exits)
+        return self._exit_string
 
     def get_long_description(self) -> str:
         """
@@ -43,7 +99,52 @@ class Room:
         Exemple de sortie :
         "\nVous êtes dans la Région d'Hébra, des montagnes gelées...\n\nSorties : N, E\n"
         """
-        desc = self.description.strip()
-       
-        header = f"\nVous êtes dans {self.name}, {desc}\n\n"
-        return header + self.get_exit_string() + "\n"
+        if self._long_description is None:
+            desc = self.description.strip()
+            header = f"\nVous êtes dans {self.name}, {desc}\n\n"
+            self._long_description = header + self.get_exit_string() + "\n"
+        return self._long_description
+
+
+class _ExitDict(dict):
+    """Dictionnaire des sorties d'un Room qui invalide son rendu à chaque écriture."""
+
+    __slots__ = ("_room",)
+
+    def __init__(self, room: Room, data) -> None:
+        super().__init__(data)
+        self._room = room
+
+    def __setitem__(self, direction, target) -> None:
+        super().__setitem__(direction, target)
+        self._room.invalidate()
+
+    def __delitem__(self, direction) -> None:
+        super().__delitem__(direction)
+        self._room.invalidate()
+
+    def directions(self) -> list:
+        return [d for d, r in self.items() if r is not None]
+
+    def update(self, *args, **kwargs) -> None:
+        super().update(*args, **kwargs)
+        self._room.invalidate()
+
+    def setdefault(self, direction, target=None):
+        result = super().setdefault(direction, target)
+        self._room.invalidate()
+        return result
+
+    def pop(self, direction, *default):
+        result = super().pop(direction, *default)
+        self._room.invalidate()
+        return result
+
+    def popitem(self):
+        result = super().popitem()
+        self._room.invalidate()
+        return result
+
+    def clear(self) -> None:
+        super().clear()
+        self._room.invalidate()
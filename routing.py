@@ -0,0 +1,358 @@
+# Description: Routing engine.
+
+# routing.py
+# Recherche d'itinéraires sur le graphe des sorties (lieux = index du monde).
+# - BFS pour les cartes non pondérées (chaque sortie coûte 1) ;
+# - A* avec une heuristique fournie (estimation du nombre de pas restants) ;
+# - table des prochains pas précalculée, pour les petites cartes.
+# Les itinéraires calculés sont mis en cache et invalidés quand une sortie change :
+# seuls ceux qu'un passage supprimé coupe (index inverse sortie -> itinéraires
+# qui l'empruntent), ou qu'un passage ajouté raccourcit (parcours borné autour
+# du passage, puis seuls les itinéraires des départs atteints sont examinés),
+# sont oubliés (idem pour les lignes de la table des prochains pas).
+
+import heapq
+import weakref
+from collections import OrderedDict, deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+from world_compiler import DIRECTIONS
+from world_index import index_for
+
+# Taille maximale d'une carte pour la table des prochains pas (n² entrées)
+MAX_TABLE_ROOMS = 2000
+# Lieux parcourus au plus, autour d'une sortie ajoutée, pour trouver les
+# itinéraires qu'elle raccourcit ; au-delà, les itinéraires non vérifiés sont oubliés
+MAX_INVALIDATION_ROOMS = 50000
+
+# Un routeur par monde, partagé par toutes les sessions qui y jouent
+_ROUTERS = weakref.WeakKeyDictionary()
+
+
+def router_for(world) -> "Router":
+    """Retourne le routeur partagé du monde `world` (créé au premier appel)."""
+    router = _ROUTERS.get(world)
+    if router is None:
+        router = _ROUTERS[world] = Router(world)
+    return router
+
+
+class Router:
+    """
+    Calcul d'itinéraires entre lieux d'un monde.
+
+    Le monde doit fournir len(world) et world.exit_index(index, direction).
+    Un itinéraire est la liste des directions à suivre.
+
+    Attributs
+    ---------
+    heuristic : Optional[Callable[[int, int], float]]
+        Estimation (minorante) du nombre de pas entre deux lieux ; si elle est
+        fournie, route() utilise A* au lieu de BFS.
+
+    Le routeur ne garde qu'une référence faible vers le monde (qui, lui, le
+    garde parmi ses exit_listeners) : il ne le maintient pas en vie.
+
+    Exemples
+    --------
+    >>> from compact import CompactWorld
+    >>> world = CompactWorld.from_source({"rooms": {
+    ...     "a": {"name": "A", "exits": {"E": "b"}},
+    ...     "b": {"name": "B", "exits": {"E": "c", "O": "a"}},
+    ...     "c": {"name": "C", "exits": {"O": "b"}}}})
+    >>> router = Router(world)
+    >>> router.route(0, 2), router.route(2, 0)
+    (['E', 'E'], ['O', 'O'])
+    >>> world.set_exit(0, "U", 2)
+    >>> router.route(0, 2), router.route(2, 0), len(router._cache)
+    (['U'], ['O', 'O'], 2)
+    >>> router.precompute(); world.set_exit(0, "U", -1)
+    >>> router.route(0, 2)
+    ['E', 'E']
+    """
+
+    def __init__(self, world, heuristic: Optional[Callable[[int, int], float]] = None, cache_size: int = 10000) -> None:
+        self._world = weakref.ref(world)
+        self.heuristic = heuristic
+        self.cache_size = cache_size
+        # (départ, arrivée) -> (directions ou None, sorties empruntées)
+        self._cache: "OrderedDict[Tuple[int, int], tuple]" = OrderedDict()
+        # (lieu, direction) -> itinéraires en cache qui empruntent cette sortie
+        self._users: Dict[Tuple[int, str], set] = {}
+        # départ -> itinéraires en cache qui en partent ; itinéraires « sans
+        # chemin » ; nombre d'itinéraires en cache de chaque longueur
+        self._by_source: Dict[int, set] = {}
+        self._unreachable: set = set()
+        self._lengths: Dict[int, int] = {}
+        self._table: Optional[Dict[int, Dict[int, str]]] = None
+        # Sorties entrantes de chaque lieu (table des prochains pas seulement)
+        self._incoming: Dict[int, List[Tuple[int, str]]] = {}
+        listeners = getattr(world, "exit_listeners", None)
+        if listeners is not None:
+            listeners.append(self.exit_changed)
+
+    @property
+    def world(self):
+        return self._world()
+
+    # Parcours
+    def _neighbors(self, index: int):
+        exit_index = self.world.exit_index
+        for direction in DIRECTIONS:
+            target = exit_index(index, direction)
+            if target >= 0:
+                yield direction, target
+
+    @staticmethod
+    def _unwind(parents, src, dst) -> List[str]:
+        path = []
+        node = dst
+        while node != src:
+            node, direction = parents[node]
+            path.append(direction)
+        path.reverse()
+        return path
+
+    def bfs(self, src: int, dst: int) -> Optional[List[str]]:
+        """Plus court itinéraire (en nombre de pas) de src à dst, None si aucun."""
+        if src == dst:
+            return []
+        parents = {src: None}
+        queue = deque([src])
+        while queue:
+            node = queue.popleft()
+            for direction, target in self._neighbors(node):
+                if target in parents:
+                    continue
+                parents[target] = (node, direction)
+                if target == dst:
+                    return self._unwind(parents, src, dst)
+                queue.append(target)
+        return None
+
+    def astar(self, src: int, dst: int, heuristic: Callable[[int, int], float]) -> Optional[List[str]]:
+        """Itinéraire de src à dst par A*, guidé par `heuristic`."""
+        if src == dst:
+            return []
+        parents = {src: None}
+        cost = {src: 0}
+        heap = [(heuristic(src, dst), 0, src)]
+        while heap:
+            _, steps, node = heapq.heappop(heap)
+            if node == dst:
+                return self._unwind(parents, src, dst)
+            if steps > cost[node]:
+                continue
+            for direction, target in self._neighbors(node):
+                new_cost = steps + 1
+                if new_cost < cost.get(target, new_cost + 1):
+                    cost[target] = new_cost
+                    parents[target] = (node, direction)
+                    heapq.heappush(heap, (new_cost + heuristic(target, dst), new_cost, target))
+        return None
+
+    # Table des prochains pas
+    def precompute(self) -> None:
+        """
+        Calcule, pour chaque destination, la direction à prendre depuis chaque
+        lieu (un BFS inverse par destination). Réservé aux petites cartes.
+        """
+        count = len(self.world)
+        if count > MAX_TABLE_ROOMS:
+            raise ValueError(f"Carte trop grande pour une table de routage ({count} lieux).")
+        incoming: Dict[int, List[Tuple[int, str]]] = {i: [] for i in range(count)}
+        for index in range(count):
+            for direction, target in self._neighbors(index):
+                incoming[target].append((index, direction))
+        self._incoming = incoming
+        self._table = {dst: self._table_row(dst) for dst in range(count)}
+
+    def _table_row(self, dst: int) -> Dict[int, str]:
+        # Direction à prendre depuis chaque lieu pour aller à dst (BFS inverse)
+        incoming = self._incoming
+        next_hop = {}
+        seen = {dst}
+        queue = deque([dst])
+        while queue:
+            node = queue.popleft()
+            for source, direction in incoming[node]:
+                if source not in seen:
+                    seen.add(source)
+                    next_hop[source] = direction
+                    queue.append(source)
+        return next_hop
+
+    def _distances(self, start: int, neighbors, radius: Optional[int] = None,
+                   limit: Optional[int] = None, skip=None) -> Tuple[Dict[int, int], bool]:
+        """
+        Distances depuis `start` (BFS selon `neighbors`, sans l'arc `skip`),
+        jusqu'à `radius` pas et au plus `limit` lieux. Retourne aussi False si
+        `limit` a arrêté le parcours (des lieux à moins de `radius` pas manquent).
+        """
+        distances = {start: 0}
+        queue = deque([start])
+        while queue:
+            node = queue.popleft()
+            steps = distances[node] + 1
+            if radius is not None and steps > radius:
+                break
+            for direction, target in neighbors(node):
+                if target in distances or (node, direction) == skip:
+                    continue
+                if limit is not None and len(distances) >= limit:
+                    return distances, False
+                distances[target] = steps
+                queue.append(target)
+        return distances, True
+
+    def _route_from_table(self, src: int, dst: int) -> Optional[List[str]]:
+        next_hop = self._table[dst]
+        path = []
+        node = src
+        while node != dst:
+            direction = next_hop.get(node)
+            if direction is None:
+                return None
+            path.append(direction)
+            node = self.world.exit_index(node, direction)
+        return path
+
+    # API principale
+    def route(self, src: int, dst: int) -> Optional[List[str]]:
+        """Itinéraire de src à dst (liste de directions), None si inaccessible."""
+        if self._table is not None:
+            return self._route_from_table(src, dst)
+
+        key = (src, dst)
+        cache = self._cache
+        entry = cache.get(key)
+        if entry is not None:
+            cache.move_to_end(key)
+            path = entry[0]
+            return None if path is None else list(path)
+
+        if self.heuristic is not None:
+            path = self.astar(src, dst, self.heuristic)
+        else:
+            path = self.bfs(src, dst)
+        self._remember(key, path)
+        return path
+
+    def _remember(self, key, path) -> None:
+        edges = []
+        if path is None:
+            self._unreachable.add(key)
+        else:
+            node = key[0]
+            for direction in path:
+                edge = (node, direction)
+                edges.append(edge)
+                self._users.setdefault(edge, set()).add(key)
+                node = self.world.exit_index(node, direction)
+            self._lengths[len(path)] = self._lengths.get(len(path), 0) + 1
+        self._by_source.setdefault(key[0], set()).add(key)
+        self._cache[key] = (None if path is None else tuple(path), tuple(edges))
+        if len(self._cache) > self.cache_size:
+            self._forget(next(iter(self._cache)))
+
+    def _forget(self, key) -> None:
+        entry = self._cache.pop(key, None)
+        if entry is None:
+            return
+        path, edges = entry
+        keys = self._by_source[key[0]]
+        keys.discard(key)
+        if not keys:
+            del self._by_source[key[0]]
+        if path is None:
+            self._unreachable.discard(key)
+            return
+        for edge in edges:
+            keys = self._users.get(edge)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._users[edge]
+        count = self._lengths[len(path)] - 1
+        if count:
+            self._lengths[len(path)] = count
+        else:
+            del self._lengths[len(path)]
+
+    # Invalidation
+    def exit_changed(self, index: int, direction: str, old: int, new: int) -> None:
+        """
+        Signale la modification d'une sortie de `index`.
+
+        Une sortie supprimée n'invalide que les itinéraires qui l'empruntent.
+        Une sortie ajoutée (index -> new) n'invalide que ceux qu'elle
+        raccourcit : distance(départ, index) + 1 + distance(new, arrivée)
+        inférieure à leur longueur, et les itinéraires « sans chemin » dont
+        le départ mène à `index`.
+        """
+        if self._table is not None:
+            self._update_table(index, direction, old, new)
+        if old >= 0:
+            for key in list(self._users.get((index, direction), ())):
+                self._forget(key)
+        if new >= 0 and self._cache:
+            self._forget_shortened(index, new)
+
+    def _forget_shortened(self, index: int, new: int) -> None:
+        # Un raccourci par index -> new ne sert qu'à un itinéraire d'au moins
+        # 2 pas, dont le départ est à au plus (longueur - 2) pas de `index`
+        longest = max(self._lengths, default=0)
+        radius = None if self._unreachable else longest - 2
+        if radius is not None and radius < 0:
+            return
+        to_index, complete = self._distances(index, self._predecessors, radius, MAX_INVALIDATION_ROOMS)
+        if complete:
+            # Seuls les départs atteints sont examinés
+            sources = [(src, to_index[src]) for src in to_index if src in self._by_source]
+        else:
+            # Parcours tronqué (très grande carte) : tous les départs
+            sources = [(src, to_index.get(src)) for src in self._by_source]
+        from_new = None
+        for src, before in sources:
+            for key in list(self._by_source.get(src, ())):
+                path = self._cache[key][0]
+                if before is None:
+                    if not complete:
+                        self._forget(key)
+                    continue
+                if path is None:
+                    self._forget(key)
+                    continue
+                if before > len(path) - 2:
+                    continue
+                if from_new is None:
+                    from_new, complete_from = self._distances(new, self._neighbors, longest - 2,
+                                                              MAX_INVALIDATION_ROOMS)
+                after = from_new.get(key[1])
+                if after is None and not complete_from or after is not None and before + 1 + after < len(path):
+                    self._forget(key)
+
+    def _predecessors(self, index: int):
+        # Lieux menant à `index` (index du monde, tenu à jour à chaque modification)
+        for source, direction in index_for(self.world).incoming(index):
+            yield direction, source
+
+    def _update_table(self, index: int, direction: str, old: int, new: int) -> None:
+        # Recalcule seulement les lignes (destinations) dont les itinéraires changent
+        table = self._table
+        incoming = self._incoming
+        edge = (index, direction)
+        rows = set()
+        if old >= 0:
+            incoming[old].remove(edge)
+            # Destinations dont l'arbre des plus courts chemins passait par la sortie
+            rows.update(dst for dst, next_hop in table.items() if next_hop.get(index) == direction)
+        if new >= 0:
+            # La sortie raccourcit les itinéraires vers dst si elle raccourcit
+            # celui qui part de `index` (sinon, tout chemin par elle est plus long)
+            before, _ = self._distances(index, self._neighbors, skip=edge)
+            after, _ = self._distances(new, self._neighbors)
+            rows.update(dst for dst, steps in after.items() if steps + 1 < before.get(dst, steps + 2))
+            incoming[new].append(edge)
+        for dst in rows:
+            table[dst] = self._table_row(dst)
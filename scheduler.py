@@ -0,0 +1,243 @@
+# Description: World scheduler.
+
+# scheduler.py
+# Ordonnanceur des événements du monde (météo, personnages...) : roue de
+# temporisation hiérarchique. Le temps avance par pas fixes (`tick` secondes).
+# La roue a LEVELS niveaux de SLOTS cases : le niveau k contient les
+# échéances à moins de SLOTS ** (k + 1) pas. Quand le niveau 0 fait un tour
+# complet, la case suivante du niveau 1 est redistribuée dans le niveau 0,
+# et ainsi de suite. Ajout et annulation se font en O(1), chaque échéance est
+# redistribuée au plus LEVELS - 1 fois. Le temps saute directement au prochain
+# pas utile (case occupée du niveau 0, ou redistribution d'une case occupée) :
+# une longue période sans échéance ne coûte pas un tour de boucle par pas.
+#
+# Deux modes :
+# - simulé (clock=None) : le temps n'avance que par advance(), ce qui rend
+#   les parties et les tests déterministes ;
+# - temps réel (clock=time.monotonic) : run_pending() exécute tout ce qui est
+#   arrivé à échéance depuis le dernier appel ; run_forever() le fait en
+#   tâche de fond asyncio (serveur).
+
+import asyncio
+import math
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+SLOT_BITS = 8
+SLOTS = 1 << SLOT_BITS
+LEVELS = 4
+# Pas de temps par défaut (secondes)
+TICK = 0.1
+
+
+class Timer:
+    """Échéance programmée ; cancel() l'annule (sans effet si déjà passée)."""
+
+    __slots__ = ("when", "interval", "callback", "args", "_slot", "_scheduler")
+
+    def __init__(self, scheduler, when: int, interval: int, callback: Callable, args: tuple) -> None:
+        self.when = when
+        self.interval = interval
+        self.callback = callback
+        self.args = args
+        self._slot: Optional[Dict["Timer", None]] = None
+        self._scheduler = scheduler
+
+    @property
+    def active(self) -> bool:
+        return self._slot is not None
+
+    def cancel(self) -> None:
+        slot = self._slot
+        if slot is not None:
+            del slot[self]
+            self._slot = None
+            self._scheduler._count -= 1
+        # Une échéance périodique annulée pendant son propre rappel ne
+        # doit pas être reprogrammée
+        self.interval = 0
+
+
+class Scheduler:
+    """
+    Roue de temporisation hiérarchique.
+
+    Attributs:
+        tick (float): Durée d'un pas, en secondes.
+        now (int): Nombre de pas écoulés.
+
+    Examples:
+
+    >>> scheduler = Scheduler(tick=1.0)
+    >>> events = []
+    >>> _ = scheduler.call_later(3, events.append, "pluie")
+    >>> orage = scheduler.call_every(2, events.append, "orage")
+    >>> scheduler.advance(4), events
+    (3, ['orage', 'pluie', 'orage'])
+    >>> orage.cancel(); scheduler.advance(100000), len(scheduler)
+    (0, 0)
+    """
+
+    def __init__(self, tick: float = TICK, clock: Optional[Callable[[], float]] = None) -> None:
+        self.tick = tick
+        self.now = 0
+        self._clock = clock
+        self._origin = clock() if clock is not None else 0.0
+        self._wheel: List[List[Dict[Timer, None]]] = [[{} for _ in range(SLOTS)] for _ in range(LEVELS)]
+        # Échéances au-delà de la roue (plus de SLOTS ** LEVELS pas)
+        self._overflow: Dict[Timer, None] = {}
+        self._count = 0
+
+    @classmethod
+    def realtime(cls, tick: float = TICK) -> "Scheduler":
+        """Ordonnanceur en temps réel (horloge monotone)."""
+        return cls(tick, time.monotonic)
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def time(self) -> float:
+        """Temps écoulé (secondes) selon l'ordonnanceur."""
+        return self.now * self.tick
+
+    # Programmation
+    def _ticks(self, delay: float) -> int:
+        # Au moins un pas : un rappel ne s'exécute jamais pendant son ajout
+        return max(1, math.ceil(delay / self.tick - 1e-9))
+
+    def call_later(self, delay: float, callback: Callable, *args) -> Timer:
+        """Appelle callback(*args) dans `delay` secondes."""
+        timer = Timer(self, self.now + self._ticks(delay), 0, callback, args)
+        self._insert(timer)
+        self._count += 1
+        return timer
+
+    def call_every(self, interval: float, callback: Callable, *args, first: Optional[float] = None) -> Timer:
+        """Appelle callback(*args) toutes les `interval` secondes (la première fois après `first`)."""
+        ticks = self._ticks(interval)
+        delay = ticks if first is None else self._ticks(first)
+        timer = Timer(self, self.now + delay, ticks, callback, args)
+        self._insert(timer)
+        self._count += 1
+        return timer
+
+    def _insert(self, timer: Timer) -> None:
+        when = timer.when
+        delta = when - self.now
+        if delta < SLOTS:
+            slot = self._wheel[0][when & (SLOTS - 1)]
+        else:
+            for level in range(1, LEVELS):
+                if delta < 1 << (SLOT_BITS * (level + 1)):
+                    slot = self._wheel[level][(when >> (SLOT_BITS * level)) & (SLOTS - 1)]
+                    break
+            else:
+                slot = self._overflow
+        slot[timer] = None
+        timer._slot = slot
+
+    # Écoulement du temps
+    def advance(self, seconds: float) -> int:
+        """Fait avancer le temps simulé de `seconds` ; retourne le nombre de rappels exécutés."""
+        return self._run_until(self.now + round(seconds / self.tick))
+
+    def run_pending(self) -> int:
+        """Exécute ce qui est arrivé à échéance (temps réel) ; retourne le nombre de rappels."""
+        if self._clock is None:
+            return 0
+        return self._run_until(int((self._clock() - self._origin) / self.tick))
+
+    async def run_forever(self) -> None:
+        """Exécute les échéances au fil du temps réel (tâche asyncio)."""
+        while True:
+            self.run_pending()
+            await asyncio.sleep(self.tick)
+
+    def _next_tick(self, target: int) -> int:
+        """
+        Prochain pas (au plus `target`) où une case du niveau 0 arrive à
+        échéance ou une case occupée d'un niveau supérieur est redistribuée ;
+        les pas intermédiaires n'ont rien à faire. Au plus SLOTS cases
+        examinées par niveau.
+        """
+        now = self.now
+        mask = SLOTS - 1
+        best = target
+        wheel = self._wheel[0]
+        for offset in range(1, min(mask, target - now) + 1):
+            if wheel[(now + offset) & mask]:
+                best = now + offset
+                break
+        for level in range(1, LEVELS + 1):
+            shift = SLOT_BITS * level
+            base = now >> shift
+            if (base + 1) << shift >= best:
+                break  # frontières encore plus espacées aux niveaux suivants
+            if level == LEVELS:
+                if self._overflow:
+                    best = (base + 1) << shift
+                break
+            wheel = self._wheel[level]
+            for offset in range(1, SLOTS + 1):
+                tick = (base + offset) << shift
+                if tick >= best:
+                    break
+                if wheel[(base + offset) & mask]:
+                    best = tick
+                    break
+        return best
+
+    def _run_until(self, target: int) -> int:
+        ran = 0
+        while self.now < target:
+            if not self._count:
+                # Roue vide : rien à redistribuer ni à exécuter
+                self.now = target
+                break
+            # Les redistributions sautées ne concernent que des cases vides
+            self.now = self._next_tick(target)
+            if not self.now & (SLOTS - 1):
+                self._cascade()
+            # La case est remplacée avant les rappels : ce qu'ils programment
+            # pour dans SLOTS pas ne s'y mélange pas
+            index = self.now & (SLOTS - 1)
+            due = self._wheel[0][index]
+            if not due:
+                continue
+            self._wheel[0][index] = {}
+            for timer in list(due):
+                if timer._slot is not due:
+                    continue  # annulée par un rappel précédent
+                timer._slot = None
+                self._count -= 1
+                if timer.interval:
+                    timer.when = self.now + timer.interval
+                    self._insert(timer)
+                    self._count += 1
+                ran += 1
+                try:
+                    timer.callback(*timer.args)
+                except Exception as error:  # un événement en erreur ne doit pas arrêter le monde
+                    print(f"Événement en erreur ({getattr(timer.callback, '__name__', timer.callback)}) : "
+                          f"{type(error).__name__}: {error}", file=sys.stderr)
+        return ran
+
+    def _cascade(self) -> None:
+        # À chaque tour complet d'un niveau, redistribue la case courante du
+        # niveau supérieur, en commençant par le plus haut concerné (ses
+        # échéances peuvent retomber dans les cases courantes des niveaux inférieurs)
+        now = self.now
+        top = 0
+        while top < LEVELS and not now & ((1 << (SLOT_BITS * (top + 1))) - 1):
+            top += 1
+        for level in range(top, 0, -1):
+            if level == LEVELS:
+                slot = self._overflow
+            else:
+                slot = self._wheel[level][(now >> (SLOT_BITS * level)) & (SLOTS - 1)]
+            timers = list(slot)
+            slot.clear()
+            for timer in timers:
+                self._insert(timer)
@@ -0,0 +1,251 @@
+# Description: Game server.
+
+# server.py
+# Serveur TCP asyncio sans interface : chaque connexion est une session avec
+# son propre Game/Player, pilotée ligne par ligne via Game.process_command.
+# Le monde compilé (mmap, lecture seule) est partagé entre toutes les sessions.
+#
+# Protocole (texte UTF-8, une commande par ligne) :
+# - le serveur envoie NAME_PROMPT, le client répond par le nom du joueur ;
+#   un nom déjà pris par une session ouverte est refusé (NAME_PROMPT de
+#   nouveau, au plus MAX_LOGIN_ATTEMPTS fois) ;
+# - pour reprendre une partie enregistrée, le serveur envoie TOKEN_PROMPT et
+#   le client répond par le jeton reçu à la création de la partie ;
+# - après chaque réponse, le serveur envoie PROMPT et attend la commande suivante ;
+# - la connexion est fermée après 'quit' ou à la fin du flux client ;
+# - les arrivées et départs des autres joueurs du lieu sont envoyés dès
+#   qu'ils ont lieu (voir occupancy.py).
+#
+# Avec un stockage de sessions (sessions.py), l'état de chaque joueur est
+# enregistré après chaque commande (écriture différée) et un joueur qui se
+# reconnecte sous le même nom, avec son jeton, reprend sa partie,
+# éventuellement sur un autre processus partageant le même fichier SQLite.
+
+import argparse
+import asyncio
+import hmac
+import secrets
+
+import events
+from game import Game, WORLD_SOURCE
+from metrics import Metrics, MetricsDumper
+from occupancy import occupancy_for
+from scheduler import Scheduler
+from sessions import SessionSnapshot, open_store
+from world import load_world
+
+NAME_PROMPT = "\nEntrez votre nom: "
+PROMPT = "> "
+TOKEN_PROMPT = "Jeton de reprise : "
+# Nombre de noms (ou de jetons) refusés avant de fermer la connexion
+MAX_LOGIN_ATTEMPTS = 3
+# Taille des jetons de reprise, en octets aléatoires
+TOKEN_BYTES = 8
+
+
+class SessionOutput:
+    """
+    Flux de sortie d'une session : accumule les écritures d'une commande
+    puis les envoie en un seul write sur la connexion. Les messages des
+    autres joueurs (push) sont regroupés et envoyés une fois par tour de
+    la boucle d'événements.
+    """
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.parts = []
+        self.pending = []
+        self._loop = asyncio.get_running_loop()
+
+    def write(self, text):
+        self.parts.append(text)
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def send(self, text=""):
+        self.parts.append(text)
+        if self.pending:
+            self.parts[:0] = self.pending
+            self.pending.clear()
+        self.writer.write("".join(self.parts).encode("utf-8"))
+        self.parts.clear()
+
+    def push(self, text):
+        # Message d'un autre joueur : envoyé sans attendre la prochaine
+        # commande de cette session
+        if not self.pending:
+            self._loop.call_soon(self._send_pending)
+        self.pending.append(text)
+
+    def _send_pending(self):
+        if self.pending and not self.writer.is_closing():
+            self.writer.write("".join(self.pending).encode("utf-8"))
+        self.pending.clear()
+
+
+class GameServer:
+    """
+    Serveur multi-sessions.
+
+    Attributs:
+        world (World): Le monde partagé par toutes les sessions.
+        sessions (int): Le nombre de sessions actuellement ouvertes.
+        metrics (Metrics): Mesures partagées par les sessions (None = désactivées).
+        scheduler (Scheduler): Événements du monde (météo, personnages), en
+            temps réel, exécutés en tâche de fond une fois le serveur démarré.
+        store (SessionStore): Stockage des sessions (None = parties non conservées).
+        names (set): Les noms des joueurs des sessions ouvertes (ou en cours
+            de connexion).
+    """
+
+    def __init__(self, world=None, metrics=None, with_events=True, store=None):
+        self.world = world if world is not None else load_world(WORLD_SOURCE)
+        self.sessions = 0
+        self.metrics = metrics
+        self.store = store
+        self.names = set()
+        self.scheduler = Scheduler.realtime()
+        self.npcs = events.install(self.scheduler, self.world, occupancy_for(self.world)) if with_events else []
+        self._ticker = None
+
+    async def _login(self, reader, output):
+        """
+        Demande le nom du joueur, et son jeton s'il a une partie enregistrée.
+        Retourne (nom, état enregistré ou None, jeton ou None), ou None si le
+        client abandonne. Le nom retourné est réservé dans `names`.
+        """
+        store = self.store
+        for _ in range(MAX_LOGIN_ATTEMPTS):
+            output.send(NAME_PROMPT)
+            line = await reader.readline()
+            if not line:
+                return None
+            # Nom tel que Game.setup le retiendra
+            name = line.decode("utf-8", "replace").strip() or "Joueur"
+            if name in self.names:
+                output.send("\nCe nom est déjà celui d'une partie en cours.\n")
+                continue
+            self.names.add(name)
+            try:
+                state = None
+                if store is not None:
+                    # Lecture hors de la boucle d'événements (disque, autre processus)
+                    state = await asyncio.get_running_loop().run_in_executor(None, store.load, name)
+                token = state.get("token") if state is not None else None
+                if not token:
+                    return name, state, None
+                output.send(TOKEN_PROMPT)
+                answer = await reader.readline()
+                if hmac.compare_digest(answer.strip(), token.encode("utf-8")):
+                    return name, state, token
+            except BaseException:
+                self.names.discard(name)
+                raise
+            self.names.discard(name)
+            if not answer:
+                return None
+            output.send("\nJeton invalide.\n")
+        return None
+
+    async def handle(self, reader, writer):
+        output = SessionOutput(writer)
+        game = None
+        name = None
+        self.sessions += 1
+        try:
+            login = await self._login(reader, output)
+            if login is None:
+                return
+            name, state, token = login
+            game = Game(self.world, output)
+            game.setup(name)
+            game.player.notifier = output.push
+            game.metrics = self.metrics
+            store = self.store
+            snapshot = None
+            if state is not None:
+                game.restore_state(state)
+                game.finished = False
+                print("\nPartie reprise.", file=game.output)
+            game.print_welcome()
+            if store is not None:
+                if token is None:
+                    # Nouvelle partie (ou enregistrée avant les jetons)
+                    token = secrets.token_hex(TOKEN_BYTES)
+                    print(f"\nJeton de reprise de cette partie : {token} (demandé pour la reprendre).\n",
+                          file=game.output)
+                    game.output.flush()
+                snapshot = SessionSnapshot.of(game, None, token)
+                store.save(snapshot)
+            output.send(PROMPT)
+            await writer.drain()
+
+            while not game.finished:
+                line = await reader.readline()
+                if not line:
+                    break
+                game.process_command(line.decode("utf-8", "replace"))
+                if store is not None:
+                    snapshot = SessionSnapshot.of(game, snapshot)
+                    store.save(snapshot)
+                output.send("" if game.finished else PROMPT)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            if game is not None:
+                game.close()
+            if name is not None:
+                self.names.discard(name)
+            self.sessions -= 1
+            writer.close()
+
+    async def start(self, host="127.0.0.1", port=4000, backlog=1024):
+        if self._ticker is None:
+            self._ticker = asyncio.ensure_future(self.scheduler.run_forever())
+        return await asyncio.start_server(self.handle, host, port, backlog=backlog)
+
+
+async def serve(host, port, metrics=None, max_rooms=None, check=False, sessions=None):
+    world = load_world(WORLD_SOURCE, max_rooms=max_rooms, check=check)
+    store = open_store(sessions)
+    server = await GameServer(world, metrics, store=store).start(host, port)
+    addresses = ", ".join(str(sock.getsockname()) for sock in server.sockets)
+    print(f"Serveur TBA en écoute sur {addresses}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        if store is not None:
+            store.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serveur de jeu TBA multi-sessions.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4000)
+    parser.add_argument("--metrics", help="fichier où écrire périodiquement les mesures")
+    parser.add_argument("--metrics-format", choices=["json", "prometheus"], default="prometheus")
+    parser.add_argument("--metrics-interval", type=float, default=10.0, help="période d'écriture (s)")
+    parser.add_argument("--max-rooms", type=int, help="nombre maximal de lieux chargés en mémoire (régions évincées au-delà)")
+    parser.add_argument("--sessions", help="stockage des sessions : fichier SQLite, ou 'memory'")
+    parser.add_argument("--check", action="store_true", help="vérifier la carte (validator.py) avant d'accepter des joueurs")
+    args = parser.parse_args()
+
+    metrics = dumper = None
+    if args.metrics:
+        metrics = Metrics()
+        dumper = MetricsDumper(metrics, args.metrics, args.metrics_interval, args.metrics_format).start()
+    try:
+        asyncio.run(serve(args.host, args.port, metrics, args.max_rooms, args.check, args.sessions))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if dumper is not None:
+            dumper.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,437 @@
+# Description: Session stores.
+
+# sessions.py
+# Sauvegarde des sessions de joueurs, pour les mettre de côté à la
+# déconnexion puis les reprendre (dans ce processus ou un autre) :
+# - SessionSnapshot : état d'une partie capturé par références vers l'état
+#   persistant de timeline.py ; les index stables des lieux visités (comme
+#   Game.export_state) sont tenus à jour d'une capture à la suivante, en
+#   ne parcourant que les visites ajoutées ou annulées ;
+# - MemorySessionStore : sessions gardées en mémoire (un seul processus) ;
+# - SQLiteSessionStore : fichier SQLite local, partageable entre processus.
+#   Les écritures sont différées : save() ne fait que noter le dernier état
+#   de la session, un thread d'écriture les enregistre par lots (une
+#   transaction par lot, un seul état par session). La boucle de commandes
+#   n'attend jamais le disque ; les lectures passent par un pool de connexions.
+#
+# Une session est identifiée par le nom du joueur et protégée par un jeton,
+# choisi par le serveur à sa création et demandé pour la reprendre.
+
+import abc
+import json
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from array import array
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from navigation import back_rooms, visited_rooms
+
+# Protège les tableaux de lieux visités partagés entre captures : la partie
+# les allonge, le thread d'écriture en copie le début
+_VISITED_LOCK = threading.Lock()
+
+# Nombre de connexions du pool par défaut
+POOL_SIZE = 4
+# Délai de regroupement des écritures (secondes) et taille maximale d'un lot
+WRITE_DELAY = 0.05
+BATCH_SIZE = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    name TEXT PRIMARY KEY,
+    room INTEGER NOT NULL,
+    finished INTEGER NOT NULL,
+    turn INTEGER NOT NULL,
+    visited BLOB NOT NULL,
+    back BLOB NOT NULL,
+    macros TEXT NOT NULL,
+    token TEXT NOT NULL DEFAULT ''
+)
+"""
+COLUMNS = "name, room, finished, turn, visited, back, macros, token"
+
+
+class SessionSnapshot:
+    """
+    État d'une session à un instant donné. Le lieu et l'historique sont des
+    références vers des structures immuables ; seuls les index des lieux
+    visités sont relevés, à partir de ceux de la capture précédente de la
+    même partie (`previous`) : une commande ne coûte que les visites
+    ajoutées ou annulées depuis, et le thread d'écriture n'a plus qu'à
+    copier le tableau.
+
+    Examples:
+
+    >>> import os
+    >>> from game import Game
+    >>> game = Game(output=open(os.devnull, "w"))
+    >>> game.setup("Link")
+    >>> snapshot = None
+    >>> for line in ["go E", "go D", "undo", "go S"]:
+    ...     game.process_command(line)
+    ...     snapshot = SessionSnapshot.of(game, snapshot)
+    >>> snapshot.visited_ids().tolist() == game.export_state()["visited"]
+    True
+    """
+
+    __slots__ = ("name", "state", "finished", "turn", "macros", "token", "_order", "_visited", "_count")
+
+    def __init__(self, name, state, finished, turn, macros, token="") -> None:
+        self.name = name
+        self.state = state
+        self.finished = finished
+        self.turn = turn
+        self.macros = macros
+        self.token = token
+        # Index des lieux visités : les _count premiers de _visited (tableau
+        # partagé avec les captures voisines, qui ne font que l'allonger),
+        # valables pour l'ordre de visite _order
+        self._order = None
+        self._visited = array("i")
+        self._count = 0
+
+    @classmethod
+    def of(cls, game, previous: Optional["SessionSnapshot"] = None,
+           token: Optional[str] = None) -> "SessionSnapshot":
+        """Capture de `game` ; le jeton est celui de `previous` s'il n'est pas donné."""
+        if token is None:
+            token = previous.token if previous is not None else ""
+        macros = {name: macro.text for name, macro in game.macros.items()} if game.macros else {}
+        snapshot = cls(game.player.name, game.current_state(), game.finished, game.timeline.turn, macros, token)
+        snapshot._index_visited(previous)
+        return snapshot
+
+    def _index_visited(self, previous: Optional["SessionSnapshot"]) -> None:
+        navigation = self.state.navigation
+        order, count = navigation[1], len(navigation[0])
+        self._order, self._count = order, count
+        if previous is not None:
+            visited, known = previous._visited, previous._count
+            if count < known:
+                # Visites annulées : même tableau, plus court
+                node = previous._order
+                for _ in range(known - count):
+                    node = node[1]
+                if node is order:
+                    self._visited = visited
+                    return
+            else:
+                added = []
+                node = order
+                while len(added) < count - known and node is not None:
+                    added.append(node[0].id)
+                    node = node[1]
+                if node is previous._order:
+                    if len(visited) != known:
+                        # Le tableau a été allongé pour un autre historique
+                        visited = visited[:known]
+                    with _VISITED_LOCK:
+                        visited.extend(reversed(added))
+                    self._visited = visited
+                    return
+        # Autre historique (reprise, première capture) : tout est relu
+        self._visited = array("i", (room.id for room in visited_rooms(navigation)))
+
+    def visited_ids(self) -> array:
+        """Index des lieux visités, dans l'ordre de première visite (copie)."""
+        # Lu par le thread d'écriture pendant que la partie allonge le tableau
+        with _VISITED_LOCK:
+            return self._visited[:self._count]
+
+    def to_state(self) -> dict:
+        """État au format de Game.export_state / Game.restore_state."""
+        return {
+            "name": self.name,
+            "room": self.state.room.id,
+            "visited": self.visited_ids().tolist(),
+            "back": [room.id for room in back_rooms(self.state.navigation)],
+            "finished": self.finished,
+            "turn": self.turn,
+            "macros": dict(self.macros),
+            "token": self.token,
+        }
+
+
+class SessionStore(abc.ABC):
+    """
+    Interface des stockages de sessions.
+
+    save() doit être rapide (appelé après chaque commande) ; load() peut
+    attendre un disque : le serveur l'appelle hors de la boucle d'événements.
+    """
+
+    @abc.abstractmethod
+    def save(self, snapshot: SessionSnapshot) -> None:
+        ...
+
+    @abc.abstractmethod
+    def load(self, name: str) -> Optional[dict]:
+        """
+        État de la session `name` (voir SessionSnapshot.to_state, avec son
+        jeton), None si inconnue.
+        """
+
+    @abc.abstractmethod
+    def delete(self, name: str) -> None:
+        ...
+
+    def flush(self) -> None:
+        """Attend que les écritures en attente soient faites."""
+
+    def close(self) -> None:
+        self.flush()
+
+
+class MemorySessionStore(SessionStore):
+    """
+    Sessions en mémoire, pour un seul processus.
+
+    Examples:
+
+    >>> import os
+    >>> from game import Game
+    >>> store = MemorySessionStore()
+    >>> game = Game(output=open(os.devnull, "w"))
+    >>> game.setup("Link")
+    >>> game.process_command("go E")
+    >>> store.save(SessionSnapshot.of(game))
+    >>> store.load("Link")["room"] == game.player.current_room.id, store.load("Zelda")
+    (True, None)
+    """
+
+    def __init__(self) -> None:
+        self._sessions: Dict[str, SessionSnapshot] = {}
+
+    def save(self, snapshot: SessionSnapshot) -> None:
+        self._sessions[snapshot.name] = snapshot
+
+    def load(self, name: str) -> Optional[dict]:
+        snapshot = self._sessions.get(name)
+        return snapshot.to_state() if snapshot is not None else None
+
+    def delete(self, name: str) -> None:
+        self._sessions.pop(name, None)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+class ConnectionPool:
+    """
+    Connexions SQLite partagées entre threads, créées à la demande (au plus
+    `size`) ; connection() attend qu'une connexion se libère.
+    """
+
+    def __init__(self, path: str, size: int = POOL_SIZE, timeout: float = 30.0) -> None:
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._all = []
+
+    def _connect(self) -> sqlite3.Connection:
+        # Attente d'un autre processus qui écrit : timeout ; WAL : les
+        # lectures ne bloquent pas l'écriture (et inversement)
+        connection = sqlite3.connect(self.path, timeout=self.timeout, check_same_thread=False,
+                                     isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        try:
+            connection = self._idle.get_nowait()
+        except queue.Empty:
+            connection = None
+            with self._lock:
+                if self._created < self.size:
+                    self._created += 1
+                    connection = self._connect()
+                    self._all.append(connection)
+            if connection is None:
+                connection = self._idle.get()
+        try:
+            yield connection
+        finally:
+            self._idle.put(connection)
+
+    def close(self) -> None:
+        with self._lock:
+            for connection in self._all:
+                connection.close()
+            self._all.clear()
+            self._created = 0
+        self._idle = queue.LifoQueue()
+
+
+def _pack(rooms) -> bytes:
+    values = rooms if isinstance(rooms, array) else array("i", rooms)
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values.tobytes()
+
+
+def _unpack(data: bytes) -> list:
+    values = array("i")
+    values.frombytes(data)
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values.tolist()
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Sessions dans un fichier SQLite, avec écritures différées par lots.
+
+    Attributs:
+        pool (ConnectionPool): Les connexions (lectures et écritures).
+        writes (int): Nombre d'états de session écrits.
+        batches (int): Nombre de transactions d'écriture.
+
+    Examples:
+
+    >>> import os, tempfile
+    >>> from game import Game
+    >>> store = SQLiteSessionStore(os.path.join(tempfile.mkdtemp(), "sessions.db"))
+    >>> game = Game(output=open(os.devnull, "w"))
+    >>> game.setup("Link")
+    >>> snapshot = None
+    >>> for line in ["go E", "go D", "macro aller = go U"]:
+    ...     game.process_command(line)
+    ...     snapshot = SessionSnapshot.of(game, snapshot, "3f9c")
+    ...     store.save(snapshot)
+    >>> store.flush(); store.load("Link")["macros"], store.load("Link")["token"]
+    ({'aller': 'go U'}, '3f9c')
+    >>> resumed = Game(output=open(os.devnull, "w"))
+    >>> resumed.setup("Link")
+    >>> resumed.restore_state(store.load("Link")); store.close()
+    >>> resumed.export_state() == game.export_state()
+    True
+    """
+
+    def __init__(self, path: str, pool_size: int = POOL_SIZE, delay: float = WRITE_DELAY,
+                 batch_size: int = BATCH_SIZE) -> None:
+        self.path = path
+        self.delay = delay
+        self.batch_size = batch_size
+        self.pool = ConnectionPool(path, pool_size)
+        with self.pool.connection() as connection:
+            connection.execute(SCHEMA)
+            # Fichier créé avant les jetons : sessions reprises sans jeton,
+            # qui en reçoivent un à leur prochaine reprise
+            columns = {row[1] for row in connection.execute("PRAGMA table_info(sessions)")}
+            if "token" not in columns:
+                connection.execute("ALTER TABLE sessions ADD COLUMN token TEXT NOT NULL DEFAULT ''")
+        self.writes = 0
+        self.batches = 0
+        # Derniers états à écrire, et lot en cours d'écriture (relus par load)
+        self._pending: Dict[str, SessionSnapshot] = {}
+        self._writing: Dict[str, SessionSnapshot] = {}
+        self._condition = threading.Condition()
+        self._closed = False
+        self._writer = threading.Thread(target=self._write_loop, name="session-writer", daemon=True)
+        self._writer.start()
+
+    # Écritures
+    def save(self, snapshot: SessionSnapshot) -> None:
+        with self._condition:
+            if not self._pending:
+                self._condition.notify_all()
+            self._pending[snapshot.name] = snapshot
+
+    def delete(self, name: str) -> None:
+        self.flush()
+        with self.pool.connection() as connection:
+            connection.execute("DELETE FROM sessions WHERE name = ?", (name,))
+
+    def _write_loop(self) -> None:
+        condition = self._condition
+        while True:
+            with condition:
+                condition.wait_for(lambda: self._pending or self._closed)
+                if not self._pending:
+                    return  # fermé, tout est écrit
+                # Laisse arriver d'autres états (un seul est écrit par session)
+                if self.delay and not self._closed:
+                    condition.wait_for(lambda: self._closed or len(self._pending) >= self.batch_size, self.delay)
+                self._writing, self._pending = self._pending, {}
+            failed = False
+            try:
+                self._write(self._writing.values())
+            except sqlite3.Error as error:
+                failed = True
+                print(f"Écriture des sessions en erreur : {type(error).__name__}: {error}", file=sys.stderr)
+            with condition:
+                if failed and not self._closed:
+                    # Réessayées au prochain lot, sauf si un état plus récent est arrivé
+                    for name, snapshot in self._writing.items():
+                        self._pending.setdefault(name, snapshot)
+                self._writing = {}
+                condition.notify_all()
+            if failed:
+                time.sleep(self.delay or WRITE_DELAY)
+
+    def _write(self, snapshots) -> None:
+        # Les index des lieux visités sont déjà relevés (SessionSnapshot.of) :
+        # une copie de tableau par session, la pile de retour est bornée
+        rows = [(snapshot.name, snapshot.state.room.id, int(snapshot.finished), snapshot.turn,
+                 _pack(snapshot.visited_ids()), _pack(room.id for room in back_rooms(snapshot.state.navigation)),
+                 json.dumps(snapshot.macros), snapshot.token)
+                for snapshot in snapshots]
+        with self.pool.connection() as connection:
+            connection.execute("BEGIN")
+            try:
+                connection.executemany(f"INSERT OR REPLACE INTO sessions ({COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+        self.writes += len(rows)
+        self.batches += 1
+
+    def flush(self) -> None:
+        with self._condition:
+            self._condition.notify_all()
+            self._condition.wait_for(lambda: not self._pending and not self._writing or not self._writer.is_alive())
+
+    def close(self) -> None:
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._writer.join()
+        self.pool.close()
+
+    # Lectures
+    def load(self, name: str) -> Optional[dict]:
+        with self._condition:
+            snapshot = self._pending.get(name) or self._writing.get(name)
+        if snapshot is not None:
+            return snapshot.to_state()
+        with self.pool.connection() as connection:
+            row = connection.execute(f"SELECT {COLUMNS} FROM sessions WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            return None
+        name, room, finished, turn, visited, back, macros, token = row
+        return {"name": name, "room": room, "visited": _unpack(visited), "back": _unpack(back),
+                "finished": bool(finished), "turn": turn, "macros": json.loads(macros), "token": token}
+
+    def __len__(self) -> int:
+        self.flush()
+        with self.pool.connection() as connection:
+            return connection.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+
+def open_store(spec: Optional[str]) -> Optional[SessionStore]:
+    """Stockage désigné par `spec` : None, "memory", ou chemin d'un fichier SQLite."""
+    if not spec:
+        return None
+    if spec == "memory":
+        return MemorySessionStore()
+    return SQLiteSessionStore(spec)
@@ -0,0 +1,215 @@
+# Description: Typo suggestions.
+
+# suggest.py
+# Suggestions « Vouliez-vous dire ... ? » pour les mots mal tapés, par la
+# méthode de la suppression symétrique : à la construction, chaque mot du
+# vocabulaire est indexé sous toutes les variantes obtenues en supprimant
+# jusqu'à max_distance lettres de son début (prefix_length lettres, ou du mot
+# entier si prefix_length vaut None). Un mot
+# tapé est cherché de la même façon : les candidats sont les mots qui
+# partagent une variante, seuls ceux-là sont comparés (distance d'édition avec
+# transpositions, bornée). Le coût d'une recherche dépend de la longueur du
+# mot tapé, pas de la taille du vocabulaire.
+#
+# Sur une très grande carte, les variantes de toutes les clés de lieux
+# prendraient trop de mémoire : ce sont alors les mots à une faute du mot
+# tapé qui sont cherchés directement dans le monde (KeyLookup).
+
+import string
+import weakref
+from typing import Dict, Iterable, List, Optional
+
+# Au-delà de ce nombre de lieux, les clés de lieux ne sont pas indexées (KeyLookup)
+MAX_ROOM_KEYS = 20000
+# Lettres essayées par KeyLookup (en plus de celles du mot tapé)
+KEY_ALPHABET = string.ascii_lowercase + string.digits + "_-"
+# Plage de clés comparées directement par KeyLookup
+SCAN_KEYS = 64
+
+# Les clés de lieux générées partagent souvent leur début ("surface_12_3") :
+# elles sont indexées en entier, à une faute près
+ROOM_MAX_DISTANCE = 1
+
+# Index des clés de lieux, un par monde (construit à la première faute de frappe)
+_ROOM_INDEXES = weakref.WeakKeyDictionary()
+
+
+def _deletes(word: str, max_distance: int) -> set:
+    """Variantes de `word` privées de 0 à max_distance lettres."""
+    variants = {word}
+    frontier = [word]
+    for _ in range(max_distance):
+        following = []
+        for current in frontier:
+            for i in range(len(current)):
+                variant = current[:i] + current[i + 1:]
+                if variant not in variants:
+                    variants.add(variant)
+                    following.append(variant)
+        frontier = following
+    return variants
+
+
+def distance(a: str, b: str, limit: int) -> int:
+    """
+    Distance d'édition (insertion, suppression, substitution, transposition
+    de deux lettres voisines) entre `a` et `b` ; limit + 1 si elle dépasse limit.
+
+    >>> distance("nrod", "nord", 2), distance("histroy", "history", 1), distance("go", "quit", 2)
+    (1, 1, 3)
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        best = i
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if previous2 is not None and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, previous2[j - 2] + 1)
+            current[j] = value
+            if value < best:
+                best = value
+        if best > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1] if previous[-1] <= limit else limit + 1
+
+
+class SuggestionIndex:
+    """
+    Index de suppression symétrique sur un vocabulaire.
+
+    Examples:
+
+    >>> index = SuggestionIndex(["help", "history", "quit", "go", "back", "retour"])
+    >>> index.suggest("hsitory"), index.suggest("qiut"), index.suggest("xyzzy")
+    (['history'], ['quit'], [])
+    >>> index.suggest("bac")
+    ['back']
+    >>> SuggestionIndex(["go", "gp", "up"], max_distance=1).suggest("gp", limit=2)
+    ['go', 'up']
+    """
+
+    def __init__(self, words: Iterable[str], max_distance: int = 2,
+                 prefix_length: Optional[int] = 7) -> None:
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self._words: List[str] = []
+        self._variants: Dict[str, List[int]] = {}
+        seen = set()
+        for word in words:
+            word = word.lower()
+            if word in seen:
+                continue
+            seen.add(word)
+            index = len(self._words)
+            self._words.append(word)
+            for variant in _deletes(word[:prefix_length], max_distance):
+                self._variants.setdefault(variant, []).append(index)
+
+    def __len__(self) -> int:
+        return len(self._words)
+
+    def suggest(self, word: str, limit: int = 3) -> List[str]:
+        """Mots les plus proches de `word` (au plus `limit`), du plus proche au moins proche."""
+        word = word.strip().lower()
+        if not word:
+            return []
+        max_distance = self.max_distance
+        checked = set()
+        ranked = []
+        for variant in _deletes(word[:self.prefix_length], max_distance):
+            for index in self._variants.get(variant, ()):
+                if index in checked:
+                    continue
+                checked.add(index)
+                candidate = self._words[index]
+                if candidate == word:
+                    continue
+                d = distance(word, candidate, max_distance)
+                if d <= max_distance:
+                    ranked.append((d, abs(len(candidate) - len(word)), candidate))
+        ranked.sort()
+        return [candidate for _, _, candidate in ranked[:limit]]
+
+
+class KeyLookup:
+    """
+    Suggestions de clés de lieux à une faute près, sans index. Les clés qui
+    commencent par les i premières lettres du mot tapé forment une plage
+    de l'ordre des clés (world.keys_from) : tant que cette plage est grande,
+    seuls les mots à une faute en position i (suppression, transposition,
+    substitution ou insertion d'une lettre de KEY_ALPHABET ou du mot) sont
+    cherchés par world.find ; dès qu'elle compte au plus SCAN_KEYS clés,
+    elles sont comparées directement et la recherche s'arrête. Même
+    interface que SuggestionIndex.
+
+    Examples:
+
+    >>> from compact import CompactWorld
+    >>> world = CompactWorld.from_source({"rooms": {key: {"name": key} for key in ["hebra", "hyrule", "zora"]}})
+    >>> KeyLookup(world).suggest("hbera"), KeyLookup(world).suggest("zoras"), KeyLookup(world).suggest("hebra")
+    (['hebra'], ['zora'], [])
+    >>> keys = [f"lieu_{i}" for i in range(200)]
+    >>> world = CompactWorld.from_source({"rooms": {key: {"name": key} for key in keys}})
+    >>> KeyLookup(world).suggest("lieu_1x5"), KeyLookup(world).suggest("leiu_42"), KeyLookup(world).suggest("lieu_1999")
+    (['lieu_105', 'lieu_115', 'lieu_125'], ['lieu_42'], ['lieu_199'])
+    """
+
+    def __init__(self, world) -> None:
+        # Référence faible : le monde est la clé de _ROOM_INDEXES
+        self._world = weakref.ref(world)
+
+    def __len__(self) -> int:
+        return len(self._world())
+
+    def suggest(self, word: str, limit: int = 3) -> List[str]:
+        word = word.strip().lower()
+        if not word:
+            return []
+        world = self._world()
+        letters = sorted(set(KEY_ALPHABET) | set(word))
+        found = set()
+        for i in range(len(word) + 1):
+            prefix = word[:i]
+            keys = [key for key in world.keys_from(prefix, SCAN_KEYS + 1) if key.startswith(prefix)]
+            if len(keys) <= SCAN_KEYS:
+                # Toutes les clés à une faute modifiées en position >= i sont là
+                found.update(key for key in keys if key != word and distance(word, key, 1) <= 1)
+                break
+            variants = {prefix + letter + word[i:] for letter in letters}
+            if i < len(word):
+                variants.add(prefix + word[i + 1:])
+                variants.update(prefix + letter + word[i + 1:] for letter in letters)
+            if i < len(word) - 1:
+                variants.add(prefix + word[i + 1] + word[i] + word[i + 2:])
+            variants.discard(word)
+            found.update(variant for variant in variants if world.find(variant) is not None)
+        ranked = sorted((abs(len(key) - len(word)), key) for key in found)
+        return [key for _, key in ranked[:limit]]
+
+
+def room_suggestions(world):
+    """
+    Suggestions partagées des clés des lieux de `world` : SuggestionIndex,
+    ou KeyLookup au-delà de MAX_ROOM_KEYS lieux.
+    """
+    index = _ROOM_INDEXES.get(world)
+    if index is None:
+        if len(world) <= MAX_ROOM_KEYS:
+            index = SuggestionIndex((world.key(i) for i in range(len(world))), ROOM_MAX_DISTANCE, None)
+        else:
+            index = KeyLookup(world)
+        _ROOM_INDEXES[world] = index
+    return index
+
+
+def did_you_mean(suggestions: List[str]) -> str:
+    """Fin de message proposant les suggestions (chaîne vide s'il n'y en a pas)."""
+    if not suggestions:
+        return ""
+    return f" Vouliez-vous dire : {', '.join(suggestions)} ?"
@@ -0,0 +1,142 @@
+# Description: Game timeline.
+
+# timeline.py
+# Versions successives de l'état d'une partie, pour les commandes undo, redo
+# et rewind. Un état (GameState) ne contient que des références : le lieu du
+# joueur et l'état persistant de son historique (navigation.py), qui partage
+# sa structure avec les versions voisines. Enregistrer une version, revenir
+# en arrière, rétablir ou sauter à un tour quelconque coûte O(1), sans copie.
+#
+# Les versions sont numérotées par tour (0 = début de la partie). Seules les
+# max_versions dernières sont gardées : la mémoire reste bornée pour une
+# session de plusieurs dizaines de milliers de tours.
+
+from typing import List, Optional
+
+# Nombre de versions conservées par défaut
+MAX_VERSIONS = 5000
+
+
+class GameState:
+    """État d'une partie à un tour donné (immuable)."""
+
+    __slots__ = ("room", "navigation")
+
+    def __init__(self, room, navigation) -> None:
+        self.room = room
+        self.navigation = navigation
+
+    def same_as(self, other: Optional["GameState"]) -> bool:
+        return other is not None and self.room is other.room and self.navigation is other.navigation
+
+
+class Timeline:
+    """
+    Versions d'une partie, avec annulation et rétablissement.
+
+    Attributs
+    ---------
+    turn : int
+        Tour de la version courante.
+    first_turn, last_turn : int
+        Tours de la plus ancienne et de la plus récente version conservées.
+
+    Exemples
+    --------
+    >>> timeline = Timeline(max_versions=3)
+    >>> timeline.reset(GameState("a", ()))
+    >>> for room in "bcde":
+    ...     _ = timeline.commit(GameState(room, ()))
+    >>> timeline.first_turn, timeline.last_turn
+    (2, 4)
+    >>> timeline.undo().room, timeline.undo().room, timeline.undo()
+    ('d', 'c', None)
+    >>> timeline.redo().room, timeline.goto(4).room, timeline.goto(1)
+    ('d', 'e', None)
+    >>> timeline.version(3).room, timeline.turn
+    ('d', 4)
+    >>> timeline.goto(2).room, timeline.commit(GameState("x", ())), timeline.redo()
+    ('c', True, None)
+    >>> timeline.turn, timeline.last_turn
+    (3, 3)
+    """
+
+    def __init__(self, max_versions: int = MAX_VERSIONS) -> None:
+        self.max_versions = max(1, max_versions)
+        self._versions: List[GameState] = []
+        # Tour de _versions[0] et position de la version courante
+        self._first = 0
+        self._index = -1
+
+    @property
+    def turn(self) -> int:
+        return self._first + self._index
+
+    @property
+    def first_turn(self) -> int:
+        return self._first + self._oldest()
+
+    @property
+    def last_turn(self) -> int:
+        return self._first + len(self._versions) - 1
+
+    @property
+    def current(self) -> Optional[GameState]:
+        return self._versions[self._index] if self._versions else None
+
+    def reset(self, state: GameState, turn: int = 0) -> None:
+        """Oublie toutes les versions ; `state` devient la version du tour `turn`."""
+        self._versions = [state]
+        self._first = turn
+        self._index = 0
+
+    def commit(self, state: GameState) -> bool:
+        """
+        Enregistre l'état atteint après une commande, s'il a changé ; les
+        versions annulées (à rétablir) sont alors abandonnées. Retourne True
+        si une version a été ajoutée.
+        """
+        if state.same_as(self.current):
+            return False
+        versions = self._versions
+        if self._index + 1 < len(versions):
+            del versions[self._index + 1:]
+        versions.append(state)
+        self._index += 1
+        # Les versions les plus anciennes sont oubliées par lots (coût amorti
+        # constant), la liste ne dépasse pas 1,25 fois max_versions
+        excess = len(versions) - self.max_versions
+        if excess > self.max_versions // 4:
+            del versions[:excess]
+            self._first += excess
+            self._index -= excess
+        return True
+
+    def _oldest(self) -> int:
+        # Position de la plus ancienne version accessible
+        return max(0, len(self._versions) - self.max_versions)
+
+    def undo(self, steps: int = 1) -> Optional[GameState]:
+        """Recule de `steps` versions ; None (sans rien changer) si impossible."""
+        return self._move_to(self._index - steps)
+
+    def redo(self, steps: int = 1) -> Optional[GameState]:
+        """Avance de `steps` versions annulées ; None si impossible."""
+        return self._move_to(self._index + steps)
+
+    def goto(self, turn: int) -> Optional[GameState]:
+        """Version du tour `turn`, qui devient courante ; None si elle n'est plus (ou pas) conservée."""
+        return self._move_to(turn - self._first)
+
+    def version(self, turn: int) -> Optional[GameState]:
+        """Version du tour `turn`, sans la rendre courante ; None si elle n'est pas conservée."""
+        index = turn - self._first
+        if not self._oldest() <= index < len(self._versions):
+            return None
+        return self._versions[index]
+
+    def _move_to(self, index: int) -> Optional[GameState]:
+        if index == self._index or not self._oldest() <= index < len(self._versions):
+            return None
+        self._index = index
+        return self._versions[index]
@@ -0,0 +1,286 @@
+# Description: World validator.
+
+# validator.py
+# Vérification du graphe des sorties d'un monde, en O(V + E) :
+# - composantes fortement connexes (Tarjan, version itérative) ;
+# - lieux inaccessibles depuis le lieu de départ ;
+# - lieux « pièges » : accessibles, mais d'où l'on ne peut plus revenir au
+#   départ (hors de la composante du lieu de départ) ;
+# - impasses (lieux sans aucune sortie) ;
+# - sorties asymétriques (A --N--> B sans B --S--> A) ;
+# - directions jamais utilisées.
+# Les résultats volumineux sont gardés dans des array (lieux, ou sorties
+# codées source * 8 + index de direction comme dans world_compiler), ce qui
+# permet de valider une carte d'un million de lieux en quelques secondes.
+#
+# Utilisation : python validator.py hyrule.json (ou un fichier .world)
+
+import argparse
+import itertools
+import os
+import sys
+from array import array
+from operator import and_, ne
+from typing import List, Optional, Tuple
+
+from world_compiler import DIRECTION_INDEX, DIRECTIONS, OPPOSITE
+
+# Nombre d'exemples affichés par catégorie dans le résumé
+LIMIT = 10
+
+_WIDTH = len(DIRECTIONS)
+_OPPOSITE_INDEX = [DIRECTION_INDEX[OPPOSITE[d]] for d in DIRECTIONS]
+
+
+def _exit_table(world) -> array:
+    # Sorties, 6 cases par lieu ; les mondes sans lecture groupée passent par exit_index
+    exit_table = getattr(world, "exit_table", None)
+    if exit_table is not None:
+        return exit_table()
+    return array("i", (world.exit_index(i, d) for i in range(len(world)) for d in DIRECTIONS))
+
+
+def strongly_connected_components(exits: array, start: int = 0) -> Tuple[array, int]:
+    """
+    Composantes fortement connexes (algorithme de Tarjan sans récursion) du
+    graphe des sorties `exits` (6 cases par lieu, -1 si aucune sortie).
+
+    Retourne (composante de chaque lieu, nombre de composantes). Les
+    composantes sont numérotées dans l'ordre où Tarjan les termine (ordre
+    topologique inverse) ; le parcours commençant par le lieu `start`, un lieu
+    est accessible depuis `start` si et seulement si le numéro de sa
+    composante est inférieur ou égal à celui de `start`.
+
+    >>> exits = array("i", [1, -1, -1, -1, -1, -1,  0, -1, -1, -1, -1, 2,
+    ...                     -1, -1, -1, -1, -1, -1,  -1, 2, -1, -1, -1, -1])
+    >>> components, n = strongly_connected_components(exits)
+    >>> list(components), n
+    ([1, 1, 0, 2], 3)
+    """
+    count = len(exits) // _WIDTH
+    # Rang de découverte de chaque lieu (-1 : pas encore atteint)
+    order = array("i", [-1]) * count
+    low = array("i", [0]) * count
+    components = array("i", [-1]) * count
+    on_stack = bytearray(count)
+    stack = []
+    counter = 0
+    component_count = 0
+    roots = range(count)
+    if count:
+        roots = itertools.chain((start,), roots)
+    for root in roots:
+        if order[root] >= 0:
+            continue
+        order[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = 1
+        # Pile d'appels simulée : lieu et position de la prochaine sortie à suivre
+        path = [root]
+        positions = [root * _WIDTH]
+        while path:
+            node = path[-1]
+            position = positions[-1]
+            end = node * _WIDTH + _WIDTH
+            while position < end:
+                target = exits[position]
+                position += 1
+                if target < 0:
+                    continue
+                if order[target] < 0:
+                    positions[-1] = position
+                    order[target] = low[target] = counter
+                    counter += 1
+                    stack.append(target)
+                    on_stack[target] = 1
+                    path.append(target)
+                    positions.append(target * _WIDTH)
+                    break
+                if on_stack[target] and order[target] < low[node]:
+                    low[node] = order[target]
+            else:
+                # Toutes les sorties de `node` sont traitées
+                path.pop()
+                positions.pop()
+                if low[node] == order[node]:
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = 0
+                        components[member] = component_count
+                        if member == node:
+                            break
+                    component_count += 1
+                if path and low[node] < low[path[-1]]:
+                    low[path[-1]] = low[node]
+    return components, component_count
+
+
+class ValidationReport:
+    """
+    Résultat de validate().
+
+    Attributs
+    ---------
+    rooms, exits : int
+        Nombre de lieux et de sorties.
+    components : int
+        Nombre de composantes fortement connexes.
+    component_of : array
+        Composante de chaque lieu.
+    largest_component : int
+        Taille de la plus grande composante.
+    unreachable, trapped, dead_ends : array
+        Lieux inaccessibles depuis le départ ; lieux accessibles d'où l'on ne
+        peut pas revenir au départ ; lieux sans sortie.
+    asymmetric : array
+        Sorties sans retour, codées source * 8 + index de direction.
+    unused_directions : List[str]
+        Directions qu'aucune sortie n'utilise.
+    direction_counts : Dict[str, int]
+        Nombre de sorties par direction.
+    """
+
+    def __init__(self, rooms: int, start: int) -> None:
+        self.rooms = rooms
+        self.start = start
+        self.exits = 0
+        self.components = 0
+        self.component_of = array("i")
+        self.largest_component = 0
+        self.unreachable = array("I")
+        self.trapped = array("I")
+        self.dead_ends = array("I")
+        self.asymmetric = array("I")
+        self.unused_directions: List[str] = []
+        self.direction_counts = dict.fromkeys(DIRECTIONS, 0)
+
+    @property
+    def ok(self) -> bool:
+        """Vrai si tous les lieux sont accessibles et qu'on peut toujours revenir au départ."""
+        return not self.unreachable and not self.trapped
+
+    def asymmetric_exits(self, limit: Optional[int] = None) -> List[Tuple[int, str]]:
+        """Sorties sans retour : liste de (lieu source, direction)."""
+        codes = self.asymmetric if limit is None else self.asymmetric[:limit]
+        return [(code >> 3, DIRECTIONS[code & 7]) for code in codes]
+
+    def summary(self, world=None, limit: int = LIMIT) -> List[str]:
+        """Résumé lisible (une ligne par constat) ; les lieux sont nommés par leur clé si `world` est fourni."""
+        def name(index):
+            return world.key(index) if world is not None else str(index)
+
+        def examples(indexes):
+            shown = ", ".join(name(i) for i in indexes[:limit])
+            return shown + (", ..." if len(indexes) > limit else "")
+
+        lines = [
+            f"{self.rooms} lieux, {self.exits} sorties, {self.components} composantes fortement connexes "
+            f"(la plus grande : {self.largest_component} lieux)."
+        ]
+        if self.unreachable:
+            lines.append(f"{len(self.unreachable)} lieux inaccessibles depuis le départ : {examples(self.unreachable)}")
+        if self.trapped:
+            lines.append(f"{len(self.trapped)} lieux sans retour possible vers le départ : {examples(self.trapped)}")
+        if self.dead_ends:
+            lines.append(f"{len(self.dead_ends)} impasses (aucune sortie) : {examples(self.dead_ends)}")
+        if self.asymmetric:
+            shown = ", ".join(f"{name(source)} {direction}" for source, direction in self.asymmetric_exits(limit))
+            more = ", ..." if len(self.asymmetric) > limit else ""
+            lines.append(f"{len(self.asymmetric)} sorties sans retour : {shown}{more}")
+        if self.unused_directions:
+            lines.append(f"Directions jamais utilisées : {', '.join(self.unused_directions)}")
+        return lines
+
+
+def validate(world) -> ValidationReport:
+    """
+    Vérifie le graphe des sorties de `world` (world.World ou
+    compact.CompactWorld, modifications en cours de partie comprises).
+
+    Examples:
+
+    >>> from compact import CompactWorld
+    >>> world = CompactWorld.from_source({"start": "a", "rooms": {
+    ...     "a": {"name": "A", "exits": {"E": "b", "U": "c"}},
+    ...     "b": {"name": "B", "exits": {"O": "a"}},
+    ...     "c": {"name": "C", "exits": {}},
+    ...     "d": {"name": "D", "exits": {"N": "a"}}}})
+    >>> report = validate(world)
+    >>> report.ok, report.components, list(report.unreachable), list(report.trapped)
+    (False, 3, [3], [2])
+    >>> report.asymmetric_exits(), report.unused_directions
+    ([(0, 'U'), (3, 'N')], ['S', 'D'])
+    >>> report.summary(world)[1]
+    '1 lieux inaccessibles depuis le départ : d'
+    """
+    count = len(world)
+    report = ValidationReport(count, world.start)
+    if not count:
+        return report
+    exits = _exit_table(world)
+    rooms = range(count)
+    columns = [exits[d::_WIDTH] for d in range(_WIDTH)]
+    for direction, column in zip(DIRECTIONS, columns):
+        report.direction_counts[direction] = count - column.count(-1)
+    report.exits = sum(report.direction_counts.values())
+    report.unused_directions = [d for d in DIRECTIONS if not report.direction_counts[d]]
+
+    components, report.components = strongly_connected_components(exits, world.start)
+    report.component_of = components
+    sizes = array("I", bytes(4 * report.components))
+    for component in components:
+        sizes[component] += 1
+    report.largest_component = max(sizes)
+
+    # Composantes numérotées après celle du départ : inaccessibles ; avant :
+    # accessibles, mais sans retour possible
+    home = components[world.start]
+    report.unreachable.extend(itertools.compress(rooms, map(home.__lt__, components)))
+    report.trapped.extend(itertools.compress(rooms, map(home.__gt__, components)))
+
+    # Impasses : lieux dont les 6 sorties valent -1 (filtrés direction par direction)
+    dead_ends = rooms
+    for column in columns:
+        dead_ends = list(itertools.compress(dead_ends, map((-1).__eq__, map(column.__getitem__, dead_ends))))
+    report.dead_ends.extend(dead_ends)
+
+    # Sorties sans retour : la sortie opposée de la cible ne ramène pas à la source
+    asymmetric = []
+    for d, column in enumerate(columns):
+        back = columns[_OPPOSITE_INDEX[d]]
+        # back[-1] pour les sorties absentes : écarté par le filtre `column != -1`
+        mismatched = map(ne, map(back.__getitem__, column), rooms)
+        for source in itertools.compress(rooms, map(and_, map((-1).__ne__, column), mismatched)):
+            asymmetric.append(source * 8 + d)
+    asymmetric.sort()
+    report.asymmetric = array("I", asymmetric)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Vérifie la carte d'un monde TBA (connexité, sorties, impasses).")
+    parser.add_argument("path", help="carte JSON ou monde compilé (.world)")
+    parser.add_argument("--limit", type=int, default=LIMIT, help="nombre d'exemples affichés par constat")
+    parser.add_argument("--strict", action="store_true",
+                        help="échoue aussi pour les impasses et les sorties sans retour")
+    args = parser.parse_args(argv)
+
+    from world import World, load_world
+
+    if os.path.splitext(args.path)[1] == ".world":
+        world = World(args.path)
+    else:
+        world = load_world(args.path)
+    try:
+        report = validate(world)
+        for line in report.summary(world, args.limit):
+            print(line)
+    finally:
+        world.close()
+    failed = not report.ok or (args.strict and (report.dead_ends or report.asymmetric))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,402 @@
+# Description: World class.
+
+# world.py
+# Monde compilé par world_compiler, ouvert avec mmap. Les objets Room ne sont
+# créés qu'au premier accès : le temps de démarrage et la mémoire résidente ne
+# dépendent pas de la taille de la carte, seulement des lieux visités.
+#
+# Les lieux chargés sont regroupés par région (surface, îles célestes,
+# profondeurs, ou blocs d'une carte générée). Avec un budget `max_rooms`, les
+# régions les moins récemment parcourues (toutes sessions confondues) sont
+# évincées dès que le nombre de lieux chargés le dépasse ; la région la plus
+# récemment parcourue ne l'est jamais.
+
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import sys
+import weakref
+from array import array
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from typing import Dict, Iterator, List, Optional
+
+from room import Room
+from world_compiler import (
+    DIRECTIONS,
+    DIRECTION_INDEX,
+    HEADER,
+    INDEX_ENTRY,
+    MAGIC,
+    RECORD,
+    REGION_ENTRY,
+    REGION_ID,
+    VERSION,
+    compile_file,
+)
+
+# Lecture d'une seule sortie dans un enregistrement.
+_EXIT = struct.Struct("<i")
+# Deux offsets consécutifs de l'index des sorties entrantes
+_RANGE = struct.Struct("<II")
+# Offset et longueur de la clé dans un enregistrement (après les six sorties)
+_KEY = struct.Struct("<II")
+_KEY_OFFSET = 6 * _EXIT.size
+
+
+class World:
+    """
+    Monde en lecture seule adossé à un fichier compilé.
+
+    Attributs
+    ---------
+    path : str
+        Chemin du fichier compilé.
+    start : int
+        Index du lieu de départ.
+    valid_directions : set
+        Directions utilisées par au moins une sortie de la carte.
+    max_rooms : Optional[int]
+        Nombre de lieux chargés au-delà duquel les régions les moins
+        récemment parcourues sont évincées (None = aucune limite).
+    evictions : int
+        Nombre de régions évincées depuis l'ouverture.
+
+    Les lieux sont identifiés par leur index (0 .. len(world) - 1), stable
+    pour un fichier donné. Les sorties modifiées en cours de partie sont
+    conservées dans une table de surcharges, sans toucher au fichier : un
+    lieu évincé puis rechargé les retrouve. Un lieu évincé mais encore
+    référencé (joueur, historique) reste le même objet à son retour.
+    """
+
+    def __init__(self, path: str, max_rooms: Optional[int] = None) -> None:
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, region_count, count, start, *counts = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self._mm.close()
+            raise ValueError(f"Fichier de monde invalide ou obsolète : {path}")
+        self._count = count
+        self.start = start
+        self.direction_counts = dict(zip(DIRECTIONS, counts))
+        self.valid_directions = {d for d, n in self.direction_counts.items() if n}
+        self._index_offset = HEADER.size + count * RECORD.size
+        self._incoming_offset = self._index_offset + count * INDEX_ENTRY.size
+        edges = sum(counts)
+        regions_offset = self._incoming_offset + (count + 1 + edges) * INDEX_ENTRY.size
+        region_ids_offset = regions_offset + region_count * REGION_ENTRY.size
+        self._strings_offset = region_ids_offset + (count + count % 2) * REGION_ID.size
+        # Région de chaque lieu, lue directement dans le fichier (copiée
+        # seulement sur une machine big-endian)
+        region_ids = memoryview(self._mm)[region_ids_offset:self._strings_offset]
+        if sys.byteorder == "little":
+            self._region_ids = region_ids.cast("H")
+        else:
+            self._region_ids = array("H", region_ids)
+            self._region_ids.byteswap()
+            region_ids.release()
+        self._region_names = [
+            self._string(*REGION_ENTRY.unpack_from(self._mm, regions_offset + i * REGION_ENTRY.size))
+            for i in range(region_count)
+        ]
+        self.max_rooms = max_rooms
+        self.evictions = 0
+        # Lieux chargés, et index des lieux chargés de chaque région, de la
+        # moins récemment parcourue à la plus récente
+        self._rooms: Dict[int, Room] = {}
+        self._chunks: "OrderedDict[int, List[int]]" = OrderedDict()
+        self._recent = -1
+        # Lieux évincés encore référencés ailleurs
+        self._evicted = weakref.WeakValueDictionary()
+        self._overrides: Dict[int, Dict[str, int]] = {}
+        # Fonctions appelées à chaque modification de sortie :
+        # listener(index, direction, ancienne cible, nouvelle cible)
+        self.exit_listeners = []
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self) -> None:
+        self._rooms.clear()
+        self._chunks.clear()
+        if isinstance(self._region_ids, memoryview):
+            self._region_ids.release()
+        self._mm.close()
+
+    # Lecture brute du fichier
+    def _record(self, index: int):
+        if not 0 <= index < self._count:
+            raise IndexError(f"Lieu inexistant : {index}")
+        return RECORD.unpack_from(self._mm, HEADER.size + index * RECORD.size)
+
+    def _string(self, offset: int, length: int) -> str:
+        start = self._strings_offset + offset
+        return self._mm[start:start + length].decode("utf-8")
+
+    def key(self, index: int) -> str:
+        """Retourne la clé déclarative du lieu (ex : 'hebra')."""
+        record = self._record(index)
+        return self._string(record[6], record[7])
+
+    def name(self, index: int) -> str:
+        record = self._record(index)
+        return self._string(record[8], record[9])
+
+    def description(self, index: int) -> str:
+        record = self._record(index)
+        return self._string(record[10], record[11])
+
+    def region(self, index: int) -> str:
+        """Retourne le nom de la région du lieu (ex : 'ciel')."""
+        if not 0 <= index < self._count:
+            raise IndexError(f"Lieu inexistant : {index}")
+        return self._region_names[self._region_ids[index]]
+
+    def regions(self) -> List[str]:
+        """Noms des régions de la carte."""
+        return list(self._region_names)
+
+    def _sorted_key(self, position: int) -> bytes:
+        # Clé (encodée) du lieu de rang `position` dans l'ordre des clés ;
+        # l'ordre des octets UTF-8 est celui des chaînes
+        index = INDEX_ENTRY.unpack_from(self._mm, self._index_offset + position * INDEX_ENTRY.size)[0]
+        offset, length = _KEY.unpack_from(self._mm, HEADER.size + index * RECORD.size + _KEY_OFFSET)
+        start = self._strings_offset + offset
+        return self._mm[start:start + length]
+
+    def _lower_bound(self, key: bytes) -> int:
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._sorted_key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def find(self, key: str) -> Optional[int]:
+        """Recherche dichotomique d'un lieu par sa clé ; None si absent."""
+        encoded = key.encode("utf-8")
+        position = self._lower_bound(encoded)
+        if position < self._count and self._sorted_key(position) == encoded:
+            return INDEX_ENTRY.unpack_from(self._mm, self._index_offset + position * INDEX_ENTRY.size)[0]
+        return None
+
+    def keys_from(self, start: str, limit: int) -> List[str]:
+        """Au plus `limit` clés, dans l'ordre, à partir de la première >= `start`."""
+        position = self._lower_bound(start.encode("utf-8"))
+        end = min(position + limit, self._count)
+        return [self._sorted_key(p).decode("utf-8") for p in range(position, end)]
+
+    # Sorties
+    def exit_index(self, index: int, direction: str) -> int:
+        """Retourne l'index du lieu atteint par `direction`, -1 si aucun."""
+        d = DIRECTION_INDEX.get(direction)
+        if d is None:
+            return -1
+        override = self._overrides.get(index)
+        if override is not None and direction in override:
+            return override[direction]
+        if not 0 <= index < self._count:
+            raise IndexError(f"Lieu inexistant : {index}")
+        return _EXIT.unpack_from(self._mm, HEADER.size + index * RECORD.size + 4 * d)[0]
+
+    def set_exit(self, index: int, direction: str, target: int) -> None:
+        """Modifie une sortie en mémoire (-1 pour la supprimer)."""
+        if direction not in DIRECTION_INDEX:
+            raise ValueError(f"Direction inconnue : '{direction}'")
+        old = self.exit_index(index, direction)
+        if old == target:
+            return
+        self._overrides.setdefault(index, {})[direction] = target
+        room = self._loaded(index)
+        if room is not None:
+            room.invalidate()
+        for listener in self.exit_listeners:
+            listener(index, direction, old, target)
+
+    def exit_table(self) -> array:
+        """
+        Toutes les sorties dans un array('i') de 6 cases par lieu (une par
+        direction, dans l'ordre de DIRECTIONS, -1 si aucune sortie), comme
+        compact.CompactWorld. Modifications faites en cours de partie comprises.
+        """
+        width = len(DIRECTIONS)
+        stride = RECORD.size // 4
+        table = array("i", bytes(4 * width * self._count))
+        # Lecture par blocs d'enregistrements, pour ne pas copier tout le fichier
+        step = 1 << 16
+        for first in range(0, self._count, step):
+            last = min(self._count, first + step)
+            records = array("i", self._mm[HEADER.size + first * RECORD.size:HEADER.size + last * RECORD.size])
+            if sys.byteorder != "little":
+                records.byteswap()
+            for d in range(width):
+                table[first * width + d:last * width:width] = records[d::stride]
+        for index, override in self._overrides.items():
+            for direction, target in override.items():
+                table[index * width + DIRECTION_INDEX[direction]] = target
+        return table
+
+    def base_incoming(self, index: int):
+        """
+        Sorties menant à `index` dans le fichier compilé (sans les
+        modifications faites en cours de partie) : liste de (source, direction).
+        """
+        if not 0 <= index < self._count:
+            raise IndexError(f"Lieu inexistant : {index}")
+        base = self._incoming_offset
+        first, last = _RANGE.unpack_from(self._mm, base + index * INDEX_ENTRY.size)
+        entries = base + (self._count + 1) * INDEX_ENTRY.size
+        codes = struct.unpack_from(f"<{last - first}I", self._mm, entries + first * INDEX_ENTRY.size)
+        return [(code >> 3, DIRECTIONS[code & 7]) for code in codes]
+
+    # Lieux
+    def room(self, index: int) -> Room:
+        """
+        Retourne le lieu `index`, en le créant au premier accès. La région du
+        lieu devient la plus récemment parcourue (elle est chargée si besoin).
+        """
+        room = self._rooms.get(index)
+        if room is None:
+            return self._load(index)
+        self.touch(index)
+        return room
+
+    def touch(self, index: int) -> None:
+        """
+        Rend la région du lieu `index` (s'il est chargé) la plus récemment
+        parcourue : appelé pour le lieu du joueur après chaque commande, pour
+        qu'il ne soit jamais le premier évincé.
+        """
+        if index not in self._rooms:
+            return
+        region = self._region_ids[index]
+        if region != self._recent:
+            self._chunks.move_to_end(region)
+            self._recent = region
+
+    def _load(self, index: int) -> Room:
+        room = self._evicted.pop(index, None)
+        if room is None:
+            record = self._record(index)
+            room = Room(self._string(record[8], record[9]), self._string(record[10], record[11]), room_id=index)
+            room.exits = _LazyExits(self, index)
+        region = self._region_ids[index]
+        chunk = self._chunks.get(region)
+        if chunk is None:
+            chunk = self._chunks[region] = []
+        else:
+            self._chunks.move_to_end(region)
+        self._recent = region
+        self._rooms[index] = room
+        chunk.append(index)
+        if self.max_rooms is not None and len(self._rooms) > self.max_rooms:
+            self._evict()
+        return room
+
+    def _evict(self) -> None:
+        # Évince les régions les moins récemment parcourues, sauf la plus récente
+        while len(self._rooms) > self.max_rooms and len(self._chunks) > 1:
+            _, chunk = self._chunks.popitem(last=False)
+            for index in chunk:
+                self._evicted[index] = self._rooms.pop(index)
+            self.evictions += 1
+
+    def _loaded(self, index: int) -> Optional[Room]:
+        # Objet Room existant du lieu `index` (chargé, ou évincé mais encore référencé)
+        room = self._rooms.get(index)
+        return room if room is not None else self._evicted.get(index)
+
+    def loaded_rooms(self) -> int:
+        """Nombre de lieux actuellement matérialisés en objets Room."""
+        return len(self._rooms)
+
+    def loaded_regions(self) -> int:
+        """Nombre de régions ayant au moins un lieu chargé."""
+        return len(self._chunks)
+
+
+class _LazyExits(MutableMapping):
+    """Vue dictionnaire des sorties d'un lieu du monde, résolue à la demande."""
+
+    __slots__ = ("_world", "_index")
+
+    def __init__(self, world: World, index: int) -> None:
+        self._world = world
+        self._index = index
+
+    def __getitem__(self, direction: str) -> Room:
+        target = self._world.exit_index(self._index, direction)
+        if target < 0:
+            raise KeyError(direction)
+        return self._world.room(target)
+
+    def __setitem__(self, direction: str, room: Optional[Room]) -> None:
+        if room is None:
+            self._world.set_exit(self._index, direction, -1)
+        elif room.id is None or self._world._loaded(room.id) is not room:
+            raise ValueError("La sortie doit mener à un lieu du même monde.")
+        else:
+            self._world.set_exit(self._index, direction, room.id)
+
+    def __delitem__(self, direction: str) -> None:
+        if self._world.exit_index(self._index, direction) < 0:
+            raise KeyError(direction)
+        self._world.set_exit(self._index, direction, -1)
+
+    def __iter__(self) -> Iterator[str]:
+        for direction in DIRECTIONS:
+            if self._world.exit_index(self._index, direction) >= 0:
+                yield direction
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def directions(self) -> List[str]:
+        """Directions ayant une sortie (les lieux voisins ne sont pas chargés)."""
+        return list(self)
+
+
+def load_world(source_path: str, path: Optional[str] = None, compact: bool = False,
+               max_rooms: Optional[int] = None, check: bool = False):
+    """
+    Ouvre le monde compilé associé à la carte `source_path`.
+
+    Le fichier compilé (par défaut à côté de la carte, extension .world) est
+    (re)généré s'il est absent, plus ancien que la carte ou d'un format obsolète.
+    Avec compact=True, le monde est entièrement chargé en mémoire sous forme
+    compacte (compact.CompactWorld) au lieu d'être lu à la demande ; sinon,
+    max_rooms borne le nombre de lieux chargés (voir World). Avec check=True,
+    la carte est vérifiée (validator.validate) : ValueError si des lieux sont
+    inaccessibles depuis le départ ou sans retour possible.
+    """
+    if compact:
+        from compact import CompactWorld
+
+        world = load_world(source_path, path, check=check)
+        try:
+            return CompactWorld.from_world(world)
+        finally:
+            world.close()
+    if path is None:
+        path = os.path.splitext(source_path)[0] + ".world"
+    if not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(source_path):
+        compile_file(source_path, path)
+    try:
+        world = World(path, max_rooms)
+    except ValueError:
+        compile_file(source_path, path)
+        world = World(path, max_rooms)
+    if check:
+        from validator import validate
+
+        report = validate(world)
+        if not report.ok:
+            summary = "\n".join(report.summary(world))
+            world.close()
+            raise ValueError(f"Carte invalide ({source_path}) :\n{summary}")
+    return world
@@ -0,0 +1,221 @@
+# Description: World compiler.
+
+# world_compiler.py
+# Transforme une carte déclarative (JSON : lieux, descriptions, sorties) en un
+# fichier binaire compact, lu ensuite par world.World via mmap.
+#
+# Format du fichier (little-endian) :
+# - en-tête HEADER : magic, version, nombre de régions, nombre de lieux, lieu
+#   de départ et nombre de sorties par direction (dans l'ordre de DIRECTIONS) ;
+# - table des lieux : un enregistrement RECORD de taille fixe par lieu
+#   (6 sorties en index de lieu, -1 si aucune, puis offset/longueur de la clé,
+#   du nom et de la description dans la table des chaînes) ;
+# - index des clés : les index des lieux triés par clé (recherche dichotomique) ;
+# - sorties entrantes (CSR) : n + 1 offsets puis, pour chaque lieu cible, les
+#   sorties qui y mènent, codées source * 8 + index de direction ;
+# - régions : offset/longueur du nom de chaque région (REGION_ENTRY), puis la
+#   région de chaque lieu (REGION_ID, complété à un multiple de 4 octets) ;
+# - table des chaînes : toutes les chaînes encodées en UTF-8, bout à bout.
+
+from __future__ import annotations
+
+import json
+import os
+from array import array
+import shutil
+import struct
+import sys
+import tempfile
+from typing import Dict, Iterable, Mapping, Tuple
+
+DIRECTIONS = ("N", "E", "S", "O", "U", "D")
+DIRECTION_INDEX = {d: i for i, d in enumerate(DIRECTIONS)}
+OPPOSITE = {"N": "S", "S": "N", "E": "O", "O": "E", "U": "D", "D": "U"}
+
+MAGIC = b"TBAW"
+VERSION = 3
+HEADER = struct.Struct("<4sHHII6I")
+RECORD = struct.Struct("<6i6I")
+INDEX_ENTRY = struct.Struct("<I")
+REGION_ENTRY = struct.Struct("<II")
+REGION_ID = struct.Struct("<H")
+MAX_REGIONS = 0xFFFF
+
+# Un lieu à écrire : (clé, nom, description, {direction: index du lieu cible},
+# région). La région regroupe les lieux chargés et évincés ensemble par
+# world.World ; "" pour un lieu sans région particulière.
+RoomRecord = Tuple[str, str, str, Mapping[str, int], str]
+
+
+def write_world(path: str, rooms: Iterable[RoomRecord], start: int = 0) -> int:
+    """
+    Écrit un monde compilé dans `path` à partir d'un itérable de lieux.
+
+    Les lieux sont lus une seule fois, dans l'ordre : leur position dans
+    l'itérable est leur index (identifiant stable). Les chaînes sont écrites
+    dans un fichier temporaire pour ne pas garder tout le monde en mémoire.
+    Le monde est écrit dans un fichier temporaire du même dossier, qui
+    remplace `path` d'un coup (os.replace) : un autre processus ouvre
+    l'ancien fichier ou le nouveau, jamais un fichier à moitié écrit.
+    Retourne le nombre de lieux écrits.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            count = _write(out, rooms, start)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return count
+
+
+def _write(out, rooms: Iterable[RoomRecord], start: int) -> int:
+    keys = []
+    counts = [0] * len(DIRECTIONS)
+    # Sorties (cible, source * 8 + direction) pour l'index des sorties entrantes
+    edge_targets = array("I")
+    edge_codes = array("I")
+    max_target = -1
+    string_size = 0
+    # Régions : nom -> numéro, et numéro de région de chaque lieu
+    regions: Dict[str, int] = {}
+    region_names = []
+    room_regions = array("H")
+
+    with tempfile.TemporaryFile() as strings:
+        out.write(b"\0" * HEADER.size)
+        for key, name, description, exits, region in rooms:
+            targets = [-1] * len(DIRECTIONS)
+            for direction, target in exits.items():
+                if target is None or target < 0:
+                    continue
+                d = DIRECTION_INDEX.get(direction.upper())
+                if d is None:
+                    raise ValueError(f"Direction inconnue '{direction}' pour le lieu '{key}'.")
+                targets[d] = target
+                counts[d] += 1
+                edge_targets.append(target)
+                edge_codes.append(len(keys) * 8 + d)
+                if target > max_target:
+                    max_target = target
+
+            fields = []
+            for text in (key, name, description):
+                data = text.encode("utf-8")
+                strings.write(data)
+                fields.append(string_size)
+                fields.append(len(data))
+                string_size += len(data)
+            out.write(RECORD.pack(*targets, *fields))
+            keys.append(key)
+
+            region_id = regions.get(region)
+            if region_id is None:
+                if len(regions) == MAX_REGIONS:
+                    raise ValueError(f"Trop de régions (maximum {MAX_REGIONS}).")
+                region_id = regions[region] = len(regions)
+                data = region.encode("utf-8")
+                strings.write(data)
+                region_names.append((string_size, len(data)))
+                string_size += len(data)
+            room_regions.append(region_id)
+
+        count = len(keys)
+        if max_target >= count:
+            raise ValueError(f"Sortie vers un lieu inexistant (index {max_target}).")
+        if count and not 0 <= start < count:
+            raise ValueError(f"Lieu de départ invalide (index {start}).")
+
+        # Index des clés, trié pour la recherche dichotomique de World.find.
+        order = sorted(range(count), key=keys.__getitem__)
+        for i in range(1, count):
+            if keys[order[i]] == keys[order[i - 1]]:
+                raise ValueError(f"Clé de lieu en double : '{keys[order[i]]}'.")
+        out.write(b"".join(INDEX_ENTRY.pack(i) for i in order))
+
+        # Sorties entrantes, regroupées par cible (tri par dénombrement, O(V + E))
+        offsets = array("I", bytes(4 * (count + 1)))
+        for target in edge_targets:
+            offsets[target + 1] += 1
+        for i in range(count):
+            offsets[i + 1] += offsets[i]
+        incoming = array("I", bytes(4 * len(edge_codes)))
+        fill = array("I", offsets)
+        for target, code in zip(edge_targets, edge_codes):
+            incoming[fill[target]] = code
+            fill[target] += 1
+        out.write(offsets.tobytes() if sys.byteorder == "little" else _swapped(offsets))
+        out.write(incoming.tobytes() if sys.byteorder == "little" else _swapped(incoming))
+
+        # Régions ; la table des lieux est complétée pour garder l'alignement sur 4 octets
+        out.write(b"".join(REGION_ENTRY.pack(*entry) for entry in region_names))
+        if count % 2:
+            room_regions.append(0)
+        out.write(room_regions.tobytes() if sys.byteorder == "little" else _swapped(room_regions))
+
+        strings.seek(0)
+        shutil.copyfileobj(strings, out)
+
+        out.seek(0)
+        out.write(HEADER.pack(MAGIC, VERSION, len(regions), count, start, *counts))
+    return count
+
+
+def _swapped(values: array) -> bytes:
+    # Le format est little-endian quelle que soit la machine
+    values = array(values.typecode, values)
+    values.byteswap()
+    return values.tobytes()
+
+
+def compile_world(source: Mapping, path: str) -> int:
+    """
+    Compile une carte déclarative (dictionnaire) vers le fichier `path`.
+
+    La carte a la forme :
+    {"start": "cle", "rooms": {"cle": {"name": ..., "description": ...,
+                                      "region": ...,
+                                      "exits": {"N": "autre_cle", ...}}}}
+    """
+    rooms: Dict[str, Mapping] = source["rooms"]
+    index = {key: i for i, key in enumerate(rooms)}
+
+    def records():
+        for key, room in rooms.items():
+            exits = {}
+            for direction, target in room.get("exits", {}).items():
+                if target is None:
+                    continue
+                if target not in index:
+                    raise ValueError(f"Sortie '{direction}' de '{key}' vers un lieu inconnu : '{target}'.")
+                exits[direction] = index[target]
+            yield key, room["name"], room.get("description", ""), exits, room.get("region", "")
+
+    start = source.get("start")
+    if start is not None and start not in index:
+        raise ValueError(f"Lieu de départ inconnu : '{start}'.")
+    return write_world(path, records(), index.get(start, 0))
+
+
+def compile_file(source_path: str, path: str) -> int:
+    """Compile le fichier JSON `source_path` vers le fichier binaire `path`."""
+    with open(source_path, encoding="utf-8") as f:
+        source = json.load(f)
+    return compile_world(source, path)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        print("Usage : python world_compiler.py <carte.json> <monde.world>")
+        return 1
+    count = compile_file(argv[0], argv[1])
+    print(f"{count} lieux compilés dans {argv[1]}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
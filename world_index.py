@@ -0,0 +1,139 @@
+# Description: World index.
+
+# world_index.py
+# Index du monde tenus à jour à chaque modification de sortie, en O(1) :
+# - nombre de sorties par direction et directions utilisées (valid_directions) ;
+# - sorties entrantes (« quels lieux mènent ici ? »).
+# Les sorties entrantes initiales viennent du monde (base_incoming, calculé à
+# la compilation) ; l'index ne garde que les différences depuis le chargement.
+#
+# Les modifications passent par WorldIndex.connect / disconnect. Les écritures
+# directes (room.exits[d] = ..., world.set_exit) restent prises en compte :
+# l'index est abonné à world.exit_listeners.
+
+import weakref
+from typing import Dict, List, Set, Tuple
+
+from world_compiler import DIRECTION_INDEX, DIRECTIONS
+
+# Un index par monde, partagé par toutes les sessions qui y jouent
+_INDEXES = weakref.WeakKeyDictionary()
+
+
+def index_for(world) -> "WorldIndex":
+    """Retourne l'index partagé du monde `world` (créé au premier appel)."""
+    index = _INDEXES.get(world)
+    if index is None:
+        index = _INDEXES[world] = WorldIndex(world)
+    return index
+
+
+def _room_id(room) -> int:
+    # Accepte un lieu (Room, RoomView) ou directement son index
+    return room if isinstance(room, int) else room.id
+
+
+class WorldIndex:
+    """
+    Propriétaire des modifications de sorties d'un monde.
+
+    Attributs
+    ---------
+    direction_counts : Dict[str, int]
+        Nombre de sorties existantes par direction.
+    valid_directions : Set[str]
+        Directions utilisées par au moins une sortie ; l'ensemble est modifié
+        sur place, on peut donc en garder une référence.
+
+    L'index ne garde qu'une référence faible vers le monde (qui, lui, le
+    garde parmi ses exit_listeners) : il ne le maintient pas en vie.
+
+    Exemples
+    --------
+    >>> from compact import CompactWorld
+    >>> world = CompactWorld.from_source({"rooms": {
+    ...     "a": {"name": "A", "exits": {"E": "b"}},
+    ...     "b": {"name": "B", "exits": {"O": "a"}}}})
+    >>> index = WorldIndex(world)
+    >>> sorted(index.valid_directions)
+    ['E', 'O']
+    >>> index.connect(0, "u", 1); index.disconnect(0, "E")
+    >>> sorted(index.valid_directions), index.incoming(1)
+    (['O', 'U'], [(0, 'U')])
+    """
+
+    def __init__(self, world) -> None:
+        self._world = weakref.ref(world)
+        self.direction_counts: Dict[str, int] = dict(world.direction_counts)
+        self.valid_directions: Set[str] = {d for d, n in self.direction_counts.items() if n}
+        # Différences avec les sorties entrantes initiales : cible -> {(source, direction)}
+        self._added: Dict[int, Set[Tuple[int, str]]] = {}
+        self._removed: Dict[int, Set[Tuple[int, str]]] = {}
+        world.exit_listeners.append(self.exit_changed)
+
+    @property
+    def world(self):
+        return self._world()
+
+    # Modifications
+    def connect(self, room, direction: str, target) -> None:
+        """Crée (ou remplace) la sortie `direction` de `room` vers `target`."""
+        direction = direction.upper()
+        if direction not in DIRECTION_INDEX:
+            raise ValueError(f"Direction inconnue : '{direction}'")
+        self.world.set_exit(_room_id(room), direction, _room_id(target))
+
+    def disconnect(self, room, direction: str) -> None:
+        """Supprime la sortie `direction` de `room` (sans effet si elle n'existe pas)."""
+        direction = direction.upper()
+        if direction not in DIRECTION_INDEX:
+            raise ValueError(f"Direction inconnue : '{direction}'")
+        self.world.set_exit(_room_id(room), direction, -1)
+
+    def exit_changed(self, index: int, direction: str, old: int, new: int) -> None:
+        """Met à jour les index après une modification de sortie (O(1))."""
+        edge = (index, direction)
+        if old >= 0:
+            added = self._added.get(old)
+            if added is not None and edge in added:
+                added.discard(edge)
+            else:
+                self._removed.setdefault(old, set()).add(edge)
+            self._count(direction, -1)
+        if new >= 0:
+            removed = self._removed.get(new)
+            if removed is not None and edge in removed:
+                removed.discard(edge)
+            else:
+                self._added.setdefault(new, set()).add(edge)
+            self._count(direction, 1)
+
+    def _count(self, direction: str, delta: int) -> None:
+        count = self.direction_counts[direction] = self.direction_counts[direction] + delta
+        if count:
+            self.valid_directions.add(direction)
+        else:
+            self.valid_directions.discard(direction)
+
+    # Requêtes
+    def incoming(self, room) -> List[Tuple[int, str]]:
+        """Sorties menant à `room` : liste de (index du lieu source, direction)."""
+        index = _room_id(room)
+        removed = self._removed.get(index)
+        edges = self.world.base_incoming(index)
+        if removed:
+            edges = [edge for edge in edges if edge not in removed]
+        added = self._added.get(index)
+        if added:
+            edges.extend(sorted(added, key=lambda edge: (edge[0], DIRECTION_INDEX[edge[1]])))
+        return edges
+
+    def sources(self, room) -> List[int]:
+        """Index des lieux ayant au moins une sortie vers `room`."""
+        return sorted({source for source, _ in self.incoming(room)})
+
+    def exits(self, room) -> Dict[str, int]:
+        """Sorties existantes de `room` : {direction: index du lieu cible}."""
+        index = _room_id(room)
+        exit_index = self.world.exit_index
+        return {d: t for d in DIRECTIONS if (t := exit_index(index, d)) >= 0}